@@ -2,68 +2,129 @@ import datetime
 import os
 from typing import Any
 import time
-import hid
 import cv2
 import numpy as np
-from threading import Thread, Event
+from types import MappingProxyType
+from threading import Thread, Event, Lock, current_thread
+from camera_backends import get_backend, set_backend
+from camera_device_registry import device_registry
+from camera_hid_channel import HidChannel, close_hid_channels, shared_hid_channel
+from frame_ring import FrameRing, FrameSubscriber
+from image_writer import get_image_writer
+from raw_recorder import RawRecorder
+from stream_stats import StreamStats
+
+# UVC parameter name (as reported by get_supported_uvc_parameter) to its OpenCV capture property
+UVC_PROPERTY_IDS = MappingProxyType({
+    'brightness': cv2.CAP_PROP_BRIGHTNESS,
+    'contrast': cv2.CAP_PROP_CONTRAST,
+    'saturation': cv2.CAP_PROP_SATURATION,
+    'sharpness': cv2.CAP_PROP_SHARPNESS,
+    'hue': cv2.CAP_PROP_HUE,
+    'white_balance_blue_u': cv2.CAP_PROP_WHITE_BALANCE_BLUE_U,
+    'gamma': cv2.CAP_PROP_GAMMA,
+    'exposure': cv2.CAP_PROP_EXPOSURE,
+    'gain': cv2.CAP_PROP_GAIN,
+    'zoom': cv2.CAP_PROP_ZOOM,
+    'pan': cv2.CAP_PROP_PAN,
+    'tilt': cv2.CAP_PROP_TILT,
+    'backlight': cv2.CAP_PROP_BACKLIGHT,
+    'focus': cv2.CAP_PROP_FOCUS,
+    'roll': cv2.CAP_PROP_ROLL,
+    'iris': cv2.CAP_PROP_IRIS,
+})
+# OpenCV capture property back to its UVC parameter name
+UVC_PROPERTY_NAMES = MappingProxyType({prop_id: name for name, prop_id in UVC_PROPERTY_IDS.items()})
+# Names of the capture properties 0..37 probed by get_supported_uvc_parameter, in property id order
+CAPTURE_PROPERTY_NAMES = ('msec', 'frames', 'ratio', 'width', 'height', 'fps', 'fourcc', 'count', 'format', 'mode',
+                          'brightness', 'contrast', 'saturation', 'hue', 'gain', 'exposure', 'convert_rgb',
+                          'white_balance_blue_u', 'rectification', 'monochrome', 'sharpness', 'auto_exposure',
+                          'gamma', 'temperature', 'trigger', 'trigger_delay', 'white_balance_red_v', 'zoom', 'focus',
+                          'guid', 'iso_speed', '', 'backlight', 'pan', 'tilt', 'roll', 'iris', 'settings',
+                          'buffersize', 'autofocus')
+
+
+class CameraSession:
+    """
+        Holds everything that belongs to one assigned camera node: the capture handle, the capture/process/display
+        threads with their frame rings and stop event, and the HID channel. Camera_api keeps one session per node
+        so several cameras can stream and be controlled at the same time. Frames are read from the rings only,
+        through wait_for_frame() or subscribe_frames().
+    """
+
+    def __init__(self, camera_node: int, cap):
+        self.node = camera_node
+        self.cap = cap
+        self.streaming_initialised = False
+        self.streaming_status = False
+        self.exit_val = False
+        self.stream_thread = None
+        self.capture_thread = None
+        self.process_thread = None
+        self.stop_event = Event()
+        self.raw_ring = None
+        self.frame_ring = None
+        self.capture_fps = 0
+        self.capture_bytes_per_second = 0
+        self.frames_captured = 0
+        self.headless = False
+        self.stream_stats = None
+        self.clock_offset = None  # driver buffer clock to time.monotonic(), None without driver timestamps
+        self.buffer_depth = None  # frames the driver queues ahead of read()
+        self.settle_times = []
+        self.uvc_supported = None  # cached get_supported_uvc_parameter() result
+        self.formats = None  # supported (format, width, height, fps) modes in format index order
+        self.format_index = None  # (format, width, height, fps) -> format index
+        self.current_format = None
+        self.uvc_shadow = {}  # last (value, mode) written or read per UVC parameter
+        self.fourcc = None
+        self.converter = None
+        self.output_spec = None  # (raw shape, raw dtype, output shape, output dtype) of the converter
+        self.raw_recorder = None
+        self.hid_channel = None
+        self.lock = Lock()
 
 
 class Camera_api:
-    streaming_status = {}
-    streaming_threads = {}
-    stop_events = {}
-    exit_val = None
+    sessions = {}
+    sessions_lock = Lock()
+    display_lock = Lock()
     child_folder = None
     main_folder = None
-    cam_list = []
-    cam_index = []
     global RED_TEXT, RESET_COLOR
-    frame = None
-    frame1 = None
-    streaming_initialised = False
-    resolution_found = None
-    VID = None
-    PID = None
-    device_path = None
     slash_reference = None
-    supported_uvc_properties = None
-    uvc_propID = None
-    possible_uvc_list = None
-    support_mode = None
-    prop_id = None
-    available_properties = None
-    current_mode = None
-    current_value = None
-    supported_mode = None
-    default_value = None
-    roll_prop = None
-    stepping_delta = None
-    minimum = None
-    maximum = None
-    capture_properties = None
-    con_prop = None
-    gain_prop = None
-    supported_properties = None
-    iris_prop = None
-    focus_prop = None
-    tilt_prop = None
-    backlight_prop = None
-    pan_prop = None
-    zoom_prop = None
-    exp_prop = None
-    gamma_prop = None
-    wb_prop = None
-    hue_prop = None
-    sharp_prop = None
-    sat_prop = None
-    bri_prop = None
-    serial_number = None
-    firmware = None
-    device = None
-    devices = None
-    cap = None
-    cap2 = None
-    cap1 = None
+
+    # Pixel format (FOURCC) to the converter that turns a captured frame into a displayable image.
+    # Formats missing here (MJPG decoded by OpenCV, BGR, ...) are passed through unchanged.
+    FRAME_CONVERTERS = {
+        'UYVY': 'convert_uyvy_to_bgr',
+        'YUY2': 'convert_yuy2_to_bgr',
+        'Y12': 'convert_y12_to_y8',
+        'Y16': 'convert_y16_to_rgb',
+    }
+
+    # Slots of the per stream frame rings (capture -> process and process -> consumers)
+    RAW_RING_SIZE = 4
+    FRAME_RING_SIZE = 4
+    # Seconds to wait for the first frame of a stream / for a fresh frame after a parameter change
+    FIRST_FRAME_TIMEOUT = 10
+    FRAME_TIMEOUT = 5
+    # Frames the driver may hold queued when the backend reports no buffer count (CAP_PROP_BUFFERSIZE)
+    CAPTURE_BUFFER_DEPTH = 4
+
+    # Adaptive hold of uvc_var: the image counts as settled once SETTLE_WINDOW consecutive frames differ by no more
+    # than these tolerances (in 8-bit luma levels) in mean brightness and in mean absolute per pixel change.
+    SETTLE_WINDOW = 3
+    SETTLE_MEAN_TOLERANCE = 1.0
+    SETTLE_DIFF_TOLERANCE = 2.0
+    SETTLE_SAMPLE_STEP = 8  # only every 8th row and column is compared
+
+    # Default policy of set_resolution(negotiate=True), see negotiate_format()
+    NEGOTIATION_POLICY = {
+        'exact_aspect': True,  # only fall back to another aspect ratio if no mode has the requested one
+        'mjpg_above_bandwidth': 1920 * 1080 * 30,  # pixels per second above which MJPG is preferred
+        'highest_fps': True,  # without an exact FPS match take the highest FPS, otherwise the nearest
+    }
 
     RED_TEXT = "\033[91m"
     RESET_COLOR = "\033[0m"
@@ -99,6 +160,7 @@ class Camera_api:
             122: 'Unable to set uvc parameter value to default',
             123: 'Missing Image save path',
             124: 'Missing Arguments',
+            125: 'Unable to start raw recording',
             201: 'Invalid camera node',
             202: 'Invalid Width',
             203: 'Invalid Height',
@@ -119,6 +181,10 @@ class Camera_api:
             218: 'Invalid Save to path',
             219: 'Invalid image save name',
             220: 'Invalid Hid_bytes',
+            221: 'Invalid frame consumer policy',
+            222: 'Invalid headless value',
+            223: 'Backend cannot change while cameras are assigned',
+            224: 'Invalid recording size',
             301: 'Unable to create the folder',
             400: "Unknown Error code"
         }
@@ -128,6 +194,67 @@ class Camera_api:
         except Exception:
             return status_code, ERROR_UNKNOWN_ERROR_CODE
 
+    @classmethod
+    def get_session(cls, camera_node: int):
+        """
+            Usage:
+                Returns the session of an assigned camera node.
+
+            Parameters:
+                - camera_node (int): Camera node obtained from get_connected_devices().
+
+            Returns:
+                CameraSession: Session of the node, or None if the node is not assigned.
+        """
+        with cls.sessions_lock:
+            return cls.sessions.get(camera_node)
+
+    @classmethod
+    def get_hid_channel(cls, camera_node: int):
+        """
+            Usage:
+                Returns the persistent HID channel of an assigned camera node, creating it on first use.
+                The channel stays open until the camera is released. Identical cameras on other nodes get the
+                channels of their own HID interfaces, see hid_channel_for_device().
+
+            Parameters:
+                - camera_node (int): Camera node obtained from get_connected_devices().
+
+            Returns:
+                HidChannel: HID channel of the node, or None if the node is not assigned.
+        """
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None
+        with session.lock:
+            if session.hid_channel is None:
+                channel = cls.hid_channel_for_device(device_registry.get_device(camera_node))
+                if channel.path is None:
+                    return channel  # not connected, resolved again on the next call
+                session.hid_channel = channel
+            return session.hid_channel
+
+    @classmethod
+    def hid_channel_for_device(cls, device):
+        """
+            Usage:
+                Resolves the HID interface of a camera from its video device path, or from its position among the
+                cameras with the same VID/PID, and returns the channel shared by every user of that interface.
+
+            Parameters:
+                - device (DeviceInfo): Camera from the device registry.
+
+            Returns:
+                HidChannel: The shared channel. If no HID interface is connected, a channel that raises IOError
+                            when opened.
+        """
+        vendor_id, product_id = int('0x' + device.vid, 16), int('0x' + device.pid, 16)
+        ordinal = device_registry.find_by_vid_pid(device.vid, device.pid).index(device)
+        try:
+            return shared_hid_channel(vendor_id, product_id, device.path, ordinal)
+        except IOError:
+            return HidChannel(vendor_id, product_id)
+
     @classmethod
     def get_connected_devices(cls) -> list:
 
@@ -145,10 +272,8 @@ class Camera_api:
         status_code = False
         success_code = 0
         try:
-            cls.cap1 = cv2.VideoCapture()
-            for i in range(cls.cap1.getDevices()[1]):
-                device_name = str(cls.cap1.getDeviceInfo(i)[1])
-                detected_devices[i] = device_name
+            for node, device in device_registry.get_devices().items():
+                detected_devices[node] = device.name
             if detected_devices != {}:
                 return detected_devices, success_code
             else:
@@ -156,13 +281,41 @@ class Camera_api:
         except Exception:
             return status_code, ERROR_NO_DEVICES_FOUND
 
+    @classmethod
+    def set_backend(cls, backend):
+        """
+            Usage:
+                Selects the backend cameras and HID channels are opened through, e.g. a SyntheticBackend from
+                camera_backends to run the API without hardware. The device registry is enumerated again
+                through the new backend.
+
+            Parameters:
+                - backend: An OpenCVBackend, a SyntheticBackend or any object with the same methods and a
+                  capability_cache.
+
+            Returns:
+                tuple: True and 0 as success code.
+                       - If a camera is still assigned, returns False and error code 223.
+        """
+
+        ERROR_CAMERAS_ASSIGNED = 223  # Backend cannot change while cameras are assigned
+
+        with cls.sessions_lock:
+            if cls.sessions:
+                return False, ERROR_CAMERAS_ASSIGNED
+            set_backend(backend)
+            device_registry.invalidate()
+            close_hid_channels()
+        return True, 0
+
     @classmethod
     def assign_camera(cls, camera_node: int) -> int:
         global RED_TEXT, RESET_COLOR
 
         """           
             Usage:
-                Assigns the specified camera node using OpenCV.
+                Assigns the specified camera node through the camera backend (OpenCV unless set_backend() chose
+                another one).
 
             Parameters:
                 - camera_node (int): Camera node obtained from get_devices().
@@ -181,26 +334,25 @@ class Camera_api:
         success_code = 0
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
-        elif cls.cap is not None:
-            return status_code, ERROR_CAMERA_IS_OCCUPIED
 
-        cls.cap = None
-        cls.stop = False
+        with cls.sessions_lock:
+            if camera_node in cls.sessions:
+                return status_code, ERROR_CAMERA_IS_OCCUPIED
 
-        try:
-            cls.cap = cv2.VideoCapture(camera_node)
-            no_of_devices = cls.cap.getDevices()[1]
-            if camera_node < no_of_devices:
-                if cls.cap.isOpened():
-                    cls.cam_list.append(cls.cap)
-                    cls.cam_index.append(camera_node)
-                    return cls.cap, success_code
+            try:
+                cap = get_backend().open_capture(camera_node)
+                no_of_devices = cap.getDevices()[1]
+                if camera_node < no_of_devices:
+                    if cap.isOpened():
+                        cls.sessions[camera_node] = CameraSession(camera_node, cap)
+                        return cap, success_code
+                    else:
+                        return status_code, ERROR_CAMERA_IS_OCCUPIED
                 else:
-                    return status_code, ERROR_CAMERA_IS_OCCUPIED
-            else:
+                    cap.release()
+                    return status_code, ERROR_INVALID_CAMERA_NODE
+            except Exception:
                 return status_code, ERROR_INVALID_CAMERA_NODE
-        except Exception:
-            return status_code, ERROR_INVALID_CAMERA_NODE
 
     @classmethod
     def release_camera(cls, camera_node: int) -> int:
@@ -224,17 +376,23 @@ class Camera_api:
         ERROR_UNABLE_TO_RELEASE_CAMERA = 103  # Unable to release the camera
         status_code = False
         success_code = 0
-        cls.exit_val = False
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
+
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            if cls.cam_list[cls.cam_index.index(int(camera_node))].isOpened():
+            if session.cap.isOpened():
                 try:
-                    cls.cam_list[cls.cam_index.index(int(camera_node))].release()
-                    cls.cam_list.clear()
-                    cls.cam_index.clear()
-                    cls.cap = None
-                    cls.exit_val = True
+                    # Stop this node's stream before its capture handle goes away
+                    cls.stop_stream_threads(session)
+                    session.cap.release()
+                    if session.hid_channel is not None:
+                        session.hid_channel.close()
+                    session.exit_val = True
+                    with cls.sessions_lock:
+                        cls.sessions.pop(camera_node, None)
                     status_code = True
                     return status_code, success_code
                 except:
@@ -269,22 +427,19 @@ class Camera_api:
         ERROR_UNABLE_TO_GET_DEVICE_PATH = 104  # Unable to get the Device path
         status_code = False
         success_code = 0
-        cls.device_path = None
 
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
 
         try:
-            cls.cap = cv2.VideoCapture()
-            no_of_devices = cls.cap.getDevices()[1]
-
-            if camera_node < no_of_devices:
-                cls.device_path = cls.cap.getDeviceInfo(camera_node)[4]
+            device = device_registry.get_device(camera_node)
+            if device is not None:
+                device_path = device.path
             else:
                 return status_code, ERROR_INVALID_CAMERA_NODE
 
-            if cls.device_path != '':
-                return cls.device_path, success_code
+            if device_path != '':
+                return device_path, success_code
             else:
                 return status_code, ERROR_UNABLE_TO_GET_DEVICE_PATH
 
@@ -310,22 +465,19 @@ class Camera_api:
         ERROR_INVALID_CAMERA_NODE = 201
         ERROR_UNABLE_TO_GET_PID = 105  # Unable to get the PID
         status_code = False
-        cls.PID = None
 
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
 
         try:
-            cls.cap = cv2.VideoCapture()
-            no_of_devices = cls.cap.getDevices()[1]
-
-            if camera_node < no_of_devices:
-                cls.PID = cls.cap.getDeviceInfo(camera_node)[3]
+            device = device_registry.get_device(camera_node)
+            if device is not None:
+                PID = device.pid
             else:
                 return status_code, ERROR_INVALID_CAMERA_NODE
 
-            if cls.PID != '':
-                return cls.PID, 0
+            if PID != '':
+                return PID, 0
             else:
                 return status_code, ERROR_UNABLE_TO_GET_PID
         except Exception:
@@ -353,18 +505,15 @@ class Camera_api:
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
 
-        cls.VID = None
-
         try:
-            cls.cap = cv2.VideoCapture()
-            no_of_devices = cls.cap.getDevices()[1]
-            if camera_node < no_of_devices:
-                cls.VID = cls.cap.getDeviceInfo(camera_node)[2]
+            device = device_registry.get_device(camera_node)
+            if device is not None:
+                VID = device.vid
             else:
                 return status_code, ERROR_INVALID_CAMERA_NODE
 
-            if cls.VID != '':
-                return cls.VID, success_code
+            if VID != '':
+                return VID, success_code
             else:
                 return status_code, ERROR_UNABLE_TO_GET_VID
         except Exception:
@@ -392,39 +541,121 @@ class Camera_api:
         ERROR_UNABLE_TO_GET_FIRMWARE = 107  # Unable to get the Firmware for the given camera
         status_code = False
         success_code = 0
-        cls.firmware = None
+        firmware = None
 
         if not isinstance(camera_node, int):
             return False, ERROR_INVALID_CAMERA_NODE
 
+        if cls.get_session(camera_node) is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            # Open the device using a path
-            cls.devices = hid.enumerate(
-                int('0x' + cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)[2], 16),
-                int('0x' + cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)[3], 16))
-            print(cls.devices)
-            if not cls.devices:
-                return cls.firmware, ERROR_UNABLE_TO_GET_FIRMWARE
-
-            cls.device = hid.device()
-            cls.device.open_path(cls.devices[0]["path"])
-            # Refer the HID command.
-            command = [0x00, 0x40]
-            # Send the command to the camera
-            cls.device.write(command)
-            # Read the response (adjust the length as per your expected response)
-            response = cls.device.read(65, 1000)
-            SDK_VER = (response[3] << 8) + response[4]
-            SVN_VER = (response[5] << 8) + response[6]
-            pMajorVersion = response[1]
-            pMinorVersion1 = response[2]
-            cls.firmware = str(pMajorVersion) + "." + str(pMinorVersion1) + "." + str(SDK_VER) + "." + str(SVN_VER)
+            channel = cls.get_hid_channel(camera_node)
+            try:
+                channel.open()
+            except IOError:
+                return firmware, ERROR_UNABLE_TO_GET_FIRMWARE
+
+            firmware = cls.read_firmware_version(channel)
         except Exception as e:
             if NameError:
                 return status_code, ERROR_CAMERA_NOT_ASSIGNED
             else:
                 return status_code, ERROR_INVALID_CAMERA_NODE
-        return cls.firmware, success_code
+        return firmware, success_code
+
+    @classmethod
+    def read_firmware_version(cls, channel):
+        """
+            Usage:
+                Queries the firmware version over an HID channel.
+
+            Returns:
+                str: Firmware version as "major.minor.sdk.svn".
+        """
+        # Refer the HID command.
+        command = [0x40]
+        # Send the command to the camera and read the response
+        response = channel.transact(command, 1000)
+        SDK_VER = (response[3] << 8) + response[4]
+        SVN_VER = (response[5] << 8) + response[6]
+        pMajorVersion = response[1]
+        pMinorVersion1 = response[2]
+        return str(pMajorVersion) + "." + str(pMinorVersion1) + "." + str(SDK_VER) + "." + str(SVN_VER)
+
+    @classmethod
+    def get_capabilities(cls, camera_node: int, refresh: bool = False):
+        """
+            Usage:
+                Gets the supported formats and UVC parameters of the camera from the camera backend's on-disk
+                capability cache (camera_capability_cache.py), keyed by VID, PID and firmware version. Only the HID
+                interface is used to read the firmware version; the video device is opened only when the camera is
+                not in the cache yet (or refresh is set), and released again if it was not assigned before.
+
+            Parameters:
+                - camera_node (int): Camera node obtained from get_connected_devices().
+                - refresh (bool): Probe the camera again and replace the cached entry.
+
+            Returns:
+                tuple: A dict {'vid', 'pid', 'firmware', 'name', 'formats', 'uvc'} and 0 on success, otherwise False
+                       and an error code. 'formats' lists (format, width, height, fps) as get_supported_resolution()
+                       and 'uvc' is the dict returned by get_supported_uvc_parameter().
+                       - If there is no camera at the node, returns False and error code 101.
+                       - If an invalid camera node is provided, returns False and error code 201.
+                       - Errors of assign_camera(), get_supported_resolution() and get_supported_uvc_parameter().
+        """
+        ERROR_NO_DEVICES_FOUND = 101
+        ERROR_INVALID_CAMERA_NODE = 201
+        status_code = False
+        success_code = 0
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return status_code, ERROR_INVALID_CAMERA_NODE
+        device = device_registry.get_device(camera_node)
+        if device is None:
+            return status_code, ERROR_NO_DEVICES_FOUND
+
+        # The firmware version completes the cache key, without it the camera is probed every time
+        firmware = None
+        session = cls.get_session(camera_node)
+        try:
+            if session is not None:
+                channel = cls.get_hid_channel(camera_node)
+                firmware = cls.read_firmware_version(channel)
+            else:
+                channel = cls.hid_channel_for_device(device)
+                try:
+                    firmware = cls.read_firmware_version(channel)
+                finally:
+                    channel.close()
+        except Exception:
+            firmware = None
+
+        cache = get_backend().capability_cache
+        if firmware is not None and not refresh:
+            entry = cache.load(device.vid, device.pid, firmware)
+            if entry is not None:
+                return entry, success_code
+
+        assigned_here = session is None
+        if assigned_here:
+            cap, error_code = cls.assign_camera(camera_node)
+            if error_code != success_code:
+                return status_code, error_code
+        try:
+            formats, error_code = cls.get_supported_resolution(camera_node)
+            if error_code != success_code:
+                return status_code, error_code
+            uvc, error_code = cls.get_supported_uvc_parameter(camera_node)
+            if error_code != success_code:
+                return status_code, error_code
+        finally:
+            if assigned_here:
+                cls.release_camera(camera_node)
+
+        if firmware is None:
+            return {'vid': device.vid, 'pid': device.pid, 'firmware': None, 'name': device.name,
+                    'formats': [tuple(mode) for mode in formats], 'uvc': uvc}, success_code
+        return cache.store(device.vid, device.pid, firmware, device.name, formats, uvc), success_code
 
     @classmethod
     def get_unique_ID(cls, camera_node: int):
@@ -448,27 +679,23 @@ class Camera_api:
         ERROR_UNABLE_TO_GET_UNIQUE_ID = 108
         status_code = False
         success_code = 0
-        cls.serial_number = None
+        serial_number = None
 
         if not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
 
+        if cls.get_session(camera_node) is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            # Open the device using path
-            cls.devices = hid.enumerate(
-                int('0x' + cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)[2], 16),
-                int('0x' + cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)[3], 16))
-
-            if not cls.devices:
-                return cls.serial_number, ERROR_UNABLE_TO_GET_UNIQUE_ID
-                # return None
-            cls.device = hid.device()
-            cls.device.open_path(cls.devices[0]["path"])
-            command = [0x00, 0x41, 0x01, 0x00, 0x00, 0x00]
-            cls.device.write(command)
-            response = cls.device.read(65, 1000)
-            cls.serial_number = format(response[1], '02X') + format(response[2], '02X') + format(response[3],
-                                                                                                 '02X') + format(
+            channel = cls.get_hid_channel(camera_node)
+            try:
+                channel.open()
+            except IOError:
+                return serial_number, ERROR_UNABLE_TO_GET_UNIQUE_ID
+            command = [0x41, 0x01, 0x00, 0x00, 0x00]
+            response = channel.transact(command, 1000)
+            serial_number = format(response[1], '02X') + format(response[2], '02X') + format(response[3],
+                                                                                             '02X') + format(
                 response[4], '02X')
         except Exception as e:
             if NameError:
@@ -476,7 +703,7 @@ class Camera_api:
             else:
                 return status_code, ERROR_INVALID_CAMERA_NODE
 
-        return cls.serial_number, success_code
+        return serial_number, success_code
 
     @classmethod
     def get_supported_resolution(cls, camera_node: int):
@@ -505,9 +732,12 @@ class Camera_api:
             return status_code, ERROR_INVALID_CAMERA_NODE
         supported_resolution = []
 
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            for res in range(cls.cam_list[cls.cam_index.index(int(camera_node))].getFormats()[1]):
-                supported_resolution.append(cls.cap.getFormatType(res)[1:])
+            for res in range(session.cap.getFormats()[1]):
+                supported_resolution.append(session.cap.getFormatType(res)[1:])
             return supported_resolution, success_code
         except Exception:
             if NameError:
@@ -516,7 +746,75 @@ class Camera_api:
                 return status_code, ERROR_UNABLE_TO_GET_RESOLUTION
 
     @classmethod
-    def set_resolution(cls, camera_node: int, width: int, height: int, Format: str, FPS: int):
+    def get_format_index(cls, camera_node: int):
+        """
+            Usage:
+                Returns the node's map of (format, width, height, fps) to format index. It is built once per
+                assignment from the capability cache (the cached format list is in format index order), so setting
+                a resolution needs neither a format scan nor a frame read.
+
+            Returns:
+                tuple: The dict and 0 on success, otherwise False and an error code.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
+        if session.format_index is None:
+            capabilities, error_code = cls.get_capabilities(camera_node)
+            if error_code != 0:
+                return False, error_code
+            session.formats = list(capabilities['formats'])
+            session.format_index = {tuple(mode): index for index, mode in enumerate(session.formats)}
+        return session.format_index, 0
+
+    @classmethod
+    def negotiate_format(cls, formats: list, width: int, height: int, Format: str, FPS: int, policy: dict = None):
+        """
+            Usage:
+                Picks the supported mode closest to the requested one.
+
+                Candidates are ranked by, in this order:
+                - aspect ratio: modes with the requested aspect ratio first (policy 'exact_aspect'),
+                - resolution: smallest relative difference in pixel count,
+                - format: the requested format, or MJPG when the requested mode needs more than
+                  policy 'mjpg_above_bandwidth' pixels per second,
+                - FPS: the requested FPS, then the highest (policy 'highest_fps') or the nearest one.
+
+            Parameters:
+                - formats (list): Supported (format, width, height, fps) modes.
+                - width, height, Format, FPS: Requested mode.
+                - policy (dict): Overrides of NEGOTIATION_POLICY.
+
+            Returns:
+                tuple: The chosen (format, width, height, fps) mode, or None if there are no modes.
+        """
+        rules = dict(cls.NEGOTIATION_POLICY)
+        if policy:
+            rules.update(policy)
+        requested_pixels = max(1, width * height)
+        preferred_format = Format.upper()
+        if requested_pixels * FPS > rules['mjpg_above_bandwidth']:
+            preferred_format = 'MJPG'
+
+        def rank(mode):
+            fmt, mode_width, mode_height, mode_fps = mode
+            aspect_mismatch = rules['exact_aspect'] and mode_width * height != mode_height * width
+            size_distance = abs(mode_width * mode_height - requested_pixels) / requested_pixels
+            format_mismatch = str(fmt).upper() != preferred_format
+            if mode_fps == FPS:
+                fps_rank = (0, 0)
+            elif rules['highest_fps']:
+                fps_rank = (1, -mode_fps)
+            else:
+                fps_rank = (1, abs(mode_fps - FPS))
+            return aspect_mismatch, size_distance, format_mismatch, fps_rank
+
+        return min(formats, key=rank, default=None)
+
+    @classmethod
+    def set_resolution(cls, camera_node: int, width: int, height: int, Format: str, FPS: int,
+                       negotiate: bool = False, policy: dict = None):
 
         """
             Usage:
@@ -528,9 +826,13 @@ class Camera_api:
                 - height (int): Height of the resolution.
                 - Format (str): Format of the resolution.
                 - FPS (int): FPS of the resolution.
+                - negotiate (bool): If the exact mode is not supported, set the closest supported one instead
+                  (see negotiate_format()).
+                - policy (dict): Negotiation policy overrides, see NEGOTIATION_POLICY.
 
             Returns:
                 tuple: True if the resolution is successfully set, otherwise False and an error code.
+                       With negotiate=True, the (format, width, height, fps) mode that was set instead of True.
                        - If the resolution is successfully set, returns True and 0 as success code.
                        - If the camera is not assigned, returns False and error code 102.
                        - If an invalid camera node is provided, returns False and error code 201.
@@ -548,7 +850,6 @@ class Camera_api:
         ERROR_INVALID_FORMAT = 204
         ERROR_INVALID_FPS = 205
         ERROR_UNABLE_TO_SET_RESOLUTIONS = 110
-        ERROR_MISSING_ARGUMENTS = 124
         status_code = False
         success_code = 0
 
@@ -563,37 +864,30 @@ class Camera_api:
         if isinstance(FPS, bool) or not isinstance(FPS, int):
             return status_code, ERROR_INVALID_FPS
 
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+        format_index, error_code = cls.get_format_index(camera_node)
+        if error_code != success_code:
+            return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
+        mode = (Format, width, height, FPS)
+        index = format_index.get(mode)
+        if index is None and negotiate:
+            mode = cls.negotiate_format(session.formats, width, height, Format, FPS, policy)
+            index = format_index.get(mode)
+        if index is None:
+            return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
         try:
-            resolution = (True, Format, width, height, FPS)
-            cls.resolution_found = False
-            try:
-                # Find camera node and attempt to set resolution
-                cls.cam_index_int = int(camera_node)
-                cls.cam_index_pos = cls.cam_index.index(cls.cam_index_int)
-                ret, frame = cls.cam_list[cls.cam_index_pos].read()
-                frame.any()
-
-                for res in range(cls.cam_list[cls.cam_index.index(int(camera_node))].getFormats()[1]):
-                    try:
-                        if resolution == cls.cam_list[cls.cam_index.index(int(camera_node))].getFormatType(res):
-                            cls.cam_list[cls.cam_index.index(int(camera_node))].setFormatType(res)
-                            status_code = True
-                            cls.resolution_found = True
-                            return status_code, success_code
-                    except ValueError:
-                        return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
-                if not cls.resolution_found:
-                    return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
-            except Exception:
-                if NameError:
-                    return status_code, ERROR_CAMERA_NOT_ASSIGNED
-                else:
-                    return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
+            if session.cap.setFormatType(index) is False:
+                return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
+            session.current_format = mode
+            cls.resolve_frame_converter(camera_node)
         except Exception:
-            if TypeError:
-                return status_code, ERROR_MISSING_ARGUMENTS
-            else:
-                return status_code, ERROR_INVALID_CAMERA_NODE
+            return status_code, ERROR_UNABLE_TO_SET_RESOLUTIONS
+        if negotiate:
+            return mode, success_code
+        status_code = True
+        return status_code, success_code
 
     @classmethod
     def get_supported_uvc_parameter(cls, camera_node: int):
@@ -617,85 +911,48 @@ class Camera_api:
         if isinstance(camera_node, bool) or not isinstance(camera_node, int):
             return status_code, ERROR_INVALID_CAMERA_NODE
 
-        cls.possible_uvc_list = ['brightness', 'contrast', 'saturation', 'sharpness', 'hue', 'white_balance_blue_u',
-                                 'gamma', 'exposure',
-                                 'gain', 'zoom', 'pan', 'tilt',
-                                 'backlight', 'focus', 'roll', 'iris']
-
-        cls.supported_uvc_properties = {}
-        cls.minimum = -1
-        cls.maximum = -1
-        cls.stepping_delta = -1
-        cls.supported_mode = -1
-        cls.current_value = -1
-        cls.current_mode = -1
-        cls.default_value = -1
-        cls.bri_prop = []
-        cls.con_prop = []
-        cls.sat_prop = []
-        cls.sharp_prop = []
-        cls.hue_prop = []
-        cls.wb_prop = []
-        cls.gamma_prop = []
-        cls.exp_prop = []
-        cls.gain_prop = []
-        cls.zoom_prop = []
-        cls.pan_prop = []
-        cls.tilt_prop = []
-        cls.backlight_prop = []
-        cls.focus_prop = []
-        cls.roll_prop = []
-        cls.iris_prop = []
-        cls.capture_properties = ['msec', 'frames', 'ratio', 'width', 'height', 'fps', 'fourcc', 'count', 'format',
-                                  'mode', 'brightness',
-                                  'contrast', 'saturation', 'hue', 'gain', 'exposure', 'convert_rgb',
-                                  'white_balance_blue_u', 'rectification',
-                                  'monochrome', 'sharpness', 'auto_exposure', 'gamma', 'temperature', 'trigger',
-                                  'trigger_delay',
-                                  'white_balance_red_v', 'zoom', 'focus', 'guid', 'iso_speed', '', 'backlight', 'pan',
-                                  'tilt', 'roll', 'iris',
-                                  'settings', 'buffersize', 'autofocus']
-        cls.uvc_propID = [cls.bri_prop, cls.con_prop, cls.sat_prop, cls.sharp_prop, cls.hue_prop, cls.wb_prop,
-                          cls.gamma_prop, cls.exp_prop, cls.gain_prop, cls.zoom_prop, cls.pan_prop, cls.tilt_prop,
-                          cls.backlight_prop, cls.focus_prop, cls.roll_prop, cls.iris_prop]
-
-        cls.supported_properties = []
-        cls.support_mode = []
-        cls.feature_list = []
+        supported_uvc_properties = {}
+        minimum = -1
+        maximum = -1
+        stepping_delta = -1
+        supported_mode = -1
+        current_value = -1
+        current_mode = -1
+        default_value = -1
+
+        supported_properties = []
+        support_mode = []
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
         # checking the availability of the UVC parameter for the connected parameter
         try:
-            no_of_devices = cls.cap.getDevices()[1]
+            no_of_devices = session.cap.getDevices()[1]
             if not camera_node < no_of_devices:
                 return status_code, ERROR_INVALID_CAMERA_NODE
 
             for i in range(38):
-                get_availability_properties = (cls.cam_list[cls.cam_index.index(int(camera_node))].get(i))  # 94
+                get_availability_properties = (session.cap.get(i))  # 94
                 value_not_supported_properties = -1.0
                 if get_availability_properties != value_not_supported_properties:
-                    cls.supported_properties.append(cls.capture_properties[i])
-                cls.available_properties = (
-                    cls.cap.get(i, cls.minimum, cls.maximum, cls.stepping_delta, cls.supported_mode,
-                                cls.current_value, cls.current_mode, cls.default_value))  # 132
-                if cls.available_properties[0]:
-
-                    cls.prop_id = list(cls.available_properties)
-
-                    cls.prop_id.append(cls.capture_properties[i])
-                    if cls.prop_id[4] == 3:
-                        cls.support_mode.append(cls.prop_id[-1])
-
-                    for uvc_name in range(len(cls.possible_uvc_list)):
-
-                        if cls.prop_id[-1] == cls.possible_uvc_list[uvc_name]:
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[1])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[2])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[3])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[5])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[7])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[6])
-                            cls.uvc_propID[uvc_name].append(cls.prop_id[4])
-                            cls.supported_uvc_properties[str(cls.prop_id[-1])] = cls.uvc_propID[uvc_name]
-            return cls.supported_uvc_properties, success_code
+                    supported_properties.append(CAPTURE_PROPERTY_NAMES[i])
+                available_properties = (
+                    session.cap.get(i, minimum, maximum, stepping_delta, supported_mode,
+                                    current_value, current_mode, default_value))  # 132
+                if available_properties[0]:
+
+                    prop_id = list(available_properties)
+
+                    prop_id.append(CAPTURE_PROPERTY_NAMES[i])
+                    if prop_id[4] == 3:
+                        support_mode.append(prop_id[-1])
+
+                    if prop_id[-1] in UVC_PROPERTY_IDS:
+                        # min, max, step, current, default, current mode, supported mode
+                        supported_uvc_properties[str(prop_id[-1])] = [prop_id[1], prop_id[2], prop_id[3], prop_id[5],
+                                                                      prop_id[7], prop_id[6], prop_id[4]]
+            session.uvc_supported = supported_uvc_properties
+            return supported_uvc_properties, success_code
         except Exception:
             if NameError:
                 return status_code, ERROR_CAMERA_NOT_ASSIGNED
@@ -737,23 +994,17 @@ class Camera_api:
         if isinstance(Mode, bool) or not isinstance(Mode, int):
             return status_code, ERROR_INVALID_UVC_PARAMETER_MODE
 
-        UVC_PARAMETER_NAMES = ['BRIGHTNESS', 'CONTRAST', 'SHARPNESS', 'SATURATION', 'HUE', 'WHITE_BALANCE_BLUE_U', 'GAMMA', 'EXPOSURE',
-                               'GAIN', 'ZOOM', 'PAN', 'TILT',
-                               'FOCUS', 'BACKLIGHT', 'ROLL', 'IRIS']
-        CAP_UVCPROPERTIES_NAME = [cv2.CAP_PROP_BRIGHTNESS, cv2.CAP_PROP_CONTRAST, cv2.CAP_PROP_SHARPNESS,
-                                  cv2.CAP_PROP_SATURATION, cv2.CAP_PROP_HUE, cv2.CAP_PROP_WHITE_BALANCE_BLUE_U,
-                                  cv2.CAP_PROP_GAMMA, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN, cv2.CAP_PROP_ZOOM,
-                                  cv2.CAP_PROP_PAN, cv2.CAP_PROP_TILT, cv2.CAP_PROP_BACKLIGHT, cv2.CAP_PROP_FOCUS,
-                                  cv2.CAP_PROP_ROLL, cv2.CAP_PROP_IRIS]
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+        prop_id = UVC_PROPERTY_IDS.get(parameter_name.lower())
+        if prop_id is None:
+            return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
         try:
             try:
-                if parameter_name.upper() in UVC_PARAMETER_NAMES:
-                    UVC_PARAMETER_NAMES.index(parameter_name.upper())
-
-                cls.cam_list[cls.cam_index.index(int(camera_node))].set(
-                    CAP_UVCPROPERTIES_NAME[UVC_PARAMETER_NAMES.index(parameter_name.upper())], value, Mode)
-                new_val = int(cls.cam_list[cls.cam_index.index(int(camera_node))].get(
-                    CAP_UVCPROPERTIES_NAME[UVC_PARAMETER_NAMES.index(parameter_name.upper())]))
+                session.cap.set(prop_id, value, Mode)
+                new_val = int(session.cap.get(prop_id))
+                session.uvc_shadow.pop(parameter_name.lower(), None)
                 return new_val, success_code
             except ValueError:
                 return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
@@ -791,20 +1042,15 @@ class Camera_api:
         if not isinstance(parameter_name, str):
             return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
 
-        UVC_PARAMETER_NAMES = ['BRIGHTNESS', 'CONTRAST', 'SHARPNESS', 'SATURATION', 'HUE', 'WHITE_BALANCE_BLUE_U', 'GAMMA', 'EXPOSURE',
-                               'GAIN', 'ZOOM', 'PAN', 'TILT',
-                               'FOCUS', 'BACKLIGHT', 'ROLL', 'IRIS']
-        CAP_UVCPROPERTIES_NAME = [cv2.CAP_PROP_BRIGHTNESS, cv2.CAP_PROP_CONTRAST, cv2.CAP_PROP_SHARPNESS,
-                                  cv2.CAP_PROP_SATURATION, cv2.CAP_PROP_HUE, cv2.CAP_PROP_WHITE_BALANCE_BLUE_U,
-                                  cv2.CAP_PROP_GAMMA, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN, cv2.CAP_PROP_ZOOM,
-                                  cv2.CAP_PROP_PAN, cv2.CAP_PROP_TILT, cv2.CAP_PROP_BACKLIGHT, cv2.CAP_PROP_FOCUS,
-                                  cv2.CAP_PROP_ROLL, cv2.CAP_PROP_IRIS]
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+        prop_id = UVC_PROPERTY_IDS.get(parameter_name.lower())
+        if prop_id is None:
+            return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
         try:
             try:
-                if parameter_name.upper() in UVC_PARAMETER_NAMES:
-                    UVC_PARAMETER_NAMES.index(parameter_name.upper())
-                value = int(cls.cam_list[cls.cam_index.index(int(camera_node))].get(
-                    CAP_UVCPROPERTIES_NAME[UVC_PARAMETER_NAMES.index(parameter_name.upper())]))
+                value = int(session.cap.get(prop_id))
                 return value, success_code
             except ValueError:
                 return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
@@ -815,7 +1061,7 @@ class Camera_api:
                 return status_code, ERROR_UNABLE_TO_GET_UVC_PARAMETER_VALUE
 
     @classmethod
-    def uvc_var(cls, camera_node: int, parameter_name: str, start: int, end: int, step: int, mode: int, hold: int, image_save: bool = False, save_path: str = "", save_format='jpg'):
+    def uvc_var(cls, camera_node: int, parameter_name: str, start: int, end: int, step: int, mode: int, hold: int, image_save: bool = False, save_path: str = "", save_format='jpg', adaptive_hold: bool = False):
 
         """
         Usage:
@@ -832,6 +1078,9 @@ class Camera_api:
             - image_save (bool): Indicates whether to save images while varying the parameter (default is False).
             - save_path (str): Path to save the images (required if image_save is True).
             - save_format (str): Format to save the images (default is 'jpg').
+            - adaptive_hold (bool): Move on as soon as the image has settled after each step instead of always
+              waiting `hold` seconds, which becomes the upper bound. The settle time of every step is printed and
+              available from get_settle_times().
 
         Returns:
             tuple: A tuple containing the following:
@@ -839,7 +1088,6 @@ class Camera_api:
                 - If an error occurs, returns False and an error code.
         """
 
-        cls.exit_val = False
         cls.slash_reference = "\\"
 
         ERROR_INVALID_CAMERA_NODE = 201
@@ -856,6 +1104,7 @@ class Camera_api:
         ERROR_INITIALIZING_STREAM = 121
         ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE = 113
         ERROR_UNABLE_TO_CREATE_FOLDER = 301
+        ERROR_UNABLE_TO_SAVE_IMAGE = 115
         status_code = False
         success_code = 0
 
@@ -875,6 +1124,8 @@ class Camera_api:
             return status_code, ERROR_INVALID_UVC_PARAMETER_MODE
         if isinstance(hold, bool) or not isinstance(hold, int):
             return status_code, ERROR_INVALID_HOLD_VALUE
+        if not isinstance(adaptive_hold, bool):
+            return status_code, ERROR_INVALID_HOLD_VALUE
         if not isinstance(image_save, bool):
             return status_code, ERROR_IMAGE_SAVE_VALUE
         if isinstance(save_format, bool) or not isinstance(save_format, str):
@@ -884,11 +1135,20 @@ class Camera_api:
         # if not save_path:
         #     return False, ERROR_MISSING_IMAGE_SAVE_PATH
 
-        time.sleep(2)
+        prop_id = UVC_PROPERTY_IDS.get(parameter_name.lower())
+        if prop_id is None:
+            return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
 
-        if not cls.streaming_initialised:
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+
+        # Wait for the stream's first frame instead of a fixed delay
+        snapshot, error_code = cls.wait_for_frame(camera_node, timeout=cls.FIRST_FRAME_TIMEOUT)
+
+        if snapshot is None:
             cls.release_camera(camera_node)
-            cls.streaming_initialised = False
+            session.streaming_initialised = False
             return status_code, ERROR_INITIALIZING_STREAM
         else:
             if image_save:
@@ -901,14 +1161,6 @@ class Camera_api:
                 except PermissionError:
                     return status_code, ERROR_UNABLE_TO_CREATE_FOLDER
 
-            UVC_PARAMETER_NAMES = ['BRIGHTNESS', 'CONTRAST', 'SHARPNESS', 'SATURATION', 'HUE', 'WHITE_BALANCE_BLUE_U', 'GAMMA', 'EXPOSURE',
-                                   'GAIN', 'ZOOM', 'PAN', 'TILT',
-                                   'FOCUS', 'BACKLIGHT', 'ROLL', 'IRIS']
-            CAP_UVCPROPERTIES_NAME = [cv2.CAP_PROP_BRIGHTNESS, cv2.CAP_PROP_CONTRAST, cv2.CAP_PROP_SHARPNESS,
-                                      cv2.CAP_PROP_SATURATION, cv2.CAP_PROP_HUE, cv2.CAP_PROP_WHITE_BALANCE_BLUE_U,
-                                      cv2.CAP_PROP_GAMMA, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN, cv2.CAP_PROP_ZOOM,
-                                      cv2.CAP_PROP_PAN, cv2.CAP_PROP_TILT, cv2.CAP_PROP_BACKLIGHT, cv2.CAP_PROP_FOCUS,
-                                      cv2.CAP_PROP_ROLL, cv2.CAP_PROP_IRIS]
             if start >= end:
                 step_sign_img = -1
                 step = -step
@@ -916,9 +1168,6 @@ class Camera_api:
                 step_sign_img = 1
                 step = step
 
-            if parameter_name.upper() in UVC_PARAMETER_NAMES:
-                UVC_PARAMETER_NAMES.index(parameter_name.upper())
-
             try:
                 if image_save:
                     # if cls.main_folder.exists():
@@ -927,43 +1176,141 @@ class Camera_api:
             except PermissionError:
                 return status_code, ERROR_UNABLE_TO_CREATE_FOLDER
 
-            for i in range(start, end + step_sign_img, step):
-                try:
-                    cls.cam_list[cls.cam_index.index(int(camera_node))].set(
-                        CAP_UVCPROPERTIES_NAME[UVC_PARAMETER_NAMES.index(parameter_name.upper())], i, mode)
-                except ValueError:
-                    return status_code, ERROR_INVALID_UVC_PARAMETER_NAME  # unable to set the parameter
-                time.sleep(hold)
-                try:
-                    if cls.frame1.any():
-                        if image_save:
-                            if save_format.lower() in supported_image_save_format:
-                                current_time_image = str(datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
-                                file_name = (str(parameter_name) + "_" + str(i) + "_" + current_time_image + "." +
-                                             str(save_format))
-                                save_image_path = os.path.join(cls.child_folder, file_name)
-                                if save_format != 'raw':
-                                    cv2.imwrite(save_image_path, cls.frame1)
-                                    cls.frame1 = None
+            # Images are encoded and written in the background so the sweep timing is not skewed by encoding
+            image_writer = get_image_writer()
+            pending_writes = []
+            session.settle_times = []
+            # The sweep writes the driver directly, so set_uvc_many() must not trust its cached value any more
+            session.uvc_shadow.pop(parameter_name.lower(), None)
+            # Resolved once, the loop only calls the driver
+            set_property = session.cap.set
+            write_failed = False
+            try:
+                for i in range(start, end + step_sign_img, step):
+                    set_property(prop_id, i, mode)
+                    set_time = time.monotonic()
+                    try:
+                        if adaptive_hold:
+                            snapshot, error_code = cls.wait_for_settle(camera_node, set_time, hold)
+                        else:
+                            time.sleep(hold)
+                            # Only a frame captured after the new value was set shows its effect
+                            snapshot, error_code = cls.wait_for_frame(camera_node, snapshot.seq,
+                                                                      after_timestamp=set_time)
+                        if snapshot is None:
+                            return status_code, error_code
+                        if adaptive_hold:
+                            settle_time = snapshot.timestamp - set_time
+                            session.settle_times.append((i, settle_time))
+                            print(f"{parameter_name} = {i}: settled in {settle_time:.3f} s")
+                        frame1 = snapshot.frame
+                        if frame1.any():
+                            if image_save:
+                                if save_format.lower() in supported_image_save_format:
+                                    current_time_image = str(datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+                                    file_name = (str(parameter_name) + "_" + str(i) + "_" + current_time_image + "." +
+                                                 str(save_format))
+                                    save_image_path = os.path.join(cls.child_folder, file_name)
+                                    pending_writes.append(image_writer.submit(save_image_path, frame1, save_format))
                                 else:
-                                    fp = open(save_image_path, 'wb+')
-                                    fp.write(cls.frame1)
-                                    fp.close()
-                                    cls.frame1 = None
-                            else:
-                                return status_code, ERROR_IMAGE_SAVE_FORMAT  # unknown save format
-                    if cls.exit_val:
-                        break
-                except Exception:
-                    if NameError:
-                        return status_code, ERROR_CAMERA_NOT_ASSIGNED  # camera not assigned
-                    else:
-                        return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE
+                                    return status_code, ERROR_IMAGE_SAVE_FORMAT  # unknown save format
+                        if session.exit_val:
+                            break
+                    except Exception:
+                        if NameError:
+                            return status_code, ERROR_CAMERA_NOT_ASSIGNED  # camera not assigned
+                        else:
+                            return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE
+            finally:
+                # Also on an early return: every queued image is written (or its error reported) before returning
+                for future in pending_writes:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Unable to save image: {e}")
+                        write_failed = True
+            if write_failed:
+                return status_code, ERROR_UNABLE_TO_SAVE_IMAGE
             if cls.is_streaming_stopped(camera_node):
                 return False, ERROR_INITIALIZING_STREAM
             else:
                 return True, success_code
 
+    @classmethod
+    def frame_luma_sample(cls, frame):
+        """
+            Returns a subsampled brightness image of the frame as float32 on an 8-bit scale, used to decide whether
+            the image has settled.
+        """
+        step = cls.SETTLE_SAMPLE_STEP
+        sample = frame[::step, ::step]
+        if sample.ndim == 3:
+            sample = sample.mean(axis=2, dtype=np.float32)
+        else:
+            sample = sample.astype(np.float32)
+        if frame.dtype == np.uint16:
+            sample *= 1.0 / 256
+        return sample
+
+    @classmethod
+    def wait_for_settle(cls, camera_node: int, set_time: float, hold: float):
+        """
+            Usage:
+                Watches the frames captured after set_time until the image stops changing: SETTLE_WINDOW
+                consecutive frames whose mean brightness and mean absolute per pixel change stay within the
+                SETTLE_* tolerances. Gives up after hold seconds and returns the newest frame then.
+
+            Parameters:
+                - camera_node (int): Streaming camera node.
+                - set_time (float): time.monotonic() value taken right after the parameter was set.
+                - hold (float): Maximum time to wait for the image to settle, in seconds.
+
+            Returns:
+                tuple: The FrameSnapshot of the settled (or last) frame and 0, or None and an error code as
+                       returned by wait_for_frame().
+        """
+        deadline = set_time + hold
+        snapshot, error_code = cls.wait_for_frame(camera_node, after_timestamp=set_time)
+        if snapshot is None:
+            return None, error_code
+        previous = cls.frame_luma_sample(snapshot.frame)
+        means = [float(previous.mean())]
+        stable_frames = 1
+        while stable_frames < cls.SETTLE_WINDOW:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            next_snapshot, error_code = cls.wait_for_frame(camera_node, snapshot.seq, timeout=remaining)
+            if next_snapshot is None:
+                break  # hold expired (or the stream ended), use the newest frame seen
+            snapshot = next_snapshot
+            current = cls.frame_luma_sample(snapshot.frame)
+            means = means[-(cls.SETTLE_WINDOW - 1):] + [float(current.mean())]
+            difference = float(np.abs(current - previous).mean())
+            previous = current
+            if difference <= cls.SETTLE_DIFF_TOLERANCE and max(means) - min(means) <= cls.SETTLE_MEAN_TOLERANCE:
+                stable_frames += 1
+            else:
+                stable_frames = 1
+                means = means[-1:]
+        return snapshot, 0
+
+    @classmethod
+    def get_settle_times(cls, camera_node: int):
+        """
+            Usage:
+                Returns the settle times measured by the last adaptive uvc_var sweep of the node.
+
+            Returns:
+                tuple: A list of (value, seconds from set() to the settled frame) and 0, or None and 102 if the
+                       camera is not assigned.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None, ERROR_CAMERA_NOT_ASSIGNED
+        return list(session.settle_times), 0
+
     @classmethod
     def set_uvc_default(cls, camera_node: int) -> tuple:
         """
@@ -991,12 +1338,14 @@ class Camera_api:
             return status_code, ERROR_INVALID_CAMERA_NODE
 
         try:
-            supported_params = cls.get_supported_uvc_parameter(camera_node)[0]
-            for param, values in supported_params.items():
-                default_value = values[4]
-                default_mode = values[5]
-                cls.set_uvc(camera_node, param, default_value, default_mode)
-                status_code = True
+            supported_params, error_code = cls.get_uvc_capabilities(camera_node)
+            if error_code != success_code:
+                return status_code, error_code
+            defaults = {param: (values[4], values[5]) for param, values in supported_params.items()}
+            applied, error_code = cls.set_uvc_many(camera_node, defaults, readback=False)
+            if error_code != success_code:
+                return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE_TO_DEFAULT
+            status_code = True
             return status_code, success_code
         except Exception:
             if NameError:
@@ -1004,6 +1353,143 @@ class Camera_api:
             else:
                 return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE_TO_DEFAULT
 
+    @classmethod
+    def get_uvc_capabilities(cls, camera_node: int):
+        """
+            Usage:
+                Same as get_supported_uvc_parameter() but served from the capability cache (get_capabilities()),
+                so a known camera is not probed at all. The minimum, maximum, step, default and supported mode of
+                a parameter never change for a firmware; the current values in the cached result are outdated,
+                use snapshot_uvc() for those.
+
+            Returns:
+                tuple: The supported UVC parameter dict and 0, or False and an error code.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
+        if session.uvc_supported is None:
+            capabilities, error_code = cls.get_capabilities(camera_node)
+            if error_code != 0:
+                return False, error_code
+            session.uvc_supported = capabilities['uvc']
+        return session.uvc_supported, 0
+
+    @classmethod
+    def set_uvc_many(cls, camera_node: int, settings: dict, readback: bool = True):
+        """
+            Usage:
+                Sets several UVC parameters in one call. Every setting is validated up front, and parameters whose
+                last known (value, mode) already matches are not written again.
+
+            Parameters:
+                - camera_node (int): Camera node obtained using the get_connected_devices method.
+                - settings (dict): UVC parameter name mapped to (value, mode), mode 1 - Auto 2 - Manual.
+                - readback (bool): Read every written parameter back from the driver. Without readback the
+                  requested values are reported.
+
+            Returns:
+                tuple: Dict of parameter name to its value and 0 on success, otherwise False and an error code.
+                       - If the camera is not assigned, returns False and error code 102.
+                       - If an invalid camera node is provided, returns False and error code 201.
+                       - If a parameter name is unknown, returns False and error code 206.
+                       - If a value is not an integer, returns False and error code 207.
+                       - If a mode is not an integer, returns False and error code 208.
+                       - If the driver rejects a value, returns False and error code 113.
+        """
+        ERROR_INVALID_CAMERA_NODE = 201
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_INVALID_UVC_PARAMETER_NAME = 206
+        ERROR_INVALID_UVC_PARAMETER_VALUE = 207
+        ERROR_INVALID_UVC_PARAMETER_MODE = 208
+        ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE = 113
+        status_code = False
+        success_code = 0
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return status_code, ERROR_INVALID_CAMERA_NODE
+        if not isinstance(settings, dict):
+            return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
+        requests = []
+        for parameter_name, setting in settings.items():
+            if not isinstance(parameter_name, str) or parameter_name.lower() not in UVC_PROPERTY_IDS:
+                return status_code, ERROR_INVALID_UVC_PARAMETER_NAME
+            try:
+                value, mode = setting
+            except (TypeError, ValueError):
+                return status_code, ERROR_INVALID_UVC_PARAMETER_VALUE
+            if isinstance(value, bool) or not isinstance(value, int):
+                return status_code, ERROR_INVALID_UVC_PARAMETER_VALUE
+            if isinstance(mode, bool) or not isinstance(mode, int):
+                return status_code, ERROR_INVALID_UVC_PARAMETER_MODE
+            requests.append((parameter_name.lower(), value, mode))
+
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+        applied = {}
+        try:
+            with session.lock:
+                for parameter_name, value, mode in requests:
+                    prop_id = UVC_PROPERTY_IDS[parameter_name]
+                    if session.uvc_shadow.get(parameter_name) != (value, mode):
+                        if session.cap.set(prop_id, value, mode) is False:
+                            session.uvc_shadow.pop(parameter_name, None)
+                            return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE
+                        session.uvc_shadow[parameter_name] = (value, mode)
+                    applied[parameter_name] = int(session.cap.get(prop_id)) if readback else value
+            return applied, success_code
+        except Exception:
+            return status_code, ERROR_UNABLE_TO_SET_UVC_PARAMETER_VALUE
+
+    @classmethod
+    def snapshot_uvc(cls, camera_node: int):
+        """
+            Usage:
+                Reads the current value and mode of every supported UVC parameter, one driver query each.
+
+            Returns:
+                tuple: Dict of parameter name to (value, mode), usable with restore_uvc() or set_uvc_many(), and 0.
+                       Otherwise False and an error code.
+                       - If the camera is not assigned, returns False and error code 102.
+                       - If the values cannot be read, returns False and error code 112.
+        """
+        ERROR_UNABLE_TO_GET_UVC_PARAMETER_VALUE = 112
+        status_code = False
+        success_code = 0
+        supported_params, error_code = cls.get_uvc_capabilities(camera_node)
+        if error_code != success_code:
+            return status_code, error_code
+        session = cls.get_session(camera_node)
+        snapshot = {}
+        try:
+            with session.lock:
+                for parameter_name in supported_params:
+                    prop_id = UVC_PROPERTY_IDS.get(parameter_name)
+                    if prop_id is None:
+                        continue
+                    result = session.cap.get(prop_id, -1, -1, -1, -1, -1, -1, -1)
+                    if not result[0]:
+                        continue
+                    snapshot[parameter_name] = (int(result[5]), int(result[6]))
+                # What was just read is what the driver holds, restoring it again is a no-op
+                session.uvc_shadow.update(snapshot)
+            return snapshot, success_code
+        except Exception:
+            return status_code, ERROR_UNABLE_TO_GET_UVC_PARAMETER_VALUE
+
+    @classmethod
+    def restore_uvc(cls, camera_node: int, snapshot: dict, readback: bool = False):
+        """
+            Usage:
+                Writes back a snapshot taken with snapshot_uvc(). Only the parameters that changed since are written.
+
+            Returns:
+                tuple: Same as set_uvc_many().
+        """
+        return cls.set_uvc_many(camera_node, snapshot, readback=readback)
+
     @classmethod
     def get_hid(cls, camera_node: int, hid_bytes: list) -> tuple:
         """
@@ -1019,7 +1505,6 @@ class Camera_api:
                - If there's an error while retrieving the HID parameter, returns False and the respective error code.
         """
 
-        cls.get_response = None
         ERROR_CAMERA_NOT_ASSIGNED = 102
         ERROR_INVALID_CAMERA_NODE = 201
         ERROR_INVALID_HID_BYTES = 220
@@ -1037,32 +1522,24 @@ class Camera_api:
                 return status_code, ERROR_INVALID_HID_BYTES
 
         try:
-            # Open the device using path
-            device_info = cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)
-            device_vendor_id = int('0x' + device_info[2], 16)
-            device_product_id = int('0x' + device_info[3], 16)
+            channel = cls.get_hid_channel(camera_node)
+            if channel is None:
+                return status_code, ERROR_CAMERA_NOT_ASSIGNED
         except Exception as e:
             return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            # Open the device using path
-            cls.devices = hid.enumerate(device_vendor_id, device_product_id)
-
-            if not cls.devices:
+            # Reuse the node's open HID channel
+            try:
+                channel.open()
+            except IOError:
                 return status_code, ERROR_CAMERA_NOT_ASSIGNED  # device not found
-            cls.device = hid.device()
-            cls.device.open_path(cls.devices[0]["path"])
-            get_command = [0x00]  # Initialize the get command with the header
-
-            # Append HID bytes to the get command
-            get_command.extend(hid_bytes)
-
-            cls.device.write(get_command)
-            cls.get_response = cls.device.read(65, 1000)
-            if cls.get_response != []:
-                if cls.get_response[6] == 1:
-                    return cls.get_response, success_code
+
+            get_response = channel.transact(list(hid_bytes), 1000)
+            if get_response != []:
+                if get_response[6] == 1:
+                    return get_response, success_code
                 else:
-                    return status_code, cls.get_response, ERROR_UNABLE_TO_GET_HID_VALUE
+                    return status_code, get_response, ERROR_UNABLE_TO_GET_HID_VALUE
             else:
                 return status_code, ERROR_UNABLE_TO_GET_HID_VALUE
         except Exception:
@@ -1105,37 +1582,26 @@ class Camera_api:
             if not isinstance(byte_value, int) or not 0 <= byte_value <= 255:
                 return status_code, ERROR_INVALID_HID_BYTES
         try:
-            # Open the device using path
-            device_info = cls.cam_list[cls.cam_index.index(camera_node)].getDeviceInfo(camera_node)
-            device_vendor_id = int('0x' + device_info[2], 16)
-            device_product_id = int('0x' + device_info[3], 16)
+            channel = cls.get_hid_channel(camera_node)
+            if channel is None:
+                return status_code, ERROR_CAMERA_NOT_ASSIGNED
         except Exception as e:
             return status_code, ERROR_CAMERA_NOT_ASSIGNED
         try:
-            # Open the device using path
-            cls.devices = hid.enumerate(device_vendor_id, device_product_id)
-
-            if not cls.devices:
+            # Reuse the node's open HID channel
+            try:
+                channel.open()
+            except IOError:
                 return status_code, ERROR_CAMERA_NOT_ASSIGNED  # camera not found
 
-            cls.device = hid.device()
-            cls.device.open_path(cls.devices[0]["path"])
-
-            set_command = [0x00]  # Initialize the set command with the header
-
-            # hid_bytes_hex = [byte_value if isinstance(byte_value, int) else int(byte_value, 16) for byte_value in hid_bytes]
+            # Write the set command to the device and read its response
+            set_response = channel.transact(list(hid_bytes), 1000)
 
-            # Append HID bytes to the set command
-            set_command.extend(hid_bytes)
-            # Write the set command to the device
-            cls.device.write(set_command)
-            cls.set_response = cls.device.read(65, 1000)
-
-            if cls.set_response:
-                if cls.set_response[6] == 1:
-                    return cls.set_response, success_code
+            if set_response:
+                if set_response[6] == 1:
+                    return set_response, success_code
                 else:
-                    return status_code, cls.set_response, ERROR_UNABLE_TO_SET_HID
+                    return status_code, set_response, ERROR_UNABLE_TO_SET_HID
 
             else:
                 return status_code, ERROR_UNABLE_TO_SET_HID
@@ -1144,148 +1610,534 @@ class Camera_api:
             return status_code, ERROR_CAMERA_NOT_ASSIGNED  # unable to set the HID
 
     @classmethod
-    def convert_y16_to_rgb(cls, frame):
+    def transact_hid(cls, camera_node: int, hid_commands: list, timeout: int = 1000, window: int = 1,
+                     match_length: int = 1) -> tuple:
+        """
+            Used to run a batch of HID commands on the e-con camera for the given node over its open HID channel.
+
+            Parameters:
+            - camera_node (int): Camera node obtained from get_connected_devices().
+            - hid_commands (list): List of HID commands, each a list or tuple of HID byte values.
+            - timeout (int): Timeout of each command in milliseconds.
+            - window (int): Number of commands written ahead of their responses (1 = strictly one at a time).
+            - match_length (int): Number of leading command bytes a response must echo to be matched to it.
+
+            Returns:
+            tuple: Responses or error code.
+                   - If the commands were sent, returns the list of responses in command order (an empty list for
+                     every command that timed out) and 0 as the success code.
+                   - If there's an error while sending the commands, returns False and the respective error code.
+        """
+
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_INVALID_CAMERA_NODE = 201
+        ERROR_INVALID_HID_BYTES = 220
+        ERROR_UNABLE_TO_GET_HID_VALUE = 116
+        status_code = False
+        success_code = 0
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return status_code, ERROR_INVALID_CAMERA_NODE
+        if not isinstance(hid_commands, (list, tuple)):
+            return status_code, ERROR_INVALID_HID_BYTES
+        for hid_bytes in hid_commands:
+            if not isinstance(hid_bytes, (list, tuple)):
+                return status_code, ERROR_INVALID_HID_BYTES
+            for byte_value in hid_bytes:
+                if not isinstance(byte_value, int) or not 0 <= byte_value <= 255:
+                    return status_code, ERROR_INVALID_HID_BYTES
+
+        channel = cls.get_hid_channel(camera_node)
+        if channel is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
+        try:
+            try:
+                channel.open()
+            except IOError:
+                return status_code, ERROR_CAMERA_NOT_ASSIGNED  # camera not found
+            responses = channel.transact_many([list(hid_bytes) for hid_bytes in hid_commands], timeout, window,
+                                              match_length)
+            return responses, success_code
+        except Exception:
+            return status_code, ERROR_UNABLE_TO_GET_HID_VALUE
+
+    @classmethod
+    def get_fourcc(cls, cap):
+        """
+            Method Name: get_fourcc
+            Description: Reads the pixel format currently negotiated on a capture.
+            :param cap: Capture handle of the camera.
+            :type cap: cv2.VideoCapture
+            :return: FOURCC string without padding, e.g. 'UYVY' or 'Y12'.
+            :rtype: str
+        """
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        return "".join([chr((fourcc >> 8 * i) & 0xFF) for i in range(4)]).strip(" \x00")
+
+    @classmethod
+    def resolve_frame_converter(cls, camera_node: int):
+        """
+            Method Name: resolve_frame_converter
+            Description: Looks up the converter of the node's current pixel format in FRAME_CONVERTERS and stores
+                         it on the session, so the stream loop only calls it instead of querying the format on every
+                         frame. Called when a stream starts and whenever set_resolution changes the format.
+            :param camera_node: Assigned camera node.
+            :type camera_node: int
+            :return: The resolved converter.
+            :rtype: callable
+        """
+        session = cls.get_session(camera_node)
+        fourcc = cls.get_fourcc(session.cap)
+        session.fourcc = fourcc
+        session.output_spec = None
+        session.converter = getattr(cls, cls.FRAME_CONVERTERS.get(fourcc, 'convert_passthrough'))
+        return session.converter
+
+    @classmethod
+    def convert_passthrough(cls, frame, out=None):
+        """
+            Method Name: convert_passthrough
+            Description: Converter for formats OpenCV already delivers as a displayable image.
+            :param frame: The captured frame.
+            :type frame: numpy.ndarray
+            :return: The same frame.
+            :rtype: numpy.ndarray
+        """
+        return frame
+
+    @classmethod
+    def convert_uyvy_to_bgr(cls, frame, out=None):
+        """
+            Method Name: convert_uyvy_to_bgr
+            Description: This method converts a UYVY frame to BGR.
+            :param frame: The UYVY frame to be converted.
+            :type frame: numpy.ndarray
+            :param out: Optional BGR buffer to write the result into.
+            :type out: numpy.ndarray
+            :return: The converted frame in BGR format.
+            :rtype: numpy.ndarray
+        """
+        return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_UYVY, dst=out)
+
+    @classmethod
+    def convert_yuy2_to_bgr(cls, frame, out=None):
+        """
+            Method Name: convert_yuy2_to_bgr
+            Description: This method converts a YUY2 frame to BGR.
+            :param frame: The YUY2 frame to be converted.
+            :type frame: numpy.ndarray
+            :param out: Optional BGR buffer to write the result into.
+            :type out: numpy.ndarray
+            :return: The converted frame in BGR format.
+            :rtype: numpy.ndarray
+        """
+        return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_YUY2, dst=out)
+
+    @classmethod
+    def convert_y16_to_rgb(cls, frame, out=None):
         """
             Method Name: convert_y16_to_rgb
             Description: This method converts Y16 or Y8 format to RGB for rendering and saving image.
             :param frame: Frame to be converted from Y16 or Y8 format to RGB.
             :type frame: numpy.ndarray
+            :param out: Optional uint8 buffer to write the result into.
+            :type out: numpy.ndarray
             :return: The converted frame in RGB format.
             :rtype: numpy.ndarray
         """
-        return cv2.convertScaleAbs(frame, alpha=0.2490234375)
+        return cv2.convertScaleAbs(frame, dst=out, alpha=0.2490234375)
+
+    @classmethod
+    def y12_packed_view(cls, frame, pixel_count):
+        """
+            Method Name: y12_packed_view
+            Description: Returns a zero-copy byte view of the packed Y12 data of a frame. Every 3 bytes hold two
+                         pixels: the 8 most significant bits of the first and second pixel followed by a byte with
+                         their 4 least significant bits (first pixel in the low nibble).
+            :param frame: The Y12 frame as returned by the capture, the packed data starts at its first byte.
+            :type frame: numpy.ndarray
+            :param pixel_count: Number of pixels in the frame.
+            :type pixel_count: int
+            :return: Contiguous uint8 view of length ceil(pixel_count / 2) * 3.
+            :rtype: numpy.ndarray
+        """
+        raw_bytes = frame.reshape(-1).view(np.uint8)  # a view for the contiguous frames the capture returns
+        packed_length = (pixel_count + 1) // 2 * 3
+        if raw_bytes.size < packed_length:
+            raise ValueError("Y12 frame holds %d bytes, %d are needed" % (raw_bytes.size, packed_length))
+        return raw_bytes[:packed_length]
 
     @classmethod
-    def convert_y12_to_y8(cls, frame):
+    def convert_y12_to_y8(cls, frame, out=None):
         """
             Method Name: convert_y12_to_y8
-            Description: This method converts a Y12 frame to a Y8 frame.
+            Description: This method converts a Y12 frame to a Y8 frame by keeping the 8 most significant bits of
+                         every pixel. The two MSB bytes of every packed pixel pair are read as one 16 bit word
+                         through a strided view and copied straight into the output, without intermediate copies.
             :param frame: The Y12 frame to be converted.
             :type frame: numpy.ndarray
+            :param out: Optional uint8 buffer of shape (frame.shape[0], frame.shape[1]) to write the result into.
+            :type out: numpy.ndarray
             :return: The converted Y8 frame.
             :rtype: numpy.ndarray
         """
         try:
-            y8_frame_height = frame.shape[0]
-            y8_frame_width = frame.shape[1]
-            y8_frame = np.zeros(shape=(y8_frame_height, y8_frame_width), dtype=np.uint8)
-            raw_bytes = frame.tobytes()  # converting two dimensional mat data to byte array
-            row = frame.shape[0]
-            column = frame.shape[1]
-            filtered_bytes = np.frombuffer(raw_bytes, dtype=np.uint8)
-            filtered_bytes = np.reshape(filtered_bytes, (-1, 3))
-            filtered_bytes = np.delete(filtered_bytes, 2, 1)
-            filtered_bytes = np.reshape(filtered_bytes, -1)
-            m = 0
-            for i in range(0, row):
-                y8_frame[i,] = filtered_bytes[m:m + column]
-                m += column
-            return y8_frame  # Converting back to two-dimensional matrix
+            shape = (frame.shape[0], frame.shape[1])
+            if out is None:
+                out = np.empty(shape, dtype=np.uint8)
+            elif out.shape != shape or out.dtype != np.uint8 or not out.flags.c_contiguous:
+                raise ValueError("out must be a contiguous uint8 array of shape %s" % (shape,))
+            pixel_count = shape[0] * shape[1]
+            packed = cls.y12_packed_view(frame, pixel_count)
+            pair_count = pixel_count // 2
+            out_pixels = out.reshape(-1)
+            msb_pairs = np.ndarray((pair_count,), dtype='<u2', buffer=packed, strides=(3,))
+            np.copyto(out_pixels[:pair_count * 2].view('<u2'), msb_pairs)
+            if pixel_count & 1:
+                out_pixels[-1] = packed[-3]
+            return out
         except:
             print("unable to convert")
 
     @classmethod
-    def show_preview(cls, node, duration, show_FPS, stop_event):
-        global stop_time
-        cls.exit_val = False
-        time.sleep(1)
-        ERROR_NO_DEVICES_FOUND = 101
+    def convert_y12_to_y16(cls, frame, out=None):
+        """
+            Method Name: convert_y12_to_y16
+            Description: This method unpacks a Y12 frame to 16 bit pixels keeping the full 12 bit precision
+                         (values 0 - 4095), for analysis. It works on strided views of the packed data and writes
+                         straight into the output without full size temporaries.
+            :param frame: The Y12 frame to be converted.
+            :type frame: numpy.ndarray
+            :param out: Optional uint16 buffer of shape (frame.shape[0], frame.shape[1]) to write the result into.
+            :type out: numpy.ndarray
+            :return: The unpacked frame.
+            :rtype: numpy.ndarray
+        """
         try:
-            time_second = 1
-            frame_count = 0
-            fps_start_time = time.time()
-            fps_show_time = time.time() + time_second
-            fps = 0
-            if duration != 0:
-                stop_time = time.time() + duration
+            shape = (frame.shape[0], frame.shape[1])
+            if out is None:
+                out = np.empty(shape, dtype=np.uint16)
+            elif out.shape != shape or out.dtype != np.uint16 or not out.flags.c_contiguous:
+                raise ValueError("out must be a contiguous uint16 array of shape %s" % (shape,))
+            pixel_count = shape[0] * shape[1]
+            packed = cls.y12_packed_view(frame, pixel_count)
+            pair_count = pixel_count // 2
+            out_pixels = out.reshape(-1)
+            first = out_pixels[0:pair_count * 2:2]
+            second = out_pixels[1:pair_count * 2:2]
+            # Big endian words over bytes (msb0, msb1) and (msb1, lsb) of every packed pair
+            msb0_msb1 = np.ndarray((pair_count,), dtype='>u2', buffer=packed, strides=(3,))
+            msb1_lsb = np.ndarray((pair_count,), dtype='>u2', buffer=packed, offset=1, strides=(3,))
+            lsb = np.ndarray((pair_count,), dtype=np.uint8, buffer=packed, offset=2, strides=(3,))
+            # first = (msb0 << 4) | (lsb & 0x0F), the second pixel's slot is scratch until it is written
+            np.bitwise_and(lsb, 0x0F, out=second, dtype=np.uint8)
+            np.right_shift(msb0_msb1, 4, out=first)
+            np.bitwise_and(first, 0x0FF0, out=first)
+            np.bitwise_or(first, second, out=first)
+            # second = (msb1 << 4) | (lsb >> 4)
+            np.right_shift(msb1_lsb, 4, out=second)
+            if pixel_count & 1:
+                out_pixels[-1] = (int(packed[-3]) << 4) | (int(packed[-1]) & 0x0F)
+            return out
+        except:
+            print("unable to convert")
+
+    @classmethod
+    def capture_frames(cls, node, duration, stop_event, stats_path=None):
+        """
+            Usage:
+                Capture stage of the stream pipeline. Reads frames from the camera as fast as it delivers them and
+                publishes them into the session's raw frame ring. Slow consumers never stall this loop unless they
+                subscribed losslessly, so the measured capture FPS reflects the camera.
+
+                Every frame gets a sequence number and a capture timestamp on the time.monotonic() clock in the
+                ring, also fed to the session's StreamStats: the driver's buffer timestamp (CAP_PROP_POS_MSEC)
+                when the backend provides one, otherwise the time read() returned. A frame the driver had queued
+                is thereby stamped with the time it was captured, not the time it was read.
+
+            Parameters:
+                - node (int): Streaming camera node.
+                - duration (int): Streaming duration in seconds, 0 streams until stopped.
+                - stop_event (threading.Event): Stops the whole pipeline when set.
+                - stats_path (str): JSON file the stream statistics are written to when the stream ends.
+        """
+        session = cls.get_session(node)
+        if session is None:
+            return
+        raw_ring = session.raw_ring
+        try:
+            warm_up = []
             for i in range(20):
-                ret, cls.frame = cls.cam_list[cls.cam_index.index(int(node))].read()
-            while True:
-                ret, cls.frame = cls.cam_list[cls.cam_index.index(int(node))].read()
-                cls.frame.any()
-                # Stop event check here
-                if stop_event.is_set():
-                    break  # Gracefully exit the loop if stop event is set
+                session.cap.read()
+                if i >= 16:
+                    warm_up.append((time.monotonic(), session.cap.get(cv2.CAP_PROP_POS_MSEC)))
+            session.clock_offset = cls.driver_clock_offset(warm_up)
+            buffer_size = session.cap.get(cv2.CAP_PROP_BUFFERSIZE)
+            session.buffer_depth = int(buffer_size) if isinstance(buffer_size, float) and buffer_size >= 1 \
+                else cls.CAPTURE_BUFFER_DEPTH
+            # The format only changes through set_resolution, which resolves the converter again
+            cls.resolve_frame_converter(node)
+            stop_time = time.time() + duration if duration != 0 else None
+            frame_count = 0
+            fps_show_time = time.time() + 1
+            stats = session.stream_stats
+            stats.clock = "monotonic" if session.clock_offset is None else "driver"
+            while not stop_event.is_set():
+                seq, timestamp, frame = cls.capture_step(session, stop_event)
+                if seq is None:
+                    break
+                if seq == 0:
+                    continue
+                stats.add(seq, timestamp)
+                session.frames_captured += 1
                 frame_count += 1
-
                 if time.time() > fps_show_time:
-                    fps = frame_count
+                    session.capture_fps = frame_count
+                    session.capture_bytes_per_second = frame_count * frame.nbytes
                     frame_count = 0
-                    fps_show_time = time.time() + time_second
-
-                if "".join(
-                        [chr((int(cls.cam_list[cls.cam_index.index(int(node))].get(cv2.CAP_PROP_FOURCC)) >> 8 * i)
-                             & 0xFF) for i in range(4)]) == 'UYVY':
-                    cls.frame1 = cv2.cvtColor(cls.frame, cv2.COLOR_YUV2BGR_UYVY)
-                elif "".join(
-                        [chr((int(cls.cam_list[cls.cam_index.index(int(node))].get(cv2.CAP_PROP_FOURCC)) >> 8 * i)
-                             & 0xFF) for i in range(4)]) == 'YUY2':
-                    cls.frame1 = cv2.cvtColor(cls.frame, cv2.COLOR_YUV2BGR_YUY2)
-                elif "".join(
-                        [chr((int(cls.cam_list[cls.cam_index.index(int(node))].get(cv2.CAP_PROP_FOURCC)) >> 8 * i)
-                             & 0xFF) for i in range(4)]) == 'Y12':
-                    cls.frame1 = cls.convert_y12_to_y8(cls.frame)
-                elif "".join(
-                        [chr((int(cls.cam_list[cls.cam_index.index(int(node))].get(cv2.CAP_PROP_FOURCC)) >> 8 * i)
-                             & 0xFF) for i in range(4)]).strip() == 'Y16':
-                    cls.frame1 = cls.convert_y16_to_rgb(cls.frame)
-                else:
-                    cls.frame1 = cls.frame
+                    fps_show_time = time.time() + 1
+                if stop_time is not None and stop_time <= time.time():
+                    break
+        except BaseException as e:
+            print(f"Capture stopped on node {node}: {e}")
+        finally:
+            # Ending the capture ends the stream, the other stages drain their rings and stop
+            stop_event.set()
+            raw_ring.close()
+            session.streaming_status = False
+            session.streaming_initialised = False
+            if stats_path:
+                try:
+                    session.stream_stats.dump(stats_path)
+                except OSError as e:
+                    print(f"Unable to write the stream statistics: {e}")
+
+    @classmethod
+    def driver_clock_offset(cls, samples):
+        """
+            Usage:
+                Works out how the driver's buffer timestamps map onto time.monotonic(), from (time read() returned,
+                CAP_PROP_POS_MSEC) pairs of consecutive frames. V4L2 stamps buffers with the monotonic clock
+                itself (offset 0). Another clock is shifted by the smallest read delay seen, so its frames are
+                never stamped later than they were read.
+
+            Returns:
+                float: Seconds to add to a driver timestamp, None if the backend has no buffer timestamps.
+        """
+        # Backends without buffer timestamps report 0, -1 or a constant
+        msecs = [msec for _, msec in samples]
+        if len(msecs) < 2 or not all(isinstance(msec, float) and msec > 0 for msec in msecs) or \
+                any(b <= a for a, b in zip(msecs, msecs[1:])):
+            return None
+        offset = min(read_time - msec / 1000.0 for read_time, msec in samples)
+        return 0.0 if 0 <= offset < 1 else offset
+
+    @classmethod
+    def capture_step(cls, session, stop_event):
+        """
+            Usage:
+                Captures one frame straight into the buffer of the next raw ring slot (read(image=...)), so a
+                steady stream neither allocates nor copies frames. If the capture cannot reuse the buffer (first
+                frame, format change) the array it returns becomes the slot's new buffer. The frame is stamped
+                with its driver timestamp when the session has a driver clock (see driver_clock_offset()).
+
+            Parameters:
+                - session (CameraSession): Streaming session.
+                - stop_event (threading.Event): Stops waiting for slow subscribers when set.
+
+            Returns:
+                tuple: (seq, timestamp, frame) of the published frame. seq is 0 if the read failed and None if the
+                       ring was closed or the stream stopped.
+        """
+        raw_ring = session.raw_ring
+        slot = raw_ring.reserve(stop_event)
+        if slot is None:
+            return None, None, None
+        ret, frame = session.cap.read(image=slot.frame)
+        timestamp = time.monotonic()
+        if not ret or frame is None:
+            return 0, timestamp, None  # the slot stays reserved for the next read
+        if session.clock_offset is not None:
+            timestamp = min(timestamp, session.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 + session.clock_offset)
+        return raw_ring.commit(slot, frame, timestamp, adopt=True), timestamp, frame
+
+    @classmethod
+    def process_step(cls, session, item, stop_event):
+        """
+            Usage:
+                Converts one raw frame straight into the buffer of the next frame ring slot (the converters' out=
+                parameter) and publishes it. The output shape of the converter is learnt from the first frame of
+                every raw shape, after which conversions allocate nothing.
+
+            Parameters:
+                - session (CameraSession): Streaming session.
+                - item (FrameItem): Raw frame from the raw ring.
+                - stop_event (threading.Event): Stops waiting for slow subscribers when set.
+
+            Returns:
+                int: Sequence number of the converted frame, 0 if the conversion failed, None if the ring was
+                     closed or the stream stopped.
+        """
+        frame_ring = session.frame_ring
+        slot = frame_ring.reserve(stop_event)
+        if slot is None:
+            return None
+        raw = item.frame
+        spec = session.output_spec
+        out = None
+        if spec is not None and spec[0] == raw.shape and spec[1] == raw.dtype and slot.frame is not None \
+                and slot.frame.shape == spec[2] and slot.frame.dtype == spec[3]:
+            out = slot.frame
+        frame1 = session.converter(raw, out=out)
+        if frame1 is None:
+            return 0
+        if out is None:
+            session.output_spec = (raw.shape, raw.dtype, frame1.shape, frame1.dtype)
+        # Pass-through converters return the raw buffer itself, which belongs to the raw ring and is copied
+        return frame_ring.commit(slot, frame1, item.timestamp, adopt=frame1 is not raw)
+
+    @classmethod
+    def process_frames(cls, node, stop_event):
+        """
+            Usage:
+                Process stage of the stream pipeline. Converts the newest raw frame into a displayable image and
+                publishes it into the session's frame ring. Raw frames it is too slow for are dropped and counted.
 
+            Parameters:
+                - node (int): Streaming camera node.
+                - stop_event (threading.Event): Stops the whole pipeline when set.
+        """
+        session = cls.get_session(node)
+        if session is None:
+            return
+        subscriber = session.raw_ring.subscribe("process", FrameSubscriber.LATEST)
+        try:
+            while not stop_event.is_set():
+                item = subscriber.get(timeout=0.5)
+                if item is None:
+                    if session.raw_ring.closed:
+                        break
+                    continue
+                seq = cls.process_step(session, item, stop_event)
+                if seq is None:
+                    break
+                if seq == 0:
+                    continue
+                # Frames are available from here on, whether or not a preview window shows them
+                session.streaming_initialised = True
+        except BaseException as e:
+            print(f"Frame processing stopped on node {node}: {e}")
+            stop_event.set()
+        finally:
+            subscriber.close()
+            session.frame_ring.close()
+
+    @classmethod
+    def show_preview(cls, node, duration, show_FPS, stop_event):
+        """
+            Usage:
+                Display stage of the stream pipeline. Shows the newest converted frame in the node's preview
+                window. The stream duration is enforced by the capture stage.
+        """
+        ERROR_NO_DEVICES_FOUND = 101
+        session = cls.get_session(node)
+        if session is None:
+            return False, ERROR_NO_DEVICES_FOUND  # please assign the camera
+        session.exit_val = False
+        window_name = "Preview - " + str(node)
+        window_shown = False
+        subscriber = session.frame_ring.subscribe("display", FrameSubscriber.LATEST)
+        try:
+            while not stop_event.is_set():
+                item = subscriber.get(timeout=0.5)
+                if item is None:
+                    if session.frame_ring.closed:
+                        break
+                    continue
+                frame1 = item.frame
                 if show_FPS:
-                    cv2.putText(cls.frame1, f"FPS: {fps}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                    # Draw on a copy, the ring slot is shared with the other consumers
+                    frame1 = frame1.copy()
+                    cv2.putText(frame1, f"FPS: {session.capture_fps}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                                (0, 255, 0), 2)
                 try:
-                    cv2.imshow("Preview - " + str(node), cls.frame1)
-                    cls.streaming_initialised = True
+                    # HighGUI is not thread safe, so the preview windows of all nodes take turns
+                    with cls.display_lock:
+                        cv2.imshow(window_name, frame1)
+                        key = cv2.waitKey(1) & 0xFF
                 except AttributeError:
                     return False, ERROR_NO_DEVICES_FOUND
 
-                except cv2.error:
+                except cv2.error as e:
+                    # No GUI on this host, keep capturing and converting without a window
+                    print(f"{RED_TEXT}Preview unavailable on node {node}, streaming headless: {e}{RESET_COLOR}")
+                    session.headless = True
                     return False, ERROR_NO_DEVICES_FOUND
                 except:
                     continue
+                window_shown = True
 
                 if duration != 0:
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        cls.streaming_initialised = False
-                        cls.streaming_status[node] = False
-                        break
-                    if stop_time <= int(time.time()):
-                        cls.streaming_status[node] = False
-                        cls.streaming_initialised = False
+                    if key == ord('q'):
                         break
                 else:
-                    if cv2.waitKey(1) & 0xFF == ord('q') or cv2.waitKey(1) & 0xFF == ord('Q'):
-                        cls.streaming_status[node] = False
-                        cls.streaming_initialised = False
-                        cls.exit_val = True
+                    if key == ord('q') or key == ord('Q'):
+                        session.exit_val = True
                         break
-        except AttributeError:
-            cv2.destroyAllWindows()
-            cls.streaming_status[node] = False  # Streaming stopped due to error
-            return False, ERROR_NO_DEVICES_FOUND  # please assign the camera
-        except ValueError:
-            cv2.destroyAllWindows()
-            cls.streaming_status[node] = False  # Streaming stopped due to error
-            return False, ERROR_NO_DEVICES_FOUND  # please assign the camera
         except BaseException:
-            cv2.destroyAllWindows()
-            cls.streaming_status[node] = False  # Streaming stopped due to error
             return False, ERROR_NO_DEVICES_FOUND
         finally:
-            cv2.destroyAllWindows()
-            # cls.cam_list[cls.cam_index.index(int(node))].release()
-            cls.streaming_status[node] = False
-            cls.streaming_status[node] = False
-            cls.cam_list.clear()
-            cls.cam_index.clear()
-            cls.cap = None
+            subscriber.close()
+            if not session.headless:
+                stop_event.set()
+                session.streaming_status = False
+                session.streaming_initialised = False
+            # Only this node's window and state are torn down, other cameras keep streaming
+            if window_shown:
+                with cls.display_lock:
+                    try:
+                        cv2.destroyWindow(window_name)
+                    except cv2.error:
+                        pass
 
     @classmethod
-    def show_stream(cls, camera_node=-1, duration=0, show_FPS=False):
+    def stop_stream_threads(cls, session):
+        """
+            Usage:
+                Stops the capture, process and display threads of a session and waits for them to finish.
+        """
+        session.stop_event.set()
+        for ring in (session.raw_ring, session.frame_ring):
+            if ring is not None:
+                ring.close()
+        for thread in (session.capture_thread, session.process_thread, session.stream_thread):
+            if thread is not None and thread.is_alive() and thread is not current_thread():
+                thread.join()
+
+    @classmethod
+    def show_stream(cls, camera_node=-1, duration=0, show_FPS=False, headless=False, stats_path=None):
+        """
+            Usage:
+                Starts streaming the camera. Frames are captured, converted and, unless headless, shown in a
+                preview window named "Preview - <node>". Without a GUI (or with headless=True) the stream runs at
+                full rate with no window; frames, save_image() and uvc_var() work the same way in both modes.
+
+            Parameters:
+                - camera_node (int): Camera node obtained from get_connected_devices().
+                - duration (int): Streaming duration in seconds, 0 streams until 'q' is pressed or stop_stream().
+                - show_FPS (bool): Draw the capture FPS on the preview.
+                - headless (bool): Stream without a preview window.
+                - stats_path (str): JSON file the stream's timing statistics (get_stream_stats()) are written to
+                  when the stream ends.
+
+            Returns:
+                bool: True if the stream started, otherwise False and an error code.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
         ERROR_INVALID_CAMERA_NODE = 201
         ERROR_INVALID_DURATION = 216
         ERROR_INVALID_FPS_SHOW = 217
+        ERROR_INVALID_HEADLESS = 222
 
         if isinstance(camera_node, bool) or not isinstance(camera_node, int):
             return False, ERROR_INVALID_CAMERA_NODE
@@ -1293,26 +2145,300 @@ class Camera_api:
             return False, ERROR_INVALID_DURATION
         if not isinstance(show_FPS, bool):
             return False, ERROR_INVALID_FPS_SHOW
+        if not isinstance(headless, bool):
+            return False, ERROR_INVALID_HEADLESS
+
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
 
         # Check if a previous stream exists for this camera node and stop it if so
-        if camera_node in cls.streaming_threads:
-            cls.stop_events[camera_node].set()  # Signal the thread to stop
-            cls.streaming_threads[camera_node].join()  # Wait for the thread to finish
-            cls.stop_events[camera_node].clear()  # Reset the event for future use
-
-        # Create a new stop event for this camera node
-        cls.stop_events[camera_node] = Event()
-        cls.streaming_status[camera_node] = True
-
-        # Start a new thread for streaming
-        cls.streaming_threads[camera_node] = Thread(
-            target=cls.show_preview,
-            args=(camera_node, duration, show_FPS, cls.stop_events[camera_node]),  # Pass stop_event here
+        cls.stop_stream_threads(session)
+        session.stop_event.clear()  # Reset the event for future use
+
+        # Fresh rings per stream, the frame size may have changed since the last one
+        previous_seq = session.frame_ring.latest_seq if session.frame_ring is not None else 0
+        session.raw_ring = FrameRing(cls.RAW_RING_SIZE)
+        session.frame_ring = FrameRing(cls.FRAME_RING_SIZE, start_seq=previous_seq)
+        session.capture_fps = 0
+        session.capture_bytes_per_second = 0
+        session.frames_captured = 0
+        session.headless = headless
+        nominal_fps = session.current_format[3] if session.current_format else session.cap.get(cv2.CAP_PROP_FPS)
+        session.stream_stats = StreamStats(nominal_fps if isinstance(nominal_fps, (int, float)) else None)
+        session.clock_offset = None  # learnt again by the capture stage
+        session.streaming_status = True
+
+        # capture -> raw ring -> process -> frame ring -> display, each stage on its own thread
+        session.capture_thread = Thread(
+            target=cls.capture_frames,
+            args=(camera_node, duration, session.stop_event, stats_path),
+            name="Capture-" + str(camera_node),
+        )
+        session.process_thread = Thread(
+            target=cls.process_frames,
+            args=(camera_node, session.stop_event),
+            name="Process-" + str(camera_node),
         )
-        cls.streaming_threads[camera_node].start()
+        session.stream_thread = None
+        if not headless:
+            session.stream_thread = Thread(
+                target=cls.show_preview,
+                args=(camera_node, duration, show_FPS, session.stop_event),  # Pass stop_event here
+                name="Preview-" + str(camera_node),
+            )
+        session.process_thread.start()
+        if session.stream_thread is not None:
+            session.stream_thread.start()
+        session.capture_thread.start()
 
         return True
 
+    @classmethod
+    def stop_stream(cls, camera_node: int):
+        """
+            Usage:
+                Stops the stream of a camera node, the camera stays assigned.
+
+            Parameters:
+                - camera_node (int): Streaming camera node.
+
+            Returns:
+                tuple: True and 0 on success, False and 102 if the camera is not assigned.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
+        cls.stop_stream_threads(session)
+        return True, 0
+
+    @classmethod
+    def subscribe_frames(cls, camera_node: int, consumer_name: str, policy: str = FrameSubscriber.LATEST,
+                         raw: bool = False):
+        """
+            Usage:
+                Attaches an additional consumer (saver, analytics, ...) to a running stream.
+
+            Parameters:
+                - camera_node (int): Streaming camera node.
+                - consumer_name (str): Name reported in get_pipeline_stats().
+                - policy (str): 'latest' to always get the newest frame and drop the rest, 'lossless' to get every
+                  frame, slowing the capture down when the consumer cannot keep up.
+                - raw (bool): Subscribe to the raw camera frames instead of the converted ones.
+
+            Returns:
+                tuple: The FrameSubscriber and 0 on success, None and an error code otherwise.
+                       - If the camera is not assigned, returns error code 102.
+                       - If the camera is not streaming, returns error code 121.
+                       - If an invalid camera node is provided, returns error code 201.
+                       - If an invalid policy is provided, returns error code 221.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_STREAMING_NOT_INITIALISED = 121
+        ERROR_INVALID_CAMERA_NODE = 201
+        ERROR_INVALID_POLICY = 221
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return None, ERROR_INVALID_CAMERA_NODE
+        if policy not in (FrameSubscriber.LATEST, FrameSubscriber.LOSSLESS):
+            return None, ERROR_INVALID_POLICY
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None, ERROR_CAMERA_NOT_ASSIGNED
+        ring = session.raw_ring if raw else session.frame_ring
+        if ring is None or ring.closed:
+            return None, ERROR_STREAMING_NOT_INITIALISED
+        return ring.subscribe(consumer_name, policy), 0
+
+    @classmethod
+    def wait_for_frame(cls, camera_node: int, after_seq: int = 0, timeout: float = None, after_timestamp: float = None):
+        """
+            Usage:
+                Waits without spinning for a converted frame of a streaming camera and returns an immutable
+                snapshot of it. Pass the seq of the previous snapshot as after_seq to get the next newer frame, or a
+                time.monotonic() value taken right after a parameter change as after_timestamp to get a frame
+                captured after the change. Without driver timestamps a frame is only known to be read after the
+                change, so the driver's queue depth worth of frames read after it is skipped as well.
+
+            Parameters:
+                - camera_node (int): Streaming camera node.
+                - after_seq (int): The frame's sequence number must be greater than this.
+                - timeout (float): Maximum time to wait in seconds, defaults to FRAME_TIMEOUT.
+                - after_timestamp (float): The frame must have been captured after this time.monotonic() value.
+
+            Returns:
+                tuple: A FrameSnapshot (seq, timestamp, read-only frame) and 0 on success, None and an error code
+                       otherwise.
+                       - If the camera is not assigned, returns error code 102.
+                       - If the stream is not running or no frame arrived in time, returns error code 121.
+                       - If an invalid camera node is provided, returns error code 201.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_INITIALIZING_STREAM = 121
+        ERROR_INVALID_CAMERA_NODE = 201
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return None, ERROR_INVALID_CAMERA_NODE
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None, ERROR_CAMERA_NOT_ASSIGNED
+        ring = session.frame_ring
+        if ring is None:
+            return None, ERROR_INITIALIZING_STREAM
+        deadline = time.monotonic() + (cls.FRAME_TIMEOUT if timeout is None else timeout)
+        snapshot = ring.wait_for_frame(after_seq, after_timestamp, deadline - time.monotonic())
+        if snapshot is not None and after_timestamp is not None and session.clock_offset is None:
+            # The first frames read after the change may have been captured before it, queued in the driver
+            depth = session.buffer_depth or cls.CAPTURE_BUFFER_DEPTH
+            snapshot = ring.wait_for_frame(snapshot.seq + depth - 1, None, max(0.0, deadline - time.monotonic()))
+        if snapshot is None:
+            return None, ERROR_INITIALIZING_STREAM
+        return snapshot, 0
+
+    @classmethod
+    def get_stream_stats(cls, camera_node: int):
+        """
+            Usage:
+                Returns the timing statistics of the node's current (or last) stream: inter-frame interval
+                histogram, p50/p95/p99 interval and jitter, estimated dropped frames against the negotiated FPS and
+                average FPS. Can be called while the stream runs.
+
+            Parameters:
+                - camera_node (int): Camera node.
+
+            Returns:
+                tuple: The statistics dict (see StreamStats.snapshot()) and 0 on success, otherwise None and an
+                       error code.
+                       - If the camera is not assigned, returns error code 102.
+                       - If the camera has not streamed yet, returns error code 121.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_INITIALIZING_STREAM = 121
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None, ERROR_CAMERA_NOT_ASSIGNED
+        if session.stream_stats is None:
+            return None, ERROR_INITIALIZING_STREAM
+        return session.stream_stats.snapshot(), 0
+
+    @classmethod
+    def get_pipeline_stats(cls, camera_node: int):
+        """
+            Usage:
+                Reports the capture rate and the per consumer delivery and drop counts of a node's stream.
+
+            Parameters:
+                - camera_node (int): Camera node.
+
+            Returns:
+                tuple: A dict and 0 on success, None and 102 if the camera is not assigned. The dict holds
+                       - 'streaming', 'initialised', 'headless': stream status flags.
+                       - 'capture_fps', 'capture_bytes_per_second': raw throughput delivered by the camera.
+                       - 'frames_captured': frames captured since the stream started.
+                       - 'raw', 'processed': each consumer of the raw and converted frame rings mapped to its
+                         delivered, dropped and lag counts.
+                       - 'raw_recording': statistics of the raw recording (start_raw_recording()), if any.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        session = cls.get_session(camera_node)
+        if session is None:
+            return None, ERROR_CAMERA_NOT_ASSIGNED
+        stats = {
+            'streaming': session.streaming_status,
+            'initialised': session.streaming_initialised,
+            'headless': session.headless,
+            'capture_fps': session.capture_fps,
+            'capture_bytes_per_second': session.capture_bytes_per_second,
+            'frames_captured': session.frames_captured,
+            'raw': session.raw_ring.get_stats() if session.raw_ring is not None else {},
+            'processed': session.frame_ring.get_stats() if session.frame_ring is not None else {},
+            'raw_recording': session.raw_recorder.get_stats() if session.raw_recorder is not None else {},
+        }
+        return stats, 0
+
+    @classmethod
+    def start_raw_recording(cls, camera_node: int, file_path: str, size_mb: int = 1024):
+        """
+            Usage:
+                Records every native sensor buffer of a running stream (before any conversion) into a memory-mapped
+                ring file of size_mb megabytes, see raw_recorder.RawRecorder. When the file is full the oldest
+                frames are overwritten, so a long run keeps its last size_mb of frames. Recording ends with
+                stop_raw_recording() or with the stream. Open the file with raw_recorder.RawRecording to read or
+                export frames by record number or time range. Returns once the file is allocated with the first
+                recorded frame.
+
+            Parameters:
+                - camera_node (int): Streaming camera node.
+                - file_path (str): Recording file, its side index is written to file_path + '.idx'.
+                - size_mb (int): Size of the ring file in megabytes.
+
+            Returns:
+                tuple: True and 0 as success code, otherwise False and an error code.
+                       - If the stream is not running or no frame arrives within FRAME_TIMEOUT, returns False and
+                         error code 121.
+                       - If a recording is already running or the file cannot be created (disk full, size too
+                         small for a frame), returns False and 125.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_STREAMING_NOT_INITIALISED = 121
+        ERROR_UNABLE_TO_RECORD = 125
+        ERROR_INVALID_CAMERA_NODE = 201
+        ERROR_INVALID_SAVE_PATH = 218
+        ERROR_INVALID_RECORDING_SIZE = 224
+
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return False, ERROR_INVALID_CAMERA_NODE
+        if not isinstance(file_path, str) or not file_path:
+            return False, ERROR_INVALID_SAVE_PATH
+        if isinstance(size_mb, bool) or not isinstance(size_mb, int) or size_mb <= 0:
+            return False, ERROR_INVALID_RECORDING_SIZE
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
+        if not session.streaming_status or session.raw_ring is None or session.raw_ring.closed:
+            return False, ERROR_STREAMING_NOT_INITIALISED
+        with session.lock:
+            if session.raw_recorder is not None and session.raw_recorder.get_stats()['recording']:
+                return False, ERROR_UNABLE_TO_RECORD
+            folder = os.path.dirname(os.path.abspath(file_path))
+            if not os.path.isdir(folder):
+                return False, ERROR_INVALID_SAVE_PATH
+            recorder = RawRecorder(file_path, size_mb * 1024 * 1024, session.fourcc or cls.get_fourcc(session.cap))
+            try:
+                recorder.start(session.raw_ring, session.stop_event, cls.FRAME_TIMEOUT)
+            except TimeoutError:
+                return False, ERROR_STREAMING_NOT_INITIALISED
+            except Exception as e:
+                print(f"Unable to record {file_path}: {e}")
+                return False, ERROR_UNABLE_TO_RECORD
+            session.raw_recorder = recorder
+        return True, 0
+
+    @classmethod
+    def stop_raw_recording(cls, camera_node: int):
+        """
+            Usage:
+                Stops the raw recording of a node and closes its file.
+
+            Parameters:
+                - camera_node (int): Camera node.
+
+            Returns:
+                tuple: The recording statistics (frames written, frames skipped, slots) and 0, otherwise False and
+                       102 if the camera is not assigned or 125 if it was not recording.
+        """
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_UNABLE_TO_RECORD = 125
+        session = cls.get_session(camera_node)
+        if session is None:
+            return False, ERROR_CAMERA_NOT_ASSIGNED
+        recorder = session.raw_recorder
+        if recorder is None:
+            return False, ERROR_UNABLE_TO_RECORD
+        recorder.stop()
+        return recorder.get_stats(), 0
+
     @classmethod
     def is_streaming_stopped(cls, camera_node):
         """
@@ -1324,7 +2450,8 @@ class Camera_api:
         Returns:
             bool: True if streaming has stopped, False otherwise.
         """
-        return not cls.streaming_status.get(camera_node, False)
+        session = cls.get_session(camera_node)
+        return session is None or not session.streaming_status
 
     @classmethod
     # def save_image(cls, save_path: str, file_name: str, save_format: str) -> bool:
@@ -1377,20 +2504,28 @@ class Camera_api:
     #         print(e)
     #         return status_code, ERROR_UNABLE_TO_SAVE_IMAGE
 
-    def save_image(cls, save_path: str, file_name: str, save_format: str) -> bool:
+    def save_image(cls, save_path: str, file_name: str, save_format: str, camera_node: int = None,
+                   wait: bool = True) -> bool:
         """
         Usage:
-            Save an image captured from the camera stream.
+            Save an image captured from the camera stream. The image is encoded and written by the background
+            image writer pool (image_writer.py).
 
         Parameters:
              save_path (str): Path to save the captured image.
              save_format (str): Save format for the image to be saved.
              file_name (str): Name of the file to be saved.
+             camera_node (int): Streaming camera node to save from. May be omitted when only one camera is assigned.
+             wait (bool): Wait until the image is written. With False the call returns as soon as the frame is
+                          queued, together with a future resolving to (path, bytes_written).
 
         Returns:
              bool: True if the image is successfully saved, False otherwise.
+                   With wait=False, the completion future instead of True.
         """
 
+        ERROR_CAMERA_NOT_ASSIGNED = 102
+        ERROR_INVALID_CAMERA_NODE = 201
         ERROR_IMAGE_SAVE_FORMAT = 214
         ERROR_INVALID_SAVE_PATH = 218
         ERROR_INVALID_IMAGE_SAVE_NAME = 219
@@ -1409,26 +2544,33 @@ class Camera_api:
             return False, ERROR_MISSING_IMAGE_SAVE_PATH
         if isinstance(file_name, bool) or not isinstance(file_name, str):
             return status_code, ERROR_INVALID_IMAGE_SAVE_NAME
+        if camera_node is None:
+            with cls.sessions_lock:
+                if len(cls.sessions) != 1:
+                    return status_code, ERROR_INVALID_CAMERA_NODE
+                camera_node = next(iter(cls.sessions))
+        if isinstance(camera_node, bool) or not isinstance(camera_node, int):
+            return status_code, ERROR_INVALID_CAMERA_NODE
+
+        session = cls.get_session(camera_node)
+        if session is None:
+            return status_code, ERROR_CAMERA_NOT_ASSIGNED
 
         try:
-            while not cls.streaming_initialised:
-                continue
+            snapshot, error_code = cls.wait_for_frame(camera_node, timeout=cls.FIRST_FRAME_TIMEOUT)
+            if snapshot is None:
+                return status_code, error_code
             current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             file_name = f"{file_name}_{current_time}.{save_format}"
             save_image_path = os.path.join(save_path, file_name)
 
             if save_format in supported_image_save_format:
-                if save_format == 'raw':
-                    # Save raw image data
-                    with open(save_image_path, 'wb') as f:
-                        f.write(cls.frame1.tobytes())
-                    status_code = True
-                else:
-                    # Save using OpenCV for other formats
-                    if cv2.imwrite(save_image_path, cls.frame1):
-                        status_code = True
-                    else:
-                        return status_code, ERROR_UNABLE_TO_SAVE_IMAGE
+                # The snapshot is a private read-only copy, so the writer can use it without copying again
+                future = get_image_writer().submit(save_image_path, snapshot.frame, save_format)
+                if not wait:
+                    return future, success_code
+                future.result()
+                status_code = True
                 return status_code, success_code
             else:
                 return status_code, ERROR_IMAGE_SAVE_FORMAT  # unknown save format
@@ -6,6 +6,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 import time
 from Camera_Test_Automation_API import Camera_api as ca
+from camera_device_registry import device_registry
 
 
 def get_valid_camera_index(camera_name):
@@ -15,30 +16,14 @@ def get_valid_camera_index(camera_name):
     Returns:
         int: The index of the camera if found, otherwise -1.
     """
-    import cv2 as cv
-    import gc
-
-    cap = cv.VideoCapture()
-    devices = cap.getDevices()
-    for i in range(devices[1]):
-        if camera_name == cap.getDeviceInfo(i)[1]:
-            cap.release()
-            del cap
-            gc.collect()
-            return i
-    cap.release()
-    del cap
-    gc.collect()
-    return -1
+    return device_registry.get_index(camera_name)
 
 
 def get_usb_camera_resolutions(camera_index):
-    print(ca.assign_camera(camera_index))
-    supported_resolutions = ca.get_supported_resolution(camera_index)
-    print(supported_resolutions)
-    unique_resolutions = sorted({(width, height) for _, width, height, _ in supported_resolutions[0]})
+    capabilities = ca.get_capabilities(camera_index)
+    print(capabilities)
+    unique_resolutions = sorted({(width, height) for _, width, height, _ in capabilities[0]['formats']})
     print("Unique resolutions supported by the camera:", unique_resolutions)
-    ca.release_camera(camera_index)
     return unique_resolutions
 
 
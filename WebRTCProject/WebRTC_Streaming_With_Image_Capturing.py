@@ -1,5 +1,4 @@
 import os
-import cv2
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -7,6 +6,8 @@ from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.edge.options import Options as EdgeOptions
 import time
 from Camera_Test_Automation_API import Camera_api as ca
+from camera_device_registry import device_registry
+from webrtc_frame_capture import format_timings, save_video_frame
 
 
 def get_valid_camera_index(camera_name):
@@ -16,29 +17,14 @@ def get_valid_camera_index(camera_name):
     Returns:
         int: The index of the camera if found, otherwise -1.
     """
-    import gc
-
-    cap = cv2.VideoCapture()
-    devices = cap.getDevices()
-    for i in range(devices[1]):
-        if camera_name == cap.getDeviceInfo(i)[1]:
-            cap.release()
-            del cap
-            gc.collect()
-            return i
-    cap.release()
-    del cap
-    gc.collect()
-    return -1
+    return device_registry.get_index(camera_name)
 
 
 def get_usb_camera_resolutions(camera_index):
-    print(ca.assign_camera(camera_index))
-    supported_resolutions = ca.get_supported_resolution(camera_index)
-    print(supported_resolutions)
-    unique_resolutions = sorted({(width, height) for _, width, height, _ in supported_resolutions[0]})
+    capabilities = ca.get_capabilities(camera_index)
+    print(capabilities)
+    unique_resolutions = sorted({(width, height) for _, width, height, _ in capabilities[0]['formats']})
     print("Unique resolutions supported by the camera:", unique_resolutions)
-    ca.release_camera(camera_index)
     return unique_resolutions
 
 
@@ -81,31 +67,22 @@ def is_stream_active(driver, screenshot_path=None):
     return False
 
 
-def capture_full_video_frame(driver, save_path):
+def capture_full_video_frame(driver, save_path, capture_format="rgba"):
     """
-    Captures the full video frame from the video element using a canvas.
+    Captures the full video frame from the video element at its native resolution.
+
+    The frame is transferred as raw pixels (or JPEG/WebP) instead of a PNG data URL, see
+    webrtc_frame_capture.capture_video_frame().
 
     Args:
         driver: Selenium WebDriver instance.
         save_path: Path to save the captured image.
-    """
-    script = """
-        const video = document.querySelector('video');
-        const canvas = document.createElement('canvas');
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        const ctx = canvas.getContext('2d');
-        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-        return canvas.toDataURL('image/png');
+        capture_format: "rgba", "jpeg", "webp" or "png". Raw RGBA frames are written by OpenCV in the format of
+            save_path's extension.
     """
     try:
-        base64_image = driver.execute_script(script)
-
-        # Decode the base64 image and save it to the specified path
-        import base64
-        with open(save_path, "wb") as file:
-            file.write(base64.b64decode(base64_image.split(",")[1]))
-        print(f"Full video frame saved to {save_path}")
+        timings = save_video_frame(driver, save_path, capture_format)
+        print(f"Full video frame saved to {save_path} ({format_timings(timings)})")
     except Exception as e:
         print(f"Failed to capture full video frame: {e}")
 
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+
+from Camera_Test_Automation_API import Camera_api as ca
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def legacy_convert_y12_to_y8(frame):
+    """
+    Previous Camera_api.convert_y12_to_y8 (tobytes, np.delete and a per row copy), kept as the baseline.
+    """
+    y8_frame = np.zeros(shape=(frame.shape[0], frame.shape[1]), dtype=np.uint8)
+    filtered_bytes = np.frombuffer(frame.tobytes(), dtype=np.uint8)
+    filtered_bytes = np.reshape(filtered_bytes, (-1, 3))
+    filtered_bytes = np.delete(filtered_bytes, 2, 1)
+    filtered_bytes = np.reshape(filtered_bytes, -1)
+    m = 0
+    for i in range(0, frame.shape[0]):
+        y8_frame[i,] = filtered_bytes[m:m + frame.shape[1]]
+        m += frame.shape[1]
+    return y8_frame
+
+
+def make_y12_frame(width, height):
+    """
+    Builds a Y12 capture buffer (height x width x 2 bytes) holding a packed horizontal gradient.
+    """
+    pixels = (np.arange(width * height, dtype=np.uint32) % width * 4095 // max(1, width - 1)).astype(np.uint16)
+    first, second = pixels[0::2], pixels[1::2]
+    packed = np.stack([first >> 4, second >> 4, (first & 0x0F) | ((second & 0x0F) << 4)], axis=1).astype(np.uint8)
+    frame = np.zeros((height, width, 2), dtype=np.uint8)
+    frame.reshape(-1)[:packed.size] = packed.reshape(-1)
+    return frame
+
+
+def time_call(function, repeat):
+    function()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat=20):
+    for name, (width, height) in RESOLUTIONS.items():
+        frame = make_y12_frame(width, height)
+        y8_out = np.empty((height, width), dtype=np.uint8)
+        y16_out = np.empty((height, width), dtype=np.uint16)
+
+        results = {
+            "legacy y12->y8": time_call(lambda: legacy_convert_y12_to_y8(frame), max(1, repeat // 4)),
+            "y12->y8": time_call(lambda: ca.convert_y12_to_y8(frame), repeat),
+            "y12->y8 (out=)": time_call(lambda: ca.convert_y12_to_y8(frame, out=y8_out), repeat),
+            "y12->y16 (out=)": time_call(lambda: ca.convert_y12_to_y16(frame, out=y16_out), repeat),
+        }
+        baseline = results["legacy y12->y8"]
+        print(f"{name} ({width}x{height})")
+        for label, seconds in results.items():
+            print(f"  {label:<18} {seconds * 1000:8.2f} ms/frame  {1 / seconds:8.1f} fps  x{baseline / seconds:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
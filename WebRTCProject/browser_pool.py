@@ -0,0 +1,258 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+# Stops every camera track the page holds, so the camera is free for the next job without restarting the browser
+TEARDOWN_MEDIA_SCRIPT = """
+    const stopStream = (stream) => { if (stream) { stream.getTracks().forEach((track) => track.stop()); } };
+    document.querySelectorAll('video').forEach((video) => {
+        stopStream(video.srcObject);
+        video.srcObject = null;
+    });
+    if (window.stream) {
+        stopStream(window.stream);
+        window.stream = null;
+    }
+    return document.readyState;
+"""
+
+
+def chrome_options():
+    options = Options()
+    options.add_argument("--use-fake-ui-for-media-stream")
+    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+    options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values.media_stream_camera": 1,
+        "profile.default_content_setting_values.media_stream_mic": 1,
+    })
+    return options
+
+
+def edge_options():
+    options = EdgeOptions()
+    options.add_argument("--use-fake-ui-for-media-stream")
+    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+    options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values.media_stream_camera": 1,
+        "profile.default_content_setting_values.media_stream_mic": 1,
+    })
+    return options
+
+
+def firefox_options():
+    options = FirefoxOptions()
+    options.set_preference("dom.disable_open_during_load", False)
+    options.set_preference("media.navigator.permission.disabled", True)  # Automatically allow camera
+    options.set_preference("media.navigator.streams.fake", False)  # Use real camera instead of fake
+    options.set_preference("privacy.resistFingerprinting", False)
+    options.set_preference("media.getusermedia.screensharing.enabled", True)
+    return options
+
+
+# Browser name to (options factory, WebDriver class)
+BROWSERS = {
+    "Chrome": (chrome_options, webdriver.Chrome),
+    "Edge": (edge_options, webdriver.Edge),
+    "Firefox": (firefox_options, webdriver.Firefox),
+}
+
+
+class BrowserSession:
+    """
+    A WebDriver session owned by a BrowserPool.
+    """
+
+    def __init__(self, browser_name, driver, startup_seconds):
+        self.browser_name = browser_name
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+        self.url = None
+        self.jobs = 0
+
+
+class BrowserPool:
+    """
+    Keeps warm WebDriver sessions per browser type and hands them out job after job.
+
+    Between jobs the page is reset instead of the browser being restarted: the media tracks are stopped (the
+    camera is released) and the page stays loaded, or, with reset="reload", the page is reloaded. A session is
+    only recycled (quit and replaced by a new one on its next use) after max_jobs jobs or when it fails a health
+    check or a job raised a WebDriverException.
+
+    The pool records the cold start time of every new session and the time to hand out a warm one, see
+    get_stats().
+    """
+
+    def __init__(self, max_jobs=20, reset="tracks", browsers=None):
+        """
+        Args:
+            max_jobs (int): Jobs a session runs before it is recycled.
+            reset (str): "tracks" to stop the page's media tracks between jobs, "reload" to reload the page.
+            browsers (dict): Browser name to (options factory, WebDriver class), defaults to BROWSERS.
+        """
+        if reset not in ("tracks", "reload"):
+            raise ValueError(f"Unknown page reset: {reset}")
+        self.max_jobs = max_jobs
+        self.reset = reset
+        self.browsers = browsers or BROWSERS
+        self.idle = {}
+        self.lock = Lock()
+        self.stats = {}
+
+    def _stats(self, browser_name):
+        return self.stats.setdefault(browser_name, {
+            "started": 0, "startup_seconds": 0.0, "reused": 0, "reuse_seconds": 0.0,
+            "recycled": 0, "health_failures": 0,
+        })
+
+    def _start(self, browser_name):
+        options_factory, browser_driver = self.browsers[browser_name]
+        start = time.perf_counter()
+        driver = browser_driver(options=options_factory())
+        return BrowserSession(browser_name, driver, time.perf_counter() - start)
+
+    @staticmethod
+    def _quit(session):
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"Unable to quit {session.browser_name}: {e}")
+
+    @staticmethod
+    def is_healthy(session):
+        """
+        Returns:
+            bool: True if the browser still answers WebDriver commands.
+        """
+        try:
+            session.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, browser_name, url):
+        """
+        Hands out a session of the given browser with url loaded, a warm one if the pool has one.
+
+        Args:
+            browser_name (str): "Chrome", "Edge" or "Firefox".
+            url (str): Page the job runs on. A warm session already showing it is not navigated again.
+
+        Returns:
+            BrowserSession: The session, give it back with release().
+        """
+        if browser_name not in self.browsers:
+            raise ValueError(f"Unsupported browser: {browser_name}")
+        start = time.perf_counter()
+        session = None
+        with self.lock:
+            idle = self.idle.get(browser_name, [])
+            stats = self._stats(browser_name)
+            while idle and session is None:
+                session = idle.pop()
+                if not self.is_healthy(session):
+                    stats["health_failures"] += 1
+                    stats["recycled"] += 1
+                    self._quit(session)
+                    session = None
+
+        if session is None:
+            session = self._start(browser_name)
+            session.driver.get(url)
+            session.url = url
+            with self.lock:
+                stats["started"] += 1
+                stats["startup_seconds"] += time.perf_counter() - start
+            return session
+
+        if session.url != url:
+            session.driver.get(url)
+            session.url = url
+        with self.lock:
+            stats["reused"] += 1
+            stats["reuse_seconds"] += time.perf_counter() - start
+        return session
+
+    def release(self, session, healthy=True):
+        """
+        Takes a session back. Its page is reset for the next job, or the session is quit if it ran max_jobs jobs,
+        is unhealthy or the reset fails.
+        """
+        session.jobs += 1
+        if healthy and session.jobs < self.max_jobs:
+            try:
+                if self.reset == "reload":
+                    session.driver.refresh()
+                else:
+                    session.driver.execute_script(TEARDOWN_MEDIA_SCRIPT)
+            except WebDriverException:
+                healthy = False
+        with self.lock:
+            stats = self._stats(session.browser_name)
+            if healthy and session.jobs < self.max_jobs:
+                self.idle.setdefault(session.browser_name, []).append(session)
+                return
+            if not healthy:
+                stats["health_failures"] += 1
+            stats["recycled"] += 1
+        self._quit(session)
+
+    @contextmanager
+    def session(self, browser_name, url):
+        """
+        Runs a job on a pooled browser: `with pool.session("Chrome", url) as driver: ...`. A WebDriverException
+        raised by the job retires the session.
+        """
+        session = self.acquire(browser_name, url)
+        healthy = True
+        try:
+            yield session.driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(session, healthy)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Per browser: sessions started and their total / mean cold start time, jobs served by a warm
+                  session and the total / mean time to hand one out, sessions recycled and health failures.
+        """
+        with self.lock:
+            report = {}
+            for browser_name, stats in self.stats.items():
+                report[browser_name] = dict(stats)
+                report[browser_name]["mean_startup_seconds"] = \
+                    stats["startup_seconds"] / stats["started"] if stats["started"] else 0.0
+                report[browser_name]["mean_reuse_seconds"] = \
+                    stats["reuse_seconds"] / stats["reused"] if stats["reused"] else 0.0
+            return report
+
+    def print_stats(self):
+        for browser_name, stats in self.get_stats().items():
+            print(f"{browser_name}: {stats['started']} started (mean {stats['mean_startup_seconds']:.2f} s), "
+                  f"{stats['reused']} reused (mean {stats['mean_reuse_seconds']:.3f} s), "
+                  f"{stats['recycled']} recycled, {stats['health_failures']} health failures")
+
+    def close(self):
+        """
+        Quits every idle session.
+        """
+        with self.lock:
+            sessions = [session for idle in self.idle.values() for session in idle]
+            self.idle = {}
+        for session in sessions:
+            self._quit(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
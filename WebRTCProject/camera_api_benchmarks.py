@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from threading import Event
+
+import numpy as np
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import OpenCVBackend, SyntheticBackend, SyntheticCamera
+from frame_ring import FrameRing, FrameSubscriber
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+FORMATS = ("UYVY", "YUY2", "Y12", "Y16", "MJPG")
+SAVE_FORMATS = ("jpg", "png", "bmp", "raw")
+# Bytes a zero allocation loop may still allocate per call: small Python objects, never a frame buffer
+ZERO_ALLOC_SLACK = 16384
+
+# Converters as the stream loop resolves them (FRAME_CONVERTERS) and the output buffer each one fills
+CONVERTERS = {
+    "UYVY": ("convert_uyvy_to_bgr", lambda w, h: np.empty((h, w, 3), dtype=np.uint8)),
+    "YUY2": ("convert_yuy2_to_bgr", lambda w, h: np.empty((h, w, 3), dtype=np.uint8)),
+    "Y12": ("convert_y12_to_y8", lambda w, h: np.empty((h, w), dtype=np.uint8)),
+    "Y16": ("convert_y16_to_rgb", lambda w, h: np.empty((h, w), dtype=np.uint8)),
+}
+
+
+def benchmark_camera():
+    """
+    Synthetic camera offering every benchmarked format at every benchmarked resolution.
+    """
+    modes = [(fmt, width, height, 30) for fmt in FORMATS for width, height in RESOLUTIONS.values()]
+    return SyntheticCamera(name="See3CAM_Benchmark", modes=modes)
+
+
+def set_mode(width, height, fmt):
+    """
+    Switches camera node 0 to a benchmarked mode.
+
+    Raises:
+        RuntimeError: If the camera refuses the mode, the benchmark would measure the previous mode instead.
+    """
+    status, error_code = ca.set_resolution(0, width, height, fmt, 30)
+    if error_code != 0:
+        raise RuntimeError(f"Unable to set {fmt} {width}x{height}: " + ca.get_error_description(error_code)[0])
+
+
+def open_mode(backend, fmt, width, height):
+    """
+    Opens a bare synthetic capture (no Camera_api session) in the given mode.
+    """
+    capture = backend.open_capture(0)
+    capture.setFormatType(capture.camera.modes.index((fmt, width, height, 30)))
+    return capture
+
+
+def measure(function, repeat, alloc_repeat=3):
+    """
+    Times function over repeat calls after one warm-up call, then traces alloc_repeat further calls.
+
+    Returns:
+        dict: ops_per_s, ns_per_op, alloc_bytes_per_op (largest traced peak of a single call above the memory in
+              use before it) and alloc_net_bytes (memory still held after the traced calls).
+    """
+    function()
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        function()
+    ns_per_op = (time.perf_counter_ns() - start) / repeat
+
+    tracemalloc.start()
+    try:
+        function()  # lazily created state is not a per-call allocation
+        peak = 0
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(alloc_repeat):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            function()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "ops_per_s": round(1e9 / ns_per_op, 3) if ns_per_op else 0.0,
+        "ns_per_op": round(ns_per_op),
+        "alloc_bytes_per_op": peak,
+        "alloc_net_bytes": max(0, after - before),
+        "repeat": repeat,
+    }
+
+
+def bench_converters(resolutions, repeat, cache_dir):
+    results = {}
+    backend = SyntheticBackend([benchmark_camera()], realtime=False, cache_dir=cache_dir)
+    for res_name, (width, height) in resolutions.items():
+        for fmt, (method_name, make_out) in CONVERTERS.items():
+            frame = open_mode(backend, fmt, width, height).read()[1]
+            converter = getattr(ca, method_name)
+            out = make_out(width, height)
+            results[f"convert/{fmt}/{res_name}"] = measure(lambda: converter(frame), repeat)
+            results[f"convert/{fmt}/{res_name}/out"] = measure(lambda: converter(frame, out=out), repeat)
+    return results
+
+
+def bench_stream_loop(resolutions, repeat, cache_dir):
+    """
+    One pass of the stream pipeline per call, run on the calling thread: Camera_api.capture_step() into the raw
+    ring, the process stage's get and Camera_api.process_step() into the frame ring, and the display stage's
+    get. The HighGUI imshow is left out, it depends on the display and is not available headless.
+    """
+    results = {}
+    ca.set_backend(SyntheticBackend([benchmark_camera()], realtime=False, cache_dir=cache_dir))
+    ca.assign_camera(0)
+    session = ca.get_session(0)
+    try:
+        for res_name, (width, height) in resolutions.items():
+            for fmt in FORMATS:
+                set_mode(width, height, fmt)
+                session.raw_ring = FrameRing(ca.RAW_RING_SIZE)
+                session.frame_ring = FrameRing(ca.FRAME_RING_SIZE)
+                ca.resolve_frame_converter(0)
+                process = session.raw_ring.subscribe("process", FrameSubscriber.LATEST)
+                display = session.frame_ring.subscribe("display", FrameSubscriber.LATEST)
+                stop_event = Event()
+
+                def loop_body():
+                    ca.capture_step(session, stop_event)
+                    ca.process_step(session, process.get(timeout=1), stop_event)
+                    return display.get(timeout=1)
+
+                # Fill every ring slot first, the buffers are allocated once per slot
+                for _ in range(max(ca.RAW_RING_SIZE, ca.FRAME_RING_SIZE)):
+                    loop_body()
+                results[f"stream_loop/{fmt}/{res_name}"] = measure(loop_body, repeat)
+                session.raw_ring.close()
+                session.frame_ring.close()
+    finally:
+        ca.release_camera(0)
+        ca.set_backend(SyntheticBackend([benchmark_camera()], cache_dir=cache_dir))
+    return results
+
+
+def check_zero_allocations(report, prefix="stream_loop/", slack=ZERO_ALLOC_SLACK):
+    """
+    Returns:
+        list: (benchmark, alloc_bytes_per_op) of the benchmarks under prefix that allocate more than slack bytes
+              per call. The stream loop must not allocate frame buffers once its rings are filled.
+    """
+    return [(name, result["alloc_bytes_per_op"]) for name, result in report["results"].items()
+            if name.startswith(prefix) and result["alloc_bytes_per_op"] > slack]
+
+
+def bench_save_image(resolutions, repeat):
+    """
+    Camera_api.save_image of a headless UYVY stream in every save format, written to a temporary folder.
+    """
+    results = {}
+    save_path = tempfile.mkdtemp(prefix="camera_api_bench_")
+    try:
+        for res_name, (width, height) in resolutions.items():
+            ca.assign_camera(0)
+            try:
+                set_mode(width, height, "UYVY")
+                ca.show_stream(0, 0, False, True)
+                for save_format in SAVE_FORMATS:
+                    results[f"save_image/{save_format}/{res_name}"] = measure(
+                        lambda: ca.save_image(save_path, "bench", save_format, 0), repeat, alloc_repeat=1)
+            finally:
+                ca.stop_stream(0)
+                ca.release_camera(0)
+    finally:
+        shutil.rmtree(save_path, ignore_errors=True)
+    return results
+
+
+def bench_controls(repeat):
+    """
+    UVC set/get round trips and HID transactions against the synthetic camera.
+    """
+    results = {}
+    ca.assign_camera(0)
+    try:
+        results["uvc/set_get"] = measure(
+            lambda: (ca.set_uvc(0, "brightness", 10, 2), ca.get_uvc(0, "brightness")), repeat)
+        results["hid/get_hid"] = measure(lambda: ca.get_hid(0, [0x81, 0x01, 0x00]), repeat)
+        results["hid/firmware"] = measure(lambda: ca.get_firmware_version(0), repeat)
+        batch = [[0x81, i, 0x00] for i in range(16)]
+        results["hid/transact_16_window_4"] = measure(lambda: ca.transact_hid(0, batch, window=4), repeat)
+    finally:
+        ca.release_camera(0)
+    return results
+
+
+def run(resolutions=RESOLUTIONS, repeat=50, save_repeat=5):
+    """
+    Runs the whole suite on the synthetic backend, with a capability cache of its own. The OpenCV backend is
+    selected again afterwards.
+
+    Returns:
+        dict: Run metadata and the results keyed by benchmark name.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="camera_api_bench_cache_")
+    try:
+        status, error_code = ca.set_backend(SyntheticBackend([benchmark_camera()], cache_dir=cache_dir))
+        if error_code != 0:
+            raise RuntimeError("Release every camera before benchmarking: " + ca.get_error_description(error_code)[0])
+        results = {}
+        results.update(bench_converters(resolutions, repeat, cache_dir))
+        results.update(bench_stream_loop(resolutions, repeat, cache_dir))
+        results.update(bench_save_image(resolutions, save_repeat))
+        results.update(bench_controls(repeat))
+    finally:
+        ca.set_backend(OpenCVBackend())
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.25, alloc_tolerance=4096):
+    """
+    Compares a run against a baseline run.
+
+    Returns:
+        list: (benchmark, metric, baseline value, current value) of every regression: ns_per_op more than
+              tolerance (relative) above the baseline, or alloc_bytes_per_op more than alloc_tolerance bytes above.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["ns_per_op"] > previous["ns_per_op"] * (1 + tolerance):
+            regressions.append((name, "ns_per_op", previous["ns_per_op"], current["ns_per_op"]))
+        if current["alloc_bytes_per_op"] > previous["alloc_bytes_per_op"] + alloc_tolerance:
+            regressions.append((name, "alloc_bytes_per_op", previous["alloc_bytes_per_op"],
+                                current["alloc_bytes_per_op"]))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    previous = (baseline or {}).get("results", {})
+    print(f"{'benchmark':<34} {'ops/s':>10} {'ns/op':>14} {'alloc B/op':>12} {'vs baseline':>12}")
+    for name, result in report["results"].items():
+        ratio = ""
+        if name in previous and result["ns_per_op"]:
+            ratio = f"x{previous[name]['ns_per_op'] / result['ns_per_op']:.2f}"
+        print(f"{name:<34} {result['ops_per_s']:>10.1f} {result['ns_per_op']:>14,} "
+              f"{result['alloc_bytes_per_op']:>12,} {ratio:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Camera_api hot path benchmarks on the synthetic backend")
+    parser.add_argument("--output", default="camera_api_benchmarks.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--save-repeat", type=int, default=5)
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    args = parser.parse_args(argv)
+
+    report = run({name: RESOLUTIONS[name] for name in args.resolutions}, args.repeat, args.save_repeat)
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    failed = False
+    for name, allocated in check_zero_allocations(report):
+        print(f"ALLOCATES {name}: {allocated:,} bytes per frame, expected none")
+        failed = True
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name}: {metric} {before:,} -> {after:,}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+import shutil
+import tempfile
+import time
+import weakref
+from collections import deque
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from camera_capability_cache import CapabilityCache, capability_cache
+
+
+class OpenCVBackend:
+    """
+        Real hardware: cameras through e-con's OpenCV build, HID through hidapi. Capabilities are cached in the
+        user's capability cache.
+    """
+
+    name = "opencv"
+    capability_cache = capability_cache
+
+    def open_capture(self, camera_node: int = None):
+        """
+            Returns:
+                cv2.VideoCapture: Capture of the node, or an unopened capture used for device enumeration.
+        """
+        return cv2.VideoCapture() if camera_node is None else cv2.VideoCapture(camera_node)
+
+    def hid_enumerate(self, vendor_id: int, product_id: int) -> list:
+        import hid
+        return hid.enumerate(vendor_id, product_id)
+
+    def hid_device(self):
+        import hid
+        return hid.device()
+
+
+def fourcc_value(fourcc: str) -> float:
+    code = fourcc.ljust(4)[:4]
+    return float(sum(ord(c) << 8 * i for i, c in enumerate(code)))
+
+
+def luma_pattern(width: int, height: int, levels: int = 256) -> np.ndarray:
+    """
+        Returns:
+            numpy.ndarray: (height, width) test pattern, a horizontal ramp over 0..levels-1 with eight vertical
+                           bands of alternating contrast, as uint16.
+    """
+    ramp = (np.arange(width, dtype=np.uint32) * (levels - 1) // max(1, width - 1)).astype(np.uint16)
+    pattern = np.repeat(ramp[np.newaxis, :], height, axis=0)
+    band = max(1, height // 8)
+    for start in range(band, height, 2 * band):
+        pattern[start:start + band] = (levels - 1) - pattern[start:start + band]
+    return pattern
+
+
+def render_pattern(fourcc: str, width: int, height: int) -> np.ndarray:
+    """
+        Usage:
+            Builds a test frame laid out the way e-con's OpenCV build delivers the format.
+            - UYVY / YUY2: (height, width, 2) uint8, luma in byte 1 / byte 0, neutral chroma.
+            - Y12: (height, width, 2) uint8 buffer holding 12-bit pixels packed two per three bytes.
+            - Y16: (height, width) uint16 with 10-bit values.
+            - MJPG (and anything else): (height, width, 3) BGR, as OpenCV decodes MJPG.
+    """
+    if fourcc in ("UYVY", "YUY2"):
+        frame = np.full((height, width, 2), 128, dtype=np.uint8)
+        frame[..., 1 if fourcc == "UYVY" else 0] = luma_pattern(width, height)
+        return frame
+    if fourcc == "Y12":
+        pixels = luma_pattern(width, height, 4096).reshape(-1)
+        if pixels.size % 2:
+            pixels = np.append(pixels, 0)
+        first, second = pixels[0::2], pixels[1::2]
+        packed = np.stack([first >> 4, second >> 4, (first & 0x0F) | ((second & 0x0F) << 4)], axis=1)
+        frame = np.zeros((height, width, 2), dtype=np.uint8)
+        frame.reshape(-1)[:packed.size] = packed.astype(np.uint8).reshape(-1)
+        return frame
+    if fourcc == "Y16":
+        return luma_pattern(width, height, 1024)
+    luma = luma_pattern(width, height).astype(np.uint8)
+    return np.dstack([luma, np.roll(luma, width // 3, axis=1), np.roll(luma, 2 * width // 3, axis=1)])
+
+
+# 0xFFFF is not assigned to any USB vendor, a synthetic camera can never be mistaken for real hardware
+SYNTHETIC_VID = "ffff"
+
+
+class SyntheticCamera:
+    """
+        Description of one synthetic camera: identity, firmware, modes and UVC controls.
+    """
+
+    DEFAULT_MODES = [
+        ("UYVY", 1280, 720, 60),
+        ("UYVY", 1920, 1080, 30),
+        ("UYVY", 3840, 2160, 15),
+        ("YUY2", 1280, 720, 60),
+        ("YUY2", 1920, 1080, 30),
+        ("Y12", 1920, 1080, 30),
+        ("Y16", 1920, 1080, 30),
+        ("MJPG", 1280, 720, 60),
+        ("MJPG", 1920, 1080, 60),
+        ("MJPG", 3840, 2160, 30),
+    ]
+
+    # name: (capture property, min, max, step, supported mode, default, default mode)
+    # supported mode 2 - manual only, 3 - manual and auto; mode 1 - Auto, 2 - Manual
+    DEFAULT_UVC = {
+        "brightness": (cv2.CAP_PROP_BRIGHTNESS, -64, 64, 1, 2, 0, 2),
+        "contrast": (cv2.CAP_PROP_CONTRAST, 0, 95, 1, 2, 32, 2),
+        "saturation": (cv2.CAP_PROP_SATURATION, 0, 100, 1, 2, 64, 2),
+        "hue": (cv2.CAP_PROP_HUE, -2000, 2000, 1, 2, 0, 2),
+        "gain": (cv2.CAP_PROP_GAIN, 0, 100, 1, 2, 0, 2),
+        "exposure": (cv2.CAP_PROP_EXPOSURE, 1, 10000, 1, 3, 156, 1),
+        "white_balance_blue_u": (cv2.CAP_PROP_WHITE_BALANCE_BLUE_U, 2800, 6500, 1, 3, 4600, 1),
+        "sharpness": (cv2.CAP_PROP_SHARPNESS, 0, 7, 1, 2, 2, 2),
+        "gamma": (cv2.CAP_PROP_GAMMA, 72, 500, 1, 2, 100, 2),
+    }
+
+    def __init__(self, name: str = "See3CAM_Synthetic", vid: str = SYNTHETIC_VID, pid: str = "0001",
+                 firmware: tuple = (1, 2, 3, 4), unique_id: bytes = b"\x12\x34\x56\x78", modes: list = None,
+                 uvc: dict = None):
+        self.name = name
+        self.vid = vid
+        self.pid = pid
+        self.firmware = firmware
+        self.unique_id = unique_id
+        self.modes = list(modes or self.DEFAULT_MODES)
+        self.uvc = dict(uvc or self.DEFAULT_UVC)
+
+
+class SyntheticCapture:
+    """
+        Stand-in for e-con's cv2.VideoCapture that serves test patterns at the mode's frame rate.
+
+        With realtime=False frames are delivered as fast as they are read, which is what benchmarks want.
+    """
+
+    def __init__(self, backend, camera_node: int = None):
+        self.backend = backend
+        self.camera = backend.cameras[camera_node] if camera_node is not None else None
+        self.opened = self.camera is not None
+        self.mode_index = 0
+        self.frame_count = 0
+        self.last_frame_time = None
+        self.patterns = {}
+        if self.camera is not None:
+            self.values = {name: (spec[5], spec[6]) for name, spec in self.camera.uvc.items()}
+            self.by_property = {spec[0]: name for name, spec in self.camera.uvc.items()}
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def getDevices(self):
+        return True, len(self.backend.cameras)
+
+    def getDeviceInfo(self, index: int):
+        camera = self.backend.cameras[index]
+        return True, camera.name, camera.vid, camera.pid, "synthetic:%d" % index
+
+    def getFormats(self):
+        return True, len(self.camera.modes)
+
+    def getFormatType(self, index: int):
+        return (True,) + tuple(self.camera.modes[index])
+
+    def setFormatType(self, index: int):
+        if not 0 <= index < len(self.camera.modes):
+            return False
+        self.mode_index = index
+        return True
+
+    def _pattern(self):
+        mode = self.camera.modes[self.mode_index]
+        pattern = self.patterns.get(mode)
+        if pattern is None:
+            pattern = render_pattern(mode[0], mode[1], mode[2])
+            self.patterns[mode] = pattern
+        return pattern
+
+    def read(self, image=None):
+        if not self.opened:
+            return False, None
+        fps = self.camera.modes[self.mode_index][3]
+        if self.backend.realtime and self.last_frame_time is not None:
+            delay = self.last_frame_time + 1.0 / fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.last_frame_time = time.monotonic()
+        pattern = self._pattern()
+        if image is None or image.shape != pattern.shape or image.dtype != pattern.dtype:
+            image = np.empty_like(pattern)
+        np.copyto(image, pattern)  # the driver writes every frame
+        self.frame_count += 1
+        return True, image
+
+    def get(self, prop, *args):
+        name = self.by_property.get(prop) if self.camera is not None else None
+        if args:
+            if name is None:
+                return (False,) + tuple(args)
+            spec = self.camera.uvc[name]
+            value, mode = self.values[name]
+            return True, spec[1], spec[2], spec[3], spec[4], value, mode, spec[5]
+        if name is not None:
+            return float(self.values[name][0])
+        if self.camera is None:
+            return -1.0
+        fourcc, width, height, fps = self.camera.modes[self.mode_index]
+        if prop == cv2.CAP_PROP_FOURCC:
+            return fourcc_value(fourcc)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(fps)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.last_frame_time * 1000.0 if self.last_frame_time else 0.0
+        return -1.0
+
+    def set(self, prop, value, mode=2):
+        name = self.by_property.get(prop) if self.camera is not None else None
+        if name is None:
+            return False
+        spec = self.camera.uvc[name]
+        if not spec[1] <= value <= spec[2]:
+            return False
+        self.values[name] = (int(value), int(mode))
+        return True
+
+
+class SyntheticHidDevice:
+    """
+        Stand-in for hid.device() answering e-con's firmware (0x40) and unique ID (0x41) commands. Every other
+        command is echoed back with a success status byte, like a get/set the firmware accepted.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.camera = None
+        self.responses = deque()
+
+    def open_path(self, path):
+        self.camera = self.backend.hid_paths[path]
+
+    def write(self, data) -> int:
+        command = list(data[1:])  # drop the report ID
+        if command[0] == 0x40:
+            major, minor, sdk, svn = self.camera.firmware
+            response = [0x40, major, minor, sdk >> 8, sdk & 0xFF, svn >> 8, svn & 0xFF]
+        elif command[0] == 0x41:
+            response = [0x41] + list(self.camera.unique_id)
+        else:
+            response = command[:6] + [0] * max(0, 6 - len(command)) + [1] + command[7:]
+        response = (response + [0] * 65)[:65]
+        if self.backend.hid_latency:
+            time.sleep(self.backend.hid_latency)
+        self.responses.append(response)
+        return len(data)
+
+    def read(self, length: int, timeout_ms: int = 0) -> list:
+        if self.responses:
+            return self.responses.popleft()[:length]
+        return []
+
+    def close(self):
+        self.camera = None
+
+
+class SyntheticBackend:
+    """
+        Hardware free backend: every camera is a SyntheticCamera, captures serve test patterns and HID commands
+        are answered in process. Select it with Camera_api.set_backend(SyntheticBackend()).
+
+        Parameters:
+            - cameras (list): SyntheticCamera instances, one per node. Defaults to a single camera.
+            - realtime (bool): Pace read() to the mode's FPS like a real camera, False delivers frames back to back.
+            - hid_latency (float): Seconds each HID write takes, to emulate USB round trips.
+            - cache_dir (str): Folder of the backend's capability cache. Defaults to a temporary folder of its own,
+              removed with the backend, so synthetic cameras never read or write the user's capability cache.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, cameras: list = None, realtime: bool = True, hid_latency: float = 0.0, cache_dir: str = None):
+        self.cameras = list(cameras or [SyntheticCamera()])
+        self.realtime = realtime
+        self.hid_latency = hid_latency
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix="synthetic_capabilities_")
+            weakref.finalize(self, shutil.rmtree, cache_dir, True)
+        self.capability_cache = CapabilityCache(cache_dir)
+        self.hid_paths = {}
+        for node, camera in enumerate(self.cameras):
+            self.hid_paths[("synthetic-hid:%d" % node).encode()] = camera
+
+    def open_capture(self, camera_node: int = None):
+        if camera_node is not None and not 0 <= camera_node < len(self.cameras):
+            capture = SyntheticCapture(self)
+            capture.opened = False
+            return capture
+        return SyntheticCapture(self, camera_node)
+
+    def hid_enumerate(self, vendor_id: int, product_id: int) -> list:
+        return [{"path": path, "vendor_id": vendor_id, "product_id": product_id}
+                for path, camera in self.hid_paths.items()
+                if int(camera.vid, 16) == vendor_id and int(camera.pid, 16) == product_id]
+
+    def hid_device(self):
+        return SyntheticHidDevice(self)
+
+
+_backend = OpenCVBackend()
+_backend_lock = Lock()
+
+
+def get_backend():
+    """
+        Returns:
+            The backend every capture and HID channel is opened through.
+    """
+    return _backend
+
+
+def set_backend(backend):
+    """
+        Usage:
+            Replaces the process wide backend. Use Camera_api.set_backend(), which also resets the device registry.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import tempfile
+import time
+from threading import Lock
+
+CACHE_SCHEMA_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get(
+    "CAMERA_CAPABILITY_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "camera_capabilities"))
+
+
+class CapabilityCache:
+    """
+        On-disk cache of camera capabilities (formats with resolution and FPS, UVC ranges and defaults).
+
+        The capabilities of a camera model never change for a given firmware, so an entry is keyed by VID, PID
+        and firmware version and stays valid until the firmware changes. Every entry is one JSON file; it is
+        checked against the schema and its key when loaded and simply ignored (and probed again) if it does not
+        match. Loaded entries are also kept in memory for the lifetime of the process.
+
+        Camera_api.get_capabilities() answers from this cache, so the scripts listing a camera's resolutions
+        only open the video device the first time a model/firmware is seen.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(vid: str, pid: str, firmware: str) -> tuple:
+        return str(vid).lower(), str(pid).lower(), str(firmware)
+
+    def _path(self, key: tuple) -> str:
+        file_name = re.sub(r"[^0-9A-Za-z.]+", "-", "_".join(key)) + ".json"
+        return os.path.join(self.cache_dir, file_name)
+
+    @staticmethod
+    def validate(entry, key: tuple) -> bool:
+        """
+            Returns:
+                bool: True if entry is a well formed capability entry for key.
+        """
+        try:
+            if entry["schema"] != CACHE_SCHEMA_VERSION:
+                return False
+            if (entry["vid"], entry["pid"], entry["firmware"]) != key:
+                return False
+            for fmt, width, height, fps in entry["formats"]:
+                if not isinstance(fmt, str) or not all(isinstance(v, (int, float)) for v in (width, height, fps)):
+                    return False
+            for name, values in entry["uvc"].items():
+                if not isinstance(name, str) or len(values) != 7:
+                    return False
+            return isinstance(entry["name"], str)
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def load(self, vid: str, pid: str, firmware: str):
+        """
+            Returns:
+                dict: The cached capabilities of the camera, or None if there is no valid entry.
+        """
+        key = self._key(vid, pid, firmware)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry
+            try:
+                with open(self._path(key)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if not self.validate(entry, key):
+                return None
+            entry["formats"] = [tuple(mode) for mode in entry["formats"]]
+            self._memory[key] = entry
+            return entry
+
+    def store(self, vid: str, pid: str, firmware: str, name: str, formats: list, uvc: dict) -> dict:
+        """
+            Usage:
+                Writes the capabilities of a camera to the cache. The file is replaced atomically so concurrent
+                scripts never read a partial entry.
+
+            Returns:
+                dict: The stored entry.
+        """
+        key = self._key(vid, pid, firmware)
+        entry = {
+            "schema": CACHE_SCHEMA_VERSION,
+            "vid": key[0],
+            "pid": key[1],
+            "firmware": key[2],
+            "name": str(name),
+            "created": time.time(),
+            "formats": [list(mode) for mode in formats],
+            "uvc": {str(parameter): list(values) for parameter, values in uvc.items()},
+        }
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    json.dump(entry, f)
+                os.replace(temp_path, self._path(key))
+            except OSError as e:
+                print(f"Unable to write the capability cache: {e}")
+            entry["formats"] = [tuple(mode) for mode in formats]
+            self._memory[key] = entry
+        return entry
+
+    def invalidate(self, vid: str, pid: str, firmware: str):
+        """
+            Usage:
+                Removes the cached capabilities of a camera, the next lookup probes it again.
+        """
+        key = self._key(vid, pid, firmware)
+        with self._lock:
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+capability_cache = CapabilityCache()
@@ -0,0 +1,138 @@
+import glob
+import time
+from collections import namedtuple
+from threading import Lock
+
+from camera_backends import get_backend
+
+DeviceInfo = namedtuple("DeviceInfo", ["node", "name", "vid", "pid", "path"])
+
+
+class DeviceRegistry:
+    """
+        Shared registry of the connected camera devices.
+
+        The devices are enumerated once through the camera backend (OpenCV by default) and indexed by node, name,
+        VID/PID and device path so lookups are plain dictionary accesses. The cached enumeration is only dropped
+        when a /dev/video* node appears or disappears (hotplug) or when invalidate() is called explicitly. On hosts
+        without /dev/video* nodes (Windows) only the explicit invalidation applies.
+    """
+
+    def __init__(self, hotplug_check_interval: float = 0.5):
+        self.hotplug_check_interval = hotplug_check_interval
+        self._lock = Lock()
+        self._video_nodes = None
+        self._last_hotplug_check = 0.0
+        self._valid = False
+        self.device_count = 0
+        self.by_node = {}
+        self.by_name = {}
+        self.by_vid_pid = {}
+        self.by_path = {}
+
+    @staticmethod
+    def _scan_video_nodes():
+        nodes = glob.glob("/dev/video*")
+        return frozenset(nodes) if nodes else None
+
+    def invalidate(self):
+        """
+            Usage:
+                Drops the cached enumeration, the next lookup enumerates the devices again.
+        """
+        with self._lock:
+            self._valid = False
+
+    def _enumerate(self):
+        by_node = {}
+        by_name = {}
+        by_vid_pid = {}
+        by_path = {}
+        cap = get_backend().open_capture()
+        try:
+            device_count = cap.getDevices()[1]
+            for node in range(device_count):
+                info = cap.getDeviceInfo(node)
+                device = DeviceInfo(node, str(info[1]), str(info[2]), str(info[3]), str(info[4]))
+                by_node[node] = device
+                # Identical camera models share a name and VID/PID, so these keep every matching node
+                by_name.setdefault(device.name, []).append(device)
+                by_vid_pid.setdefault((device.vid.lower(), device.pid.lower()), []).append(device)
+                if device.path:
+                    by_path[device.path] = device
+        finally:
+            cap.release()
+        self.device_count = device_count
+        self.by_node = by_node
+        self.by_name = by_name
+        self.by_vid_pid = by_vid_pid
+        self.by_path = by_path
+        self._valid = True
+
+    def refresh(self):
+        """
+            Usage:
+                Makes sure the cached enumeration is current, enumerating again only after a hotplug event.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._valid and now - self._last_hotplug_check < self.hotplug_check_interval:
+                return
+            self._last_hotplug_check = now
+            video_nodes = self._scan_video_nodes()
+            if video_nodes != self._video_nodes:
+                self._video_nodes = video_nodes
+                self._valid = False
+            if not self._valid:
+                self._enumerate()
+
+    def get_devices(self) -> dict:
+        """
+            Returns:
+                dict: Device node mapped to its DeviceInfo.
+        """
+        self.refresh()
+        return dict(self.by_node)
+
+    def get_device(self, camera_node: int):
+        """
+            Returns:
+                DeviceInfo: Device of the given node, or None if there is no such node.
+        """
+        self.refresh()
+        return self.by_node.get(camera_node)
+
+    def find_by_name(self, camera_name: str) -> list:
+        """
+            Returns:
+                list: Devices whose name matches camera_name, in node order.
+        """
+        self.refresh()
+        return list(self.by_name.get(camera_name, ()))
+
+    def find_by_vid_pid(self, vid: str, pid: str) -> list:
+        """
+            Returns:
+                list: Devices with the given VID and PID (hex strings), in node order.
+        """
+        self.refresh()
+        return list(self.by_vid_pid.get((vid.lower(), pid.lower()), ()))
+
+    def find_by_path(self, device_path: str):
+        """
+            Returns:
+                DeviceInfo: Device with the given device path, or None if it is not connected.
+        """
+        self.refresh()
+        return self.by_path.get(device_path)
+
+    def get_index(self, camera_name: str) -> int:
+        """
+            Returns:
+                int: Node of the first camera matching camera_name, otherwise -1.
+        """
+        devices = self.find_by_name(camera_name)
+        return devices[0].node if devices else -1
+
+
+device_registry = DeviceRegistry()
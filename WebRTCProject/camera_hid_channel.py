@@ -0,0 +1,240 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+
+from camera_backends import get_backend
+
+
+class HidChannel:
+    """
+        Persistent HID channel to one e-con camera.
+
+        The HID interface is enumerated and opened once and then reused for every command until close() is
+        called, so a sweep of many commands pays neither enumeration nor open latency per command.
+
+        e-con firmware echoes the leading command bytes at the start of every response, which is used to match
+        responses to their requests when several commands are in flight (see transact_many()).
+
+        A channel created with a HID path always talks to that interface; without one it opens the first interface
+        with the VID/PID. Use shared_hid_channel() to get the one shared channel of a camera's HID interface.
+    """
+
+    REPORT_ID = 0x00
+    REPORT_LENGTH = 65
+
+    def __init__(self, vendor_id: int, product_id: int, path=None):
+        self.vendor_id = vendor_id
+        self.product_id = product_id
+        self.path = path
+        self.device = None
+        self.lock = Lock()
+
+    def is_open(self) -> bool:
+        return self.device is not None
+
+    def open(self):
+        """
+            Usage:
+                Opens the HID interface of the camera. Does nothing if the channel is already open.
+
+            Raises:
+                IOError: If no HID interface with the channel's VID/PID (or path) is connected.
+        """
+        with self.lock:
+            self._open()
+
+    def _open(self):
+        if self.device is not None:
+            return
+        backend = get_backend()
+        path = self.path
+        if path is None:
+            devices = backend.hid_enumerate(self.vendor_id, self.product_id)
+            if not devices:
+                raise IOError("HID device %04x:%04x not found" % (self.vendor_id, self.product_id))
+            path = devices[0]["path"]
+        device = backend.hid_device()
+        try:
+            device.open_path(path)
+        except Exception as e:
+            raise IOError("HID device %04x:%04x at %r cannot be opened: %s"
+                          % (self.vendor_id, self.product_id, path, e))
+        self.path = path
+        self.device = device
+
+    def close(self):
+        """
+            Usage:
+                Closes the HID interface. The channel can be reopened by the next transaction.
+        """
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.device is not None:
+            try:
+                self.device.close()
+            except Exception:
+                pass
+            self.device = None
+
+    def transact(self, command: list, timeout_ms: int = 1000, match_length: int = 1) -> list:
+        """
+            Usage:
+                Sends a single HID command and waits for its response.
+
+            Parameters:
+                - command (list): HID command bytes without the report ID.
+                - timeout_ms (int): Time to wait for the response in milliseconds.
+                - match_length (int): Number of leading command bytes the response must echo.
+
+            Returns:
+                list: The response bytes, or an empty list if no matching response arrived in time.
+        """
+        return self.transact_many([command], timeout_ms, window=1, match_length=match_length)[0]
+
+    def transact_many(self, commands: list, timeout_ms: int = 1000, window: int = 1, match_length: int = 1) -> list:
+        """
+            Usage:
+                Runs a list of HID commands over the open channel.
+
+                Up to `window` commands are written before their responses are read, so the USB round trips of
+                consecutive commands overlap. Each response is matched to the oldest in-flight command whose
+                leading `match_length` bytes it echoes; responses that match nothing (late answers to commands
+                that already timed out) are dropped.
+
+            Parameters:
+                - commands (list): List of HID commands, each a list of bytes without the report ID.
+                - timeout_ms (int): Per command timeout in milliseconds, counted from the moment it was written.
+                - window (int): Maximum number of commands in flight. Use 1 for devices that answer strictly
+                  one command at a time.
+                - match_length (int): Number of leading command bytes a response must echo. 0 accepts the
+                  responses in arrival order.
+
+            Returns:
+                list: One response per command in request order, an empty list for every command that timed out.
+
+            Raises:
+                IOError: If the HID interface cannot be opened or the device stops responding to writes.
+        """
+        responses = [[] for _ in commands]
+        window = max(1, window)
+        with self.lock:
+            self._open()
+            try:
+                pending = deque()
+                next_command = 0
+                while next_command < len(commands) or pending:
+                    while next_command < len(commands) and len(pending) < window:
+                        command = list(commands[next_command])
+                        if self.device.write([self.REPORT_ID] + command) < 0:
+                            raise IOError("HID write failed")
+                        pending.append((next_command, command[:match_length],
+                                        time.monotonic() + timeout_ms / 1000.0))
+                        next_command += 1
+
+                    now = time.monotonic()
+                    while pending and pending[0][2] <= now:
+                        pending.popleft()  # timed out, its response stays empty
+                    if not pending:
+                        continue
+
+                    wait_ms = max(1, int((pending[0][2] - now) * 1000))
+                    response = self.device.read(self.REPORT_LENGTH, wait_ms)
+                    if not response:
+                        continue
+                    for position, (index, prefix, deadline) in enumerate(pending):
+                        if list(response[:len(prefix)]) == prefix:
+                            responses[index] = list(response)
+                            del pending[position]
+                            break
+            except Exception:
+                # A failed transfer usually means the camera went away, reopen on the next transaction
+                self._close()
+                raise
+        return responses
+
+
+def _usb_device_dir(path):
+    """
+        Returns:
+            str: sysfs folder of the USB device a /dev/video* or /dev/hidraw* node belongs to, None if it cannot be
+                 resolved (other platforms, other hidapi backends).
+    """
+    if isinstance(path, bytes):
+        path = path.decode(errors="replace")
+    name = os.path.basename(str(path))
+    for class_name in ("video4linux", "hidraw"):
+        link = os.path.join("/sys/class", class_name, name, "device")
+        if os.path.exists(link):
+            directory = os.path.realpath(link)
+            while directory != os.path.dirname(directory):
+                if os.path.exists(os.path.join(directory, "idVendor")):
+                    return directory
+                directory = os.path.dirname(directory)
+    return None
+
+
+def resolve_hid_path(vendor_id: int, product_id: int, device_path: str = None, ordinal: int = 0):
+    """
+        Usage:
+            Finds the HID interface of one camera when several cameras share the VID/PID. The interface on the same
+            USB device as the camera's video node (device_path) is preferred; where that cannot be resolved, the
+            interfaces are assumed to enumerate in the same order as the video devices and the ordinal-th one is
+            taken.
+
+        Parameters:
+            - vendor_id, product_id (int): VID and PID of the camera.
+            - device_path (str): Device path of the camera's video node, see Camera_api.get_device_path().
+            - ordinal (int): Position of the camera among the connected cameras with this VID/PID.
+
+        Returns:
+            The HID path of the camera.
+
+        Raises:
+            IOError: If no HID interface with the VID/PID is connected.
+    """
+    devices = get_backend().hid_enumerate(vendor_id, product_id)
+    if not devices:
+        raise IOError("HID device %04x:%04x not found" % (vendor_id, product_id))
+    usb_device = _usb_device_dir(device_path) if device_path else None
+    if usb_device is not None:
+        for device in devices:
+            if _usb_device_dir(device["path"]) == usb_device:
+                return device["path"]
+    return devices[min(max(ordinal, 0), len(devices) - 1)]["path"]
+
+
+_channels = {}
+_channels_lock = Lock()
+
+
+def shared_hid_channel(vendor_id: int, product_id: int, device_path: str = None, ordinal: int = 0) -> HidChannel:
+    """
+        Usage:
+            Returns the channel of a camera's HID interface (see resolve_hid_path()). Every caller gets the same
+            channel for the same interface, so all commands to one camera are serialised by one lock.
+
+        Raises:
+            IOError: If no HID interface with the VID/PID is connected.
+    """
+    path = resolve_hid_path(vendor_id, product_id, device_path, ordinal)
+    with _channels_lock:
+        channel = _channels.get(path)
+        if channel is None:
+            channel = HidChannel(vendor_id, product_id, path)
+            _channels[path] = channel
+        return channel
+
+
+def close_hid_channels():
+    """
+        Usage:
+            Closes and forgets every shared channel, e.g. when the camera backend is replaced.
+    """
+    with _channels_lock:
+        channels = list(_channels.values())
+        _channels.clear()
+    for channel in channels:
+        channel.close()
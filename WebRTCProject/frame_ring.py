@@ -0,0 +1,295 @@
+import time
+from collections import namedtuple
+from threading import Condition
+
+import numpy as np
+
+FrameItem = namedtuple("FrameItem", ["seq", "timestamp", "frame"])
+# Private, read-only copy of a published frame, safe to keep after the ring slot is reused
+FrameSnapshot = namedtuple("FrameSnapshot", ["seq", "timestamp", "frame"])
+
+
+class FrameSlot:
+    __slots__ = ("seq", "timestamp", "frame")
+
+    def __init__(self):
+        self.seq = 0
+        self.timestamp = 0.0
+        self.frame = None
+
+
+class FrameSubscriber:
+    """
+        Consumer attached to a FrameRing.
+
+        LATEST consumers always get the newest frame and skip whatever they were too slow for, the skipped frames
+        are counted in `dropped`. LOSSLESS consumers get every frame in order; the ring's producer waits for them
+        when they fall a full ring behind (backpressure), so they never drop.
+
+        A frame returned by get() lives in a ring slot and stays untouched until the next get() or close() call;
+        copy it to keep it longer. LOSSLESS consumers are protected by the backpressure, the buffer a LATEST
+        consumer holds is pinned: a producer wrapping around to its slot gives the slot a new buffer instead.
+    """
+
+    LATEST = "latest"
+    LOSSLESS = "lossless"
+
+    def __init__(self, ring, name: str, policy: str):
+        if policy not in (self.LATEST, self.LOSSLESS):
+            raise ValueError("Unknown drop policy: %s" % policy)
+        self.ring = ring
+        self.name = name
+        self.policy = policy
+        self.last_seq = ring.latest_seq
+        self.next_seq = ring.latest_seq + 1
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self.held = None  # buffer of the frame last returned by get(), pinned until the next call
+
+    def get(self, timeout: float = None):
+        """
+            Usage:
+                Waits for the next frame according to the subscriber's policy.
+
+            Parameters:
+                - timeout (float): Maximum time to wait in seconds, None waits until a frame arrives.
+
+            Returns:
+                FrameItem: (seq, timestamp, frame), or None on timeout or when the ring is closed.
+        """
+        ring = self.ring
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with ring.condition:
+            self.held = None
+            while True:
+                if self.closed:
+                    return None
+                latest = ring.latest_seq
+                if self.policy == self.LATEST:
+                    if latest > self.last_seq:
+                        self.dropped += latest - self.last_seq - 1
+                        seq = latest
+                        break
+                elif self.next_seq <= latest:
+                    seq = self.next_seq
+                    break
+                if ring.closed:
+                    return None
+                if deadline is None:
+                    ring.condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    ring.condition.wait(remaining)
+            self.last_seq = seq
+            self.next_seq = seq + 1
+            self.delivered += 1
+            slot = ring.slots[seq % ring.size]
+            item = FrameItem(slot.seq, slot.timestamp, slot.frame)
+            self.held = slot.frame
+            if self.policy == self.LOSSLESS:
+                ring.condition.notify_all()  # a producer may be waiting for this subscriber
+        return item
+
+    def close(self):
+        """
+            Usage:
+                Detaches the subscriber from its ring, a producer waiting on it is released.
+        """
+        self.ring.unsubscribe(self)
+
+    def get_stats(self) -> dict:
+        return {"policy": self.policy, "delivered": self.delivered, "dropped": self.dropped,
+                "lag": max(0, self.ring.latest_seq - self.last_seq)}
+
+
+class FrameRing:
+    """
+        Fixed-size ring of preallocated frame buffers shared by one producer and any number of subscribers.
+
+        The producer copies every frame into the next slot and stamps it with a monotonically increasing sequence
+        number (starting at 1) and a capture timestamp. Slot buffers are allocated on the first frame and only
+        reallocated when the frame shape or dtype changes. With reserve()/commit() the producer writes straight
+        into the slot buffers, so the ring doubles as the producer's buffer pool and a steady stream allocates
+        nothing.
+    """
+
+    def __init__(self, size: int = 4, start_seq: int = 0):
+        if size < 2:
+            raise ValueError("A frame ring needs at least 2 slots")
+        self.size = size
+        self.slots = [FrameSlot() for _ in range(size)]
+        self.condition = Condition()
+        self.subscribers = []
+        self.closed_stats = {}  # statistics of detached subscribers, kept for the end of stream report
+        self.latest_seq = start_seq  # a new ring can continue the numbering of the one it replaces
+        self.reserved = None  # slot handed out by reserve() and not committed yet
+        self.closed = False
+
+    def subscribe(self, name: str, policy: str = FrameSubscriber.LATEST) -> FrameSubscriber:
+        """
+            Usage:
+                Attaches a new consumer. It receives the frames published after this call.
+
+            Parameters:
+                - name (str): Consumer name used in the statistics.
+                - policy (str): FrameSubscriber.LATEST or FrameSubscriber.LOSSLESS.
+
+            Returns:
+                FrameSubscriber: The new subscriber.
+        """
+        with self.condition:
+            subscriber = FrameSubscriber(self, name, policy)
+            self.subscribers.append(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: FrameSubscriber):
+        with self.condition:
+            subscriber.closed = True
+            subscriber.held = None
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+                self.closed_stats[subscriber.name] = subscriber.get_stats()
+            self.condition.notify_all()
+
+    def _blocked_by_lossless(self, seq: int) -> bool:
+        # Writing seq overwrites seq - size, which a lossless subscriber may still hold or not have read yet
+        overwritten = seq - self.size
+        for subscriber in self.subscribers:
+            if subscriber.policy == FrameSubscriber.LOSSLESS and overwritten >= subscriber.next_seq - 1:
+                return True
+        return False
+
+    def reserve(self, stop_event=None):
+        """
+            Usage:
+                Hands the producer the slot the next frame goes into, so it can capture or convert straight into
+                the slot's buffer (slot.frame, None until the slot received its first frame) and then commit()
+                it, without the copy publish() makes. Blocks while a LOSSLESS subscriber still needs the slot. If a
+                LATEST subscriber still holds the slot's buffer, the slot gets a new one and the subscriber keeps
+                the old. Calling it again before commit() returns the same slot.
+
+            Parameters:
+                - stop_event (threading.Event): Stops waiting for slow subscribers when set.
+
+            Returns:
+                FrameSlot: The slot to fill, or None if the ring was closed or stopped meanwhile.
+        """
+        with self.condition:
+            if self.reserved is not None:
+                return self.reserved
+            seq = self.latest_seq + 1
+            while self._blocked_by_lossless(seq):
+                if self.closed or (stop_event is not None and stop_event.is_set()):
+                    return None
+                self.condition.wait(0.1)
+            slot = self.slots[seq % self.size]
+            if slot.frame is not None and any(subscriber.held is slot.frame for subscriber in self.subscribers):
+                slot.frame = np.empty_like(slot.frame)
+            slot.seq = 0  # the slot is being written, readers look at latest_seq only
+            self.reserved = slot
+            return slot
+
+    def commit(self, slot: FrameSlot, frame, timestamp: float = None, adopt: bool = False) -> int:
+        """
+            Usage:
+                Publishes the frame of a slot obtained from reserve() and wakes the subscribers.
+
+            Parameters:
+                - slot (FrameSlot): The reserved slot.
+                - frame (numpy.ndarray): The frame. Nothing is copied when it is the slot's own buffer.
+                - timestamp (float): Capture time (time.monotonic()), defaults to now.
+                - adopt (bool): Make frame the slot's buffer instead of copying it, for freshly allocated arrays
+                  nobody else holds (e.g. a capture that could not reuse the buffer it was given).
+
+            Returns:
+                int: Sequence number of the published frame.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if frame is not slot.frame:
+            if adopt:
+                slot.frame = frame
+            else:
+                if slot.frame is None or slot.frame.shape != frame.shape or slot.frame.dtype != frame.dtype:
+                    slot.frame = np.empty_like(frame)
+                np.copyto(slot.frame, frame)
+
+        with self.condition:
+            seq = self.latest_seq + 1
+            slot.seq = seq
+            slot.timestamp = timestamp
+            self.latest_seq = seq
+            self.reserved = None
+            self.condition.notify_all()
+        return seq
+
+    def publish(self, frame, timestamp: float = None, stop_event=None) -> int:
+        """
+            Usage:
+                Copies a frame into the next slot and wakes the subscribers. Blocks while a LOSSLESS subscriber
+                still needs the slot that would be overwritten.
+
+            Parameters:
+                - frame (numpy.ndarray): Frame to publish.
+                - timestamp (float): Capture time (time.monotonic()), defaults to now.
+                - stop_event (threading.Event): Stops waiting for slow subscribers when set.
+
+            Returns:
+                int: Sequence number of the published frame, or 0 if the ring was closed or stopped meanwhile.
+        """
+        slot = self.reserve(stop_event)
+        if slot is None:
+            return 0
+        return self.commit(slot, frame, timestamp)
+
+    def wait_for_frame(self, after_seq: int = 0, after_timestamp: float = None, timeout: float = None):
+        """
+            Usage:
+                Blocks until the newest frame is newer than after_seq (and was captured after after_timestamp),
+                then returns a read-only copy of it.
+
+            Parameters:
+                - after_seq (int): Sequence number the frame must exceed.
+                - after_timestamp (float): time.monotonic() value the capture timestamp must exceed, None for any.
+                - timeout (float): Maximum time to wait in seconds, None waits until such a frame arrives.
+
+            Returns:
+                FrameSnapshot: (seq, timestamp, frame), or None on timeout or when the ring closed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                slot = self.slots[self.latest_seq % self.size]
+                if self.latest_seq > after_seq and slot.frame is not None and \
+                        (after_timestamp is None or slot.timestamp > after_timestamp):
+                    # The producer only writes the slot after latest_seq, so copying under the lock is safe
+                    frame = slot.frame.copy()
+                    frame.flags.writeable = False
+                    return FrameSnapshot(slot.seq, slot.timestamp, frame)
+                if self.closed:
+                    return None
+                if deadline is None:
+                    self.condition.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+
+    def close(self):
+        """
+            Usage:
+                Marks the end of the stream. Waiting subscribers return None once they consumed what is left.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get_stats(self) -> dict:
+        with self.condition:
+            stats = dict(self.closed_stats)
+            stats.update((subscriber.name, subscriber.get_stats()) for subscriber in self.subscribers)
+            return stats
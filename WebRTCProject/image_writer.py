@@ -0,0 +1,147 @@
+import atexit
+import queue
+from concurrent.futures import Future
+from threading import Lock, Thread
+
+import cv2
+import numpy as np
+
+# Encoder options per save format, passed to cv2.imencode as [flag, value, ...]
+DEFAULT_ENCODER_PARAMS = {
+    'jpg': [cv2.IMWRITE_JPEG_QUALITY, 95],
+    'png': [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    'bmp': [],
+}
+
+
+class ImageWriterPool:
+    """
+        Background image encoder/writer.
+
+        Frames are queued with submit() and encoded (cv2.imencode) and written by worker threads, so the caller
+        is not held up by a PNG or JPG encode. The queue is bounded: when the workers fall behind, submit()
+        blocks until a slot is free instead of letting queued frames eat up memory.
+
+        'raw' frames are written as they are, straight from the array's buffer through a memoryview.
+        The queued frame is not copied, so the caller must not modify it until the future completes.
+        Snapshots from Camera_api.wait_for_frame() are read-only copies and can be submitted directly.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 8, encoder_params: dict = None):
+        self.encoder_params = dict(DEFAULT_ENCODER_PARAMS)
+        if encoder_params:
+            self.encoder_params.update(encoder_params)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = []
+        self.closed = False
+        for i in range(workers):
+            worker = Thread(target=self._run, name="ImageWriter-" + str(i), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, path: str, frame, save_format: str, params: list = None, timeout: float = None) -> Future:
+        """
+            Usage:
+                Queues a frame to be encoded and written to path.
+
+            Parameters:
+                - path (str): Destination file path.
+                - frame (numpy.ndarray): Frame to write.
+                - save_format (str): 'jpg', 'png', 'bmp' or 'raw'.
+                - params (list): Encoder options overriding the pool's options for this format.
+                - timeout (float): Maximum time to wait for a free queue slot, None waits as long as needed.
+
+            Returns:
+                Future: Resolves to (path, bytes_written), or raises the error that stopped the write.
+
+            Raises:
+                RuntimeError: If the pool was shut down.
+                queue.Full: If no queue slot became free within timeout.
+        """
+        if self.closed:
+            raise RuntimeError("Image writer pool is shut down")
+        save_format = save_format.lower()
+        if params is None:
+            params = self.encoder_params.get(save_format, [])
+        future = Future()
+        self.queue.put((future, path, frame, save_format, params), timeout=timeout)
+        return future
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None:
+                    return
+                future, path, frame, save_format, params = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result((path, self.write(path, frame, save_format, params)))
+                except Exception as e:
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    def write(path: str, frame, save_format: str, params: list) -> int:
+        """
+            Usage:
+                Encodes and writes one frame on the calling thread.
+
+            Returns:
+                int: Number of bytes written.
+        """
+        if save_format == 'raw':
+            data = memoryview(np.ascontiguousarray(frame)).cast('B')
+        else:
+            ok, encoded = cv2.imencode('.' + save_format, frame, params)
+            if not ok:
+                raise IOError("Unable to encode the frame as " + save_format)
+            data = memoryview(encoded).cast('B')
+        with open(path, 'wb') as f:
+            return f.write(data)
+
+    def join(self):
+        """
+            Usage:
+                Waits until every queued frame has been written.
+        """
+        self.queue.join()
+
+    def shutdown(self, wait: bool = True):
+        """
+            Usage:
+                Stops the workers once the queued frames are written.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.workers:
+            self.queue.put(None)
+        if wait:
+            for worker in self.workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+_default_pool = None
+_default_pool_lock = Lock()
+
+
+def get_image_writer() -> ImageWriterPool:
+    """
+        Returns:
+            ImageWriterPool: Process wide writer pool, created on first use and flushed at interpreter exit.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool.closed:
+            _default_pool = ImageWriterPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
@@ -1,12 +1,10 @@
 import os
-import cv2
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.edge.options import Options as EdgeOptions
 import time
 from Camera_Test_Automation_API import Camera_api as ca
+from browser_pool import BrowserPool
+from camera_device_registry import device_registry
+from webrtc_frame_capture import format_timings, save_video_frame
 
 
 def get_valid_camera_index(camera_name):
@@ -16,29 +14,14 @@ def get_valid_camera_index(camera_name):
     Returns:
         int: The index of the camera if found, otherwise -1.
     """
-    import gc
-
-    cap = cv2.VideoCapture()
-    devices = cap.getDevices()
-    for i in range(devices[1]):
-        if camera_name == cap.getDeviceInfo(i)[1]:
-            cap.release()
-            del cap
-            gc.collect()
-            return i
-    cap.release()
-    del cap
-    gc.collect()
-    return -1
+    return device_registry.get_index(camera_name)
 
 
 def get_usb_camera_resolutions(camera_index):
-    print(ca.assign_camera(camera_index))
-    supported_resolutions = ca.get_supported_resolution(camera_index)
-    print(supported_resolutions)
-    unique_resolutions = sorted({(width, height) for _, width, height, _ in supported_resolutions[0]})
+    capabilities = ca.get_capabilities(camera_index)
+    print(capabilities)
+    unique_resolutions = sorted({(width, height) for _, width, height, _ in capabilities[0]['formats']})
     print("Unique resolutions supported by the camera:", unique_resolutions)
-    ca.release_camera(camera_index)
     return unique_resolutions
 
 
@@ -77,31 +60,22 @@ def is_stream_active(driver, screenshot_path=None):
     return False
 
 
-def capture_full_video_frame(driver, save_path):
+def capture_full_video_frame(driver, save_path, capture_format="rgba"):
     """
-    Captures the full video frame from the video element using a canvas.
+    Captures the full video frame from the video element at its native resolution.
+
+    The frame is transferred as raw pixels (or JPEG/WebP) instead of a PNG data URL, see
+    webrtc_frame_capture.capture_video_frame().
 
     Args:
         driver: Selenium WebDriver instance.
         save_path: Path to save the captured image.
-    """
-    script = """
-        const video = document.querySelector('video');
-        const canvas = document.createElement('canvas');
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        const ctx = canvas.getContext('2d');
-        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-        return canvas.toDataURL('image/png');
+        capture_format: "rgba", "jpeg", "webp" or "png". Raw RGBA frames are written by OpenCV in the format of
+            save_path's extension.
     """
     try:
-        base64_image = driver.execute_script(script)
-
-        # Decode the base64 image and save it to the specified path
-        import base64
-        with open(save_path, "wb") as file:
-            file.write(base64.b64decode(base64_image.split(",")[1]))
-        print(f"Full video frame saved to {save_path}")
+        timings = save_video_frame(driver, save_path, capture_format)
+        print(f"Full video frame saved to {save_path} ({format_timings(timings)})")
     except Exception as e:
         print(f"Failed to capture full video frame: {e}")
 
@@ -135,8 +109,16 @@ def stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration
         time.sleep(duration)
 
 
-def main(camera_name, duration):
-    global driver
+def main(camera_name, duration, pool=None):
+    """
+    Streams the camera in every matching resolution on Chrome, Edge and Firefox.
+
+    Args:
+        camera_name (str): Name of the camera to stream.
+        duration (int): Duration to stream in seconds for each resolution.
+        pool (BrowserPool): Pool of warm browsers to run on. Pass the same pool to several calls (cameras) to
+            start every browser only once.
+    """
     camera_index = get_valid_camera_index(camera_name)
     if camera_index == -1:
         print("No camera found.")
@@ -170,40 +152,21 @@ def main(camera_name, duration):
 
     webrtc_url = "https://webrtc.github.io/samples/src/content/getusermedia/resolution/"
 
-    # Testing on multiple browsers
-    browsers = [
-        ("Chrome", Options(), webdriver.Chrome),
-        ("Edge", EdgeOptions(), webdriver.Edge),
-        ("Firefox", FirefoxOptions(), webdriver.Firefox),
-    ]
-    # ("Chrome", Options(), webdriver.Chrome),
-    # ("Edge", EdgeOptions(), webdriver.Edge),
-    for browser_name, options, browser_driver in browsers:
-        if browser_name == "Chrome":
-            print(f"Testing on {browser_name}...")
-            options.add_argument("--use-fake-ui-for-media-stream")
-            options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
-            driver = browser_driver(options=options)
-        elif browser_name == "Edge":
-            print(f"Testing on {browser_name}...")
-            options.add_argument("--use-fake-ui-for-media-stream")
-            options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
-            driver = browser_driver(options=options)
-        elif browser_name == "Firefox":
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool()
+    try:
+        # Testing on multiple browsers
+        for browser_name in ("Chrome", "Edge", "Firefox"):
             print(f"Testing on {browser_name}...")
-            options = FirefoxOptions()
-            options.set_preference("dom.disable_open_during_load", False)
-            options.set_preference("media.navigator.permission.disabled", True)  # Automatically allow camera
-            options.set_preference("media.navigator.streams.fake", False)  # Use real camera instead of fake
-            driver = webdriver.Firefox(options=options)
-
-        try:
-            driver.get(webrtc_url)
-            for resolution in matched_resolutions:
-                print(f"Attempting to stream in resolution: {resolution}")
-                stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration)
-        finally:
-            driver.quit()
+            with pool.session(browser_name, webrtc_url) as driver:
+                for resolution in matched_resolutions:
+                    print(f"Attempting to stream in resolution: {resolution}")
+                    stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration)
+    finally:
+        pool.print_stats()
+        if own_pool:
+            pool.close()
 
 
 if __name__ == "__main__":
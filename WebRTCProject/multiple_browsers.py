@@ -6,6 +6,9 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 import time
 from Camera_Test_Automation_API import Camera_api as ca
+from camera_device_registry import device_registry
+from webrtc_frame_capture import format_timings, save_video_frame
+from webrtc_stream_readiness import STREAM_READY_TIMEOUT, wait_for_stream
 from selenium.webdriver.support.ui import WebDriverWait
 
 
@@ -16,30 +19,14 @@ def get_valid_camera_index(camera_name):
     Returns:
         int: The index of the camera if found, otherwise -1.
     """
-    import cv2 as cv
-    import gc
-
-    cap = cv.VideoCapture()
-    devices = cap.getDevices()
-    for i in range(devices[1]):
-        if camera_name == cap.getDeviceInfo(i)[1]:
-            cap.release()
-            del cap
-            gc.collect()
-            return i
-    cap.release()
-    del cap
-    gc.collect()
-    return -1
+    return device_registry.get_index(camera_name)
 
 
 def get_usb_camera_resolutions(camera_index):
-    print(ca.assign_camera(camera_index))
-    supported_resolutions = ca.get_supported_resolution(camera_index)
-    print(supported_resolutions)
-    unique_resolutions = sorted({(width, height) for _, width, height, _ in supported_resolutions[0]})
+    capabilities = ca.get_capabilities(camera_index)
+    print(capabilities)
+    unique_resolutions = sorted({(width, height) for _, width, height, _ in capabilities[0]['formats']})
     print("Unique resolutions supported by the camera:", unique_resolutions)
-    ca.release_camera(camera_index)
     return unique_resolutions
 
 
@@ -56,58 +43,49 @@ def log_web_rtc_errors(driver):
         print(f"WebRTC Log: {entry['message']}")
 
 
-def is_stream_active(driver, screenshot_path=None):
+def is_stream_active(driver, screenshot_path=None, resolution=None, button=None, timeout=STREAM_READY_TIMEOUT):
     """
-    Confirm that the stream is active on the WebRTC page by checking the video element.
-    If a screenshot path is provided, captures a screenshot of the video element.
+    Confirm that the stream is active on the WebRTC page: waits in the page for the video element to play at the
+    requested resolution (see webrtc_stream_readiness.wait_for_stream), with a timeout.
 
     Args:
         driver: Selenium WebDriver instance.
         screenshot_path (str): Path to save the screenshot. Optional.
+        resolution (tuple): (width, height) the video must play at, None for any size.
+        button: Button clicked once the page listens for the video events, e.g. the resolution button.
+        timeout (float): Seconds to wait for the stream.
 
     Returns:
         bool: True if the stream is active, otherwise False.
     """
     try:
-        video_element = driver.find_element(By.TAG_NAME, "video")
-        while True:
-
-            if video_element.is_displayed():
-                print("Stream is active.")
-
-                return True
-            else:
-                continue
+        readiness = wait_for_stream(driver, resolution, timeout, click=button)
+        if readiness["ready"]:
+            events = ", ".join(f"{event['type']} at {event['time_ms']:.0f} ms" for event in readiness["events"])
+            print(f"Stream is active at {readiness['width']}x{readiness['height']} (events: {events}).")
+            return True
+        print(f"Stream check failed: {readiness['error']}")
     except Exception as e:
         print(f"Stream check failed: {e}")
     return False
 
 
-def capture_full_video_frame(driver, save_path):
+def capture_full_video_frame(driver, save_path, capture_format="rgba"):
     """
-    Captures the full video frame from the video element using a canvas.
+    Captures the full video frame from the video element at its native resolution.
+
+    The frame is transferred as raw pixels (or JPEG/WebP) instead of a PNG data URL, see
+    webrtc_frame_capture.capture_video_frame().
 
     Args:
         driver: Selenium WebDriver instance.
         save_path: Path to save the captured image.
-    """
-    script = """
-        const video = document.querySelector('video');
-        const canvas = document.createElement('canvas');
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        const ctx = canvas.getContext('2d');
-        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-        return canvas.toDataURL('image/png');
+        capture_format: "rgba", "jpeg", "webp" or "png". Raw RGBA frames are written by OpenCV in the format of
+            save_path's extension.
     """
     try:
-        base64_image = driver.execute_script(script)
-
-        # Decode the base64 image and save it to the specified path
-        import base64
-        with open(save_path, "wb") as file:
-            file.write(base64.b64decode(base64_image.split(",")[1]))
-        print(f"Full video frame saved to {save_path}")
+        timings = save_video_frame(driver, save_path, capture_format)
+        print(f"Full video frame saved to {save_path} ({format_timings(timings)})")
     except Exception as e:
         print(f"Failed to capture full video frame: {e}")
 
@@ -119,14 +97,12 @@ def stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration
     # Find and click the button matching the resolution
     for button in buttons:
         if button.text == button_label:
-            button.click()
-            time.sleep(1)
-
             if not os.path.exists("screenshots"):
                 os.makedirs("screenshots")
             screenshot_path = f"screenshots/stream_{resolution[0]}x{resolution[1]}.png"
 
-            if is_stream_active(driver, screenshot_path=screenshot_path):
+            # The button is clicked in the page, which then waits for the video to play at the new resolution
+            if is_stream_active(driver, screenshot_path=screenshot_path, resolution=resolution, button=button):
 
                 capture_full_video_frame(driver, screenshot_path)
                 print(f"Streaming successfully at resolution: {button_label}")
@@ -0,0 +1,254 @@
+import json
+import multiprocessing
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing.util import Finalize
+
+from browser_pool import BROWSERS, BrowserPool
+
+# One browser streaming one camera through a list of resolutions
+BrowserJob = namedtuple("BrowserJob", ["browser_name", "camera_name", "resolutions", "duration", "url"])
+
+
+class CameraArbiter:
+    """
+    Decides which worker processes may open a camera at the same time.
+
+    Cameras listed in shared_cameras can be opened by several browsers at once: a fake video source, or a camera
+    whose driver allows multiple opens. The value is the number of simultaneous opens it allows (None for no
+    limit). Every other camera is exclusive, one browser at a time. The locks are manager proxies, so the
+    arbiter can be handed to worker processes.
+    """
+
+    def __init__(self, manager, camera_names, shared_cameras=None):
+        shared_cameras = shared_cameras or {}
+        self.locks = {}
+        self.modes = {}
+        for camera_name in camera_names:
+            if camera_name in shared_cameras:
+                limit = shared_cameras[camera_name]
+                self.locks[camera_name] = manager.BoundedSemaphore(limit) if limit else None
+                self.modes[camera_name] = "shared"
+            else:
+                self.locks[camera_name] = manager.Lock()
+                self.modes[camera_name] = "exclusive"
+
+    def mode(self, camera_name):
+        return self.modes.get(camera_name, "shared")
+
+    @contextmanager
+    def hold(self, camera_name, timeout=None):
+        """
+        Holds the camera for the block. Yields the seconds spent waiting for it.
+
+        Raises:
+            TimeoutError: If the camera did not become free within timeout seconds.
+        """
+        lock = self.locks.get(camera_name)
+        start = time.perf_counter()
+        if lock is not None:
+            acquired = lock.acquire(True) if timeout is None else lock.acquire(True, timeout)
+            if not acquired:
+                raise TimeoutError(f"Camera {camera_name} stayed busy for {timeout} s")
+        try:
+            yield time.perf_counter() - start
+        finally:
+            if lock is not None:
+                lock.release()
+
+
+_worker_arbiter = None
+_worker_pool = None
+
+
+def _init_worker(arbiter, max_jobs):
+    global _worker_arbiter, _worker_pool
+    _worker_arbiter = arbiter
+    _worker_pool = BrowserPool(max_jobs=max_jobs)
+    # Worker processes skip atexit, a multiprocessing finalizer quits the warm browsers when the worker ends
+    Finalize(_worker_pool, _worker_pool.close, exitpriority=10)
+
+
+def run_job(job, camera_timeout=None):
+    """
+    Runs one job in a worker process: waits for the camera, takes a warm browser from the worker's pool, selects
+    the camera and streams every resolution of the job.
+
+    Returns:
+        dict: The job, its timings (camera wait, browser acquisition, total) and the per resolution results.
+    """
+    import webrtc_with_uplink_downlink as webrtc_test
+
+    result = {"browser": job.browser_name, "camera": job.camera_name, "worker": multiprocessing.current_process().name,
+              "camera_mode": _worker_arbiter.mode(job.camera_name), "resolutions": [], "error": None}
+    start = time.perf_counter()
+    result["started"] = time.time()
+    try:
+        with _worker_arbiter.hold(job.camera_name, camera_timeout) as waited:
+            result["camera_wait_seconds"] = waited
+            browser_start = time.perf_counter()
+            with _worker_pool.session(job.browser_name, job.url) as driver:
+                result["browser_seconds"] = time.perf_counter() - browser_start
+                webrtc_test.select_camera_from_dropdown(driver, job.camera_name)
+                for resolution in job.resolutions:
+                    result["resolutions"].append(webrtc_test.stream_camera_in_resolution(
+                        driver, tuple(resolution), webrtc_test.WEBRTC_RESOLUTIONS, job.duration, job.camera_name,
+                        job.browser_name))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    result["browser_pool"] = _worker_pool.get_stats()
+    return result
+
+
+def plan_jobs(camera_names, browser_choices, duration, url=None):
+    """
+    Builds the jobs of a run in the parent process: the matching resolutions of every camera are looked up once
+    (from the capability cache), then every browser gets one job per camera. Jobs are interleaved by camera so
+    workers starting together wait on different cameras.
+
+    Returns:
+        list: BrowserJob per browser and camera with at least one matching resolution.
+    """
+    import webrtc_with_uplink_downlink as webrtc_test
+
+    per_camera = []
+    for camera_name in camera_names:
+        camera_index = webrtc_test.get_valid_camera_index(camera_name)
+        if camera_index == -1:
+            print(f"No camera found for: {camera_name}")
+            continue
+        usb_resolutions, ret_value = webrtc_test.get_usb_camera_resolutions(camera_index)
+        if not ret_value:
+            print(f"Error fetching resolutions for {camera_name}: {usb_resolutions}")
+            continue
+        resolutions = webrtc_test.map_resolutions_to_webrtc(usb_resolutions, webrtc_test.WEBRTC_RESOLUTIONS)
+        if not resolutions:
+            print(f"No matching resolutions found between USB camera and WebRTC for: {camera_name}")
+            continue
+        per_camera.append([BrowserJob(browser_name, camera_name, resolutions, duration, url or webrtc_test.WEBRTC_URL)
+                           for browser_name in browser_choices if browser_name in BROWSERS])
+    jobs = []
+    for position in range(max((len(camera_jobs) for camera_jobs in per_camera), default=0)):
+        jobs.extend(camera_jobs[position] for camera_jobs in per_camera if position < len(camera_jobs))
+    return jobs
+
+
+def merge_results(results, wall_seconds):
+    """
+    Returns:
+        dict: One report for the whole run: wall time against the summed job time (the parallel speed-up),
+              per browser totals (resolutions streamed, frame stalls, failed jobs) and every job's result.
+    """
+    job_seconds = sum(result["seconds"] for result in results)
+    by_browser = {}
+    for result in results:
+        totals = by_browser.setdefault(result["browser"], {"jobs": 0, "failed_jobs": 0, "resolutions": 0,
+                                                           "streamed": 0, "stalls": 0, "seconds": 0.0,
+                                                           "camera_wait_seconds": 0.0})
+        totals["jobs"] += 1
+        totals["failed_jobs"] += 1 if result["error"] else 0
+        totals["resolutions"] += len(result["resolutions"])
+        totals["streamed"] += sum(1 for entry in result["resolutions"] if entry and entry["streamed"])
+        totals["stalls"] += sum(entry["frame_stats"]["stalls"] for entry in result["resolutions"]
+                                if entry and entry.get("frame_stats"))
+        totals["seconds"] += result["seconds"]
+        totals["camera_wait_seconds"] += result.get("camera_wait_seconds", 0.0)
+    return {
+        "wall_seconds": wall_seconds,
+        "job_seconds": job_seconds,
+        "speedup": job_seconds / wall_seconds if wall_seconds else 0.0,
+        "by_browser": by_browser,
+        "jobs": sorted(results, key=lambda result: result["started"]),
+    }
+
+
+class ParallelBrowserExecutor:
+    """
+    Runs browser jobs concurrently in worker processes, each with its own warm BrowserPool, while a
+    CameraArbiter keeps exclusive cameras to one browser at a time. With shared cameras (or one camera per
+    browser) a three browser run takes about as long as a single browser.
+    """
+
+    def __init__(self, max_workers=3, shared_cameras=None, max_jobs_per_browser=20, camera_timeout=None):
+        """
+        Args:
+            max_workers (int): Worker processes, i.e. browsers running at the same time.
+            shared_cameras (dict): Camera name to the number of browsers that may open it at once (None for no
+                limit). Cameras not listed are exclusive.
+            max_jobs_per_browser (int): Jobs a pooled browser runs before it is restarted.
+            camera_timeout (float): Seconds a job waits for its camera before it fails, None waits as long as needed.
+        """
+        self.max_workers = max_workers
+        self.shared_cameras = shared_cameras or {}
+        self.max_jobs_per_browser = max_jobs_per_browser
+        self.camera_timeout = camera_timeout
+
+    def run(self, jobs):
+        """
+        Runs the jobs and merges their results.
+
+        Returns:
+            dict: The merged report, see merge_results().
+        """
+        start = time.perf_counter()
+        results = []
+        with multiprocessing.Manager() as manager:
+            arbiter = CameraArbiter(manager, {job.camera_name for job in jobs}, self.shared_cameras)
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(arbiter, self.max_jobs_per_browser)) as executor:
+                futures = {executor.submit(run_job, job, self.camera_timeout): job for job in jobs}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        # The worker itself died, the job is reported as failed
+                        results.append({"browser": job.browser_name, "camera": job.camera_name, "worker": None,
+                                        "camera_mode": arbiter.mode(job.camera_name), "resolutions": [],
+                                        "error": f"{type(e).__name__}: {e}", "started": time.time(),
+                                        "seconds": 0.0})
+                    print(f"Finished {job.browser_name} on {job.camera_name}: {results[-1]['error'] or 'ok'}")
+        return merge_results(results, time.perf_counter() - start)
+
+
+def main(camera_names, duration, browser_choices, max_workers=None, shared_cameras=None, report_path=None):
+    """
+    Streams every camera on every browser with the browsers running in parallel and prints the merged report.
+
+    Args:
+        camera_names (list): Cameras to test.
+        duration (int): Streaming duration in seconds per resolution.
+        browser_choices (list): Browsers to test, e.g. ["Chrome", "Edge", "Firefox"].
+        max_workers (int): Browsers running at the same time, defaults to one per browser choice.
+        shared_cameras (dict): Cameras that several browsers may open at once, see ParallelBrowserExecutor.
+        report_path (str): JSON file the merged report is written to.
+
+    Returns:
+        dict: The merged report.
+    """
+    jobs = plan_jobs(camera_names, browser_choices, duration)
+    if not jobs:
+        print("Nothing to run.")
+        return None
+    executor = ParallelBrowserExecutor(max_workers or len(browser_choices), shared_cameras)
+    report = executor.run(jobs)
+    print(f"{len(jobs)} jobs in {report['wall_seconds']:.1f} s "
+          f"({report['job_seconds']:.1f} s of job time, x{report['speedup']:.2f})")
+    for browser_name, totals in report["by_browser"].items():
+        print(f"{browser_name}: {totals['streamed']}/{totals['resolutions']} resolutions streamed, "
+              f"{totals['stalls']} stalls, {totals['failed_jobs']} failed jobs, "
+              f"{totals['camera_wait_seconds']:.1f} s waiting for cameras")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return report
+
+
+if __name__ == "__main__":
+    camera_names = ["See3CAM_CU27"]
+    duration = 10
+    browser_choices = ["Chrome", "Edge", "Firefox"]
+    main(camera_names, duration, browser_choices, report_path="parallel_browser_report.json")
@@ -0,0 +1,303 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+from threading import Event, Lock, Thread
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameSubscriber
+
+FILE_MAGIC = b"RAWRING1"
+# magic, version, slot count, slot size, frame header size, frames written
+FILE_HEADER = struct.Struct("<8sIIQIQ")
+FILE_HEADER_SIZE = 4096
+# record number, ring seq, timestamp, fourcc, dtype, height, width, channels, row stride, payload bytes
+FRAME_HEADER = struct.Struct("<QQd4s4sIIIIQ")
+FRAME_HEADER_SIZE = 64
+FILE_VERSION = 1
+PAGE_SIZE = mmap.ALLOCATIONGRANULARITY
+
+# Side index entry of every slot, a small file that is searched instead of paging through the recording
+INDEX_DTYPE = np.dtype([("record", "<u8"), ("seq", "<u8"), ("timestamp", "<f8")])
+
+RawFrame = namedtuple("RawFrame", ["record", "seq", "timestamp", "fourcc", "frame"])
+
+
+def _slot_size(nbytes: int) -> int:
+    size = FRAME_HEADER_SIZE + nbytes
+    return (size + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+class RawRecorder:
+    """
+        Continuous recording of the native sensor buffers of a stream into a memory-mapped ring file.
+
+        The file is allocated once, on the first frame, as a fixed number of equally sized slots (each a frame
+        header and the frame bytes), so frame n always lives in slot n % slot_count and the recorder never
+        allocates or grows anything while recording. When the file is full the oldest frames are overwritten.
+        Every frame is also entered in a side index (<path>.idx: record, seq, timestamp per slot) used by
+        RawRecording for random access and time range lookups.
+
+        The recorder is a LOSSLESS subscriber of the session's raw ring, so it records every captured frame;
+        a disk that cannot keep up slows the capture down instead of losing frames. start() returns once the file
+        is allocated, or raises the error that prevented it.
+    """
+
+    def __init__(self, path: str, size_bytes: int, fourcc: str = ""):
+        self.path = path
+        self.size_bytes = size_bytes
+        self.fourcc = fourcc
+        self.slot_count = 0
+        self.slot_size = 0
+        self.frames_written = 0
+        self.frames_skipped = 0  # frames larger than a slot, after a format change
+        self.file = None
+        self.map = None
+        self.index = None
+        self.subscriber = None
+        self.thread = None
+        self.error = None
+        self.allocated = Event()  # set once the file exists, or when the recording failed before that
+        self.lock = Lock()
+
+    def _allocate(self, frame):
+        self.slot_size = _slot_size(frame.nbytes)
+        self.slot_count = (self.size_bytes - FILE_HEADER_SIZE) // self.slot_size
+        if self.slot_count < 1:
+            raise ValueError("The recording must hold at least one %d byte frame" % frame.nbytes)
+        self.file = open(self.path, "w+b")
+        try:
+            self.file.truncate(FILE_HEADER_SIZE + self.slot_count * self.slot_size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+            self.index = np.lib.format.open_memmap(self.path + ".idx", mode="w+", dtype=INDEX_DTYPE,
+                                                   shape=(self.slot_count,))
+        except Exception:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            self.file.close()
+            self.file = None
+            raise
+        self._write_file_header()
+
+    def _write_file_header(self):
+        FILE_HEADER.pack_into(self.map, 0, FILE_MAGIC, FILE_VERSION, self.slot_count, self.slot_size,
+                              FRAME_HEADER_SIZE, self.frames_written)
+
+    def write(self, seq: int, timestamp: float, frame):
+        """
+            Usage:
+                Records one frame into the next slot. The frame is copied once, straight into the mapped file.
+        """
+        with self.lock:
+            self._write(seq, timestamp, frame)
+
+    def _write(self, seq: int, timestamp: float, frame):
+        if self.map is None:
+            self._allocate(frame)
+            self.allocated.set()
+        if FRAME_HEADER_SIZE + frame.nbytes > self.slot_size:
+            self.frames_skipped += 1
+            return
+        record = self.frames_written
+        offset = FILE_HEADER_SIZE + (record % self.slot_count) * self.slot_size
+        payload = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.map, offset=offset + FRAME_HEADER_SIZE)
+        np.copyto(payload, frame)
+        height, width = frame.shape[0], frame.shape[1]
+        channels = frame.shape[2] if frame.ndim > 2 else 0
+        FRAME_HEADER.pack_into(self.map, offset, record, seq, timestamp, self.fourcc.encode()[:4],
+                               frame.dtype.str.encode(), height, width, channels, payload.strides[0], frame.nbytes)
+        self.index[record % self.slot_count] = (record, seq, timestamp)
+        self.frames_written = record + 1
+        # The count is updated last, a reader never sees a frame before it is complete
+        struct.pack_into("<Q", self.map, FILE_HEADER.size - 8, self.frames_written)
+
+    def start(self, raw_ring, stop_event, timeout: float = 5):
+        """
+            Usage:
+                Subscribes to the raw ring and records on a background thread until the stream ends or stop()
+                is called. The file is allocated with the first frame, which is waited for.
+
+            Parameters:
+                - raw_ring (FrameRing): Raw ring of the stream.
+                - stop_event (threading.Event): Stop event of the stream.
+                - timeout (float): Seconds to wait for the first frame.
+
+            Raises:
+                Exception: The error that stopped the recording before its file was allocated (OSError for a
+                           full disk or an unusable path, ValueError if the size cannot hold a frame).
+                TimeoutError: If no frame arrived in time, the recording is stopped.
+        """
+        self.subscriber = raw_ring.subscribe("raw_recorder", FrameSubscriber.LOSSLESS)
+        self.thread = Thread(target=self._run, args=(stop_event,), name="RawRecorder", daemon=True)
+        self.thread.start()
+        if not self.allocated.wait(timeout):
+            self.stop()
+            raise TimeoutError("No frame to record arrived within %s seconds" % timeout)
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+        if self.frames_written == 0 and not self.thread.is_alive():
+            raise IOError("The stream ended before a frame was recorded")
+
+    def _run(self, stop_event):
+        try:
+            while True:
+                item = self.subscriber.get(timeout=0.5)
+                if item is None:
+                    if self.subscriber.closed or self.subscriber.ring.closed or stop_event.is_set():
+                        break
+                    continue
+                self.write(item.seq, item.timestamp, item.frame)
+        except Exception as e:
+            self.error = e
+            print(f"Raw recording stopped: {e}")
+        finally:
+            self.subscriber.close()
+            self.close()
+            self.allocated.set()  # wakes start() if the recording ended before its file was allocated
+
+    def stop(self, timeout: float = None):
+        """
+            Usage:
+                Stops recording and closes the file.
+        """
+        if self.subscriber is not None:
+            self.subscriber.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self._write_file_header()
+                self.map.flush()
+                self.map.close()
+                self.map = None
+                self.index.flush()
+                self.index = None
+                self.file.close()
+                self.file = None
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"path": self.path, "frames_written": self.frames_written, "frames_skipped": self.frames_skipped,
+                    "slot_count": self.slot_count, "slot_size": self.slot_size,
+                    "recording": self.thread is not None and self.thread.is_alive(), "error": str(self.error or "")}
+
+
+class RawRecording:
+    """
+        Read access to a file written by RawRecorder. Frames are returned as read-only views into the mapped file,
+        nothing is read from disk until the frame's pages are touched.
+
+        Records are numbered from 0 in capture order; only the last slot_count of them are still in the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_count, self.slot_size, header_size, self.frames_written = \
+            FILE_HEADER.unpack_from(self.map, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION or header_size != FRAME_HEADER_SIZE:
+            self.close()
+            raise ValueError("%s is not a raw recording" % path)
+        self.index = np.load(path + ".idx", mmap_mode="r")
+        self.first_record = max(0, self.frames_written - self.slot_count)
+
+    def __len__(self):
+        return self.frames_written - self.first_record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.index = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass  # frames returned by frame() are still in use, the mapping goes away with them
+            self.map = None
+        self.file.close()
+
+    def frame(self, record: int) -> RawFrame:
+        """
+            Returns:
+                RawFrame: (record, seq, timestamp, fourcc, frame) of a record, O(1) by its slot.
+
+            Raises:
+                IndexError: If the record was overwritten or not recorded.
+        """
+        if not self.first_record <= record < self.frames_written:
+            raise IndexError("Record %d is not in the recording (%d - %d)"
+                             % (record, self.first_record, self.frames_written - 1))
+        offset = FILE_HEADER_SIZE + (record % self.slot_count) * self.slot_size
+        stored_record, seq, timestamp, fourcc, dtype, height, width, channels, stride, nbytes = \
+            FRAME_HEADER.unpack_from(self.map, offset)
+        shape = (height, width, channels) if channels else (height, width)
+        dtype = np.dtype(dtype.rstrip(b"\x00").decode())
+        strides = (stride, channels * dtype.itemsize, dtype.itemsize) if channels else (stride, dtype.itemsize)
+        frame = np.ndarray(shape, dtype=dtype, buffer=self.map, offset=offset + FRAME_HEADER_SIZE, strides=strides)
+        return RawFrame(stored_record, seq, timestamp, fourcc.rstrip(b"\x00").decode(), frame)
+
+    def timestamps(self) -> np.ndarray:
+        """
+            Returns:
+                numpy.ndarray: Capture timestamps of the records in the file, in record order.
+        """
+        records = np.arange(self.first_record, self.frames_written)
+        return self.index["timestamp"][records % self.slot_count]
+
+    def find_range(self, start: float = None, end: float = None) -> range:
+        """
+            Returns:
+                range: Records captured between start and end (time.monotonic() values, None for open ends),
+                       found by binary search of the side index.
+        """
+        timestamps = self.timestamps()
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return range(self.first_record + first, self.first_record + last)
+
+    def export(self, out_dir: str, start: float = None, end: float = None, export_format: str = "png",
+               converter=None) -> list:
+        """
+            Usage:
+                Exports the frames of a time range.
+
+            Parameters:
+                - out_dir (str): Folder the files are written to.
+                - start, end (float): Time range, see find_range().
+                - export_format (str): 'npy' for the native buffers as NumPy files, 'png' for images.
+                - converter (callable): Turns a native buffer into an image for 'png', e.g. a Camera_api
+                  converter. Defaults to the converter Camera_api uses for the recorded format.
+
+            Returns:
+                list: Paths of the written files.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for record in self.find_range(start, end):
+            raw = self.frame(record)
+            name = os.path.join(out_dir, "frame_%08d_seq%d.%s" % (raw.record, raw.seq, export_format))
+            if export_format == "npy":
+                np.save(name, raw.frame)
+            elif export_format == "png":
+                frame_converter = converter
+                if frame_converter is None:
+                    from Camera_Test_Automation_API import Camera_api
+                    frame_converter = getattr(Camera_api, Camera_api.FRAME_CONVERTERS.get(raw.fourcc,
+                                                                                          "convert_passthrough"))
+                if not cv2.imwrite(name, frame_converter(raw.frame)):
+                    raise IOError("Unable to write " + name)
+            else:
+                raise ValueError("Unknown export format: %s" % export_format)
+            paths.append(name)
+        return paths
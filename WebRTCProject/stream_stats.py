@@ -0,0 +1,111 @@
+import json
+from collections import deque
+from threading import Lock
+
+import numpy as np
+
+
+class StreamStats:
+    """
+        Rolling timing statistics of one stream.
+
+        Every captured frame is reported with add(). From the intervals between consecutive frames it keeps
+        - a histogram of the inter-frame interval in 1 ms bins over the whole stream,
+        - the last `window` intervals for p50/p95/p99 interval and jitter (deviation from the nominal frame period),
+        - an estimate of the dropped frames: an interval of n nominal periods means n - 1 frames were lost,
+        - the long run average FPS.
+
+        The nominal period comes from the negotiated FPS, or from the median interval if the FPS is unknown.
+    """
+
+    HISTOGRAM_MAX_MS = 500  # longer intervals go to the last bin
+
+    def __init__(self, nominal_fps: float = None, window: int = 600):
+        self.nominal_fps = nominal_fps if nominal_fps and nominal_fps > 0 else None
+        self.intervals = deque(maxlen=window)
+        self.histogram = np.zeros(self.HISTOGRAM_MAX_MS + 1, dtype=np.int64)
+        self.lock = Lock()
+        self.frames = 0
+        self.first_seq = None
+        self.last_seq = None
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.estimated_drops = 0
+        self.clock = "monotonic"
+
+    def add(self, seq: int, timestamp: float):
+        """
+            Usage:
+                Records a captured frame.
+
+            Parameters:
+                - seq (int): Sequence number of the frame.
+                - timestamp (float): Capture time in seconds (driver timestamp or time.monotonic()).
+        """
+        with self.lock:
+            if self.last_timestamp is not None:
+                interval = timestamp - self.last_timestamp
+                if interval > 0:
+                    self.intervals.append(interval)
+                    self.histogram[min(int(interval * 1000), self.HISTOGRAM_MAX_MS)] += 1
+                    if self.nominal_fps:
+                        missed = int(round(interval * self.nominal_fps)) - 1
+                        if missed > 0:
+                            self.estimated_drops += missed
+            else:
+                self.first_seq = seq
+                self.first_timestamp = timestamp
+            self.frames += 1
+            self.last_seq = seq
+            self.last_timestamp = timestamp
+
+    def snapshot(self) -> dict:
+        """
+            Returns:
+                dict: The current statistics, JSON serialisable. Times are in milliseconds.
+        """
+        with self.lock:
+            intervals = np.array(self.intervals, dtype=np.float64) * 1000
+            histogram = {str(bin_ms): int(count) for bin_ms, count in enumerate(self.histogram) if count}
+            frames = self.frames
+            duration = (self.last_timestamp - self.first_timestamp) if frames > 1 else 0.0
+            stats = {
+                "clock": self.clock,
+                "frames": frames,
+                "first_seq": self.first_seq,
+                "last_seq": self.last_seq,
+                "duration_s": round(duration, 3),
+                "average_fps": round((frames - 1) / duration, 3) if duration > 0 else 0.0,
+                "nominal_fps": self.nominal_fps,
+                "estimated_drops": self.estimated_drops,
+                "interval_histogram_ms": histogram,
+            }
+        if intervals.size:
+            period = 1000.0 / self.nominal_fps if self.nominal_fps else float(np.median(intervals))
+            jitter = np.abs(intervals - period)
+            p50, p95, p99 = (float(v) for v in np.percentile(intervals, (50, 95, 99)))
+            j50, j95, j99 = (float(v) for v in np.percentile(jitter, (50, 95, 99)))
+            stats.update({
+                "window_intervals": int(intervals.size),
+                "interval_ms": {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+                                "min": round(float(intervals.min()), 3), "max": round(float(intervals.max()), 3)},
+                "jitter_ms": {"p50": round(j50, 3), "p95": round(j95, 3), "p99": round(j99, 3)},
+                "window_fps": round(1000.0 / float(intervals.mean()), 3),
+            })
+            if not self.nominal_fps:
+                # Without a nominal rate the drop estimate uses the median interval as the frame period
+                stats["estimated_drops"] = int(np.maximum(np.rint(intervals / period) - 1, 0).sum())
+        return stats
+
+    def dump(self, path: str) -> dict:
+        """
+            Usage:
+                Writes the statistics as JSON to path.
+
+            Returns:
+                dict: The statistics that were written.
+        """
+        stats = self.snapshot()
+        with open(path, "w") as f:
+            json.dump(stats, f, indent=2)
+        return stats
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The modules live next to the scripts, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing a test does may touch the user's capability cache, this is read when the cache module is imported
+os.environ["CAMERA_CAPABILITY_CACHE"] = tempfile.mkdtemp(prefix="camera_capabilities_tests_")
+
+from Camera_Test_Automation_API import Camera_api as ca  # noqa: E402
+from camera_backends import OpenCVBackend, SyntheticBackend, SyntheticCamera  # noqa: E402
+
+TEST_MODES = [
+    ("UYVY", 640, 480, 60),
+    ("UYVY", 1280, 720, 30),
+    ("Y12", 1920, 1080, 30),
+    ("Y12", 640, 480, 60),
+    ("Y16", 640, 480, 30),
+]
+
+
+@pytest.fixture
+def synthetic_backend(tmp_path):
+    """
+    A realtime SyntheticBackend with one camera offering TEST_MODES, selected in Camera_api for the test.
+    Cameras still assigned at the end are released and the OpenCV backend is restored.
+    """
+    backend = SyntheticBackend([SyntheticCamera(modes=TEST_MODES)], cache_dir=str(tmp_path / "capabilities"))
+    status, error_code = ca.set_backend(backend)
+    assert error_code == 0
+    yield backend
+    for camera_node in list(ca.sessions):
+        ca.stop_stream(camera_node)
+        ca.release_camera(camera_node)
+    ca.set_backend(OpenCVBackend())
+
+
+@pytest.fixture
+def streaming_camera(synthetic_backend):
+    """
+    Camera node 0 of the synthetic backend streaming headless in the given mode: streaming_camera(fmt, w, h, fps).
+    """
+    def start(fmt="UYVY", width=640, height=480, fps=60):
+        ca.assign_camera(0)
+        status, error_code = ca.set_resolution(0, width, height, fmt, fps)
+        assert error_code == 0
+        assert ca.show_stream(0, 0, False, True) is True
+        return 0
+    return start
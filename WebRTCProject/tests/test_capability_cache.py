@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import SYNTHETIC_VID
+from camera_capability_cache import CACHE_SCHEMA_VERSION, CapabilityCache
+from conftest import TEST_MODES
+
+FORMATS = [("UYVY", 640, 480, 60), ("Y12", 1920, 1080, 30)]
+UVC = {"brightness": [-15, 15, 1, 0, 2, 1, 0]}
+
+
+def store_entry(cache):
+    return cache.store("ABCD", "00C0", "1.2.3.4", "See3CAM_Test", FORMATS, UVC)
+
+
+def test_stored_entry_is_loaded_by_a_new_instance(tmp_path):
+    store_entry(CapabilityCache(str(tmp_path)))
+
+    entry = CapabilityCache(str(tmp_path)).load("abcd", "00c0", "1.2.3.4")
+
+    assert entry["formats"] == FORMATS
+    assert entry["uvc"] == UVC
+    assert entry["name"] == "See3CAM_Test"
+    assert entry["schema"] == CACHE_SCHEMA_VERSION
+
+
+def test_store_leaves_no_temporary_files(tmp_path):
+    cache = CapabilityCache(str(tmp_path))
+    store_entry(cache)
+    store_entry(cache)
+
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_other_firmware_is_not_served_from_the_cache(tmp_path):
+    store_entry(CapabilityCache(str(tmp_path)))
+
+    assert CapabilityCache(str(tmp_path)).load("abcd", "00c0", "1.2.3.5") is None
+
+
+@pytest.mark.parametrize("change", [
+    lambda entry: "{not json",
+    lambda entry: json.dumps(dict(entry, schema=CACHE_SCHEMA_VERSION + 1)),
+    lambda entry: json.dumps(dict(entry, pid="00c1")),
+    lambda entry: json.dumps(dict(entry, formats=[["UYVY", "640", 480, 60]])),
+    lambda entry: json.dumps({key: value for key, value in entry.items() if key != "uvc"}),
+], ids=["corrupt", "schema", "key", "formats", "missing_uvc"])
+def test_invalid_entries_are_ignored(tmp_path, change):
+    store_entry(CapabilityCache(str(tmp_path)))
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    with open(path) as f:
+        entry = json.load(f)
+    with open(path, "w") as f:
+        f.write(change(entry))
+
+    assert CapabilityCache(str(tmp_path)).load("abcd", "00c0", "1.2.3.4") is None
+
+
+def test_invalidate_removes_the_entry(tmp_path):
+    cache = CapabilityCache(str(tmp_path))
+    store_entry(cache)
+
+    cache.invalidate("abcd", "00c0", "1.2.3.4")
+
+    assert os.listdir(tmp_path) == []
+    assert cache.load("abcd", "00c0", "1.2.3.4") is None
+
+
+def test_get_capabilities_probes_the_camera_once(synthetic_backend, monkeypatch):
+    opened_nodes = []
+    open_capture = synthetic_backend.open_capture
+
+    def counting_open_capture(camera_node=None):
+        if camera_node is not None:
+            opened_nodes.append(camera_node)
+        return open_capture(camera_node)
+
+    monkeypatch.setattr(synthetic_backend, "open_capture", counting_open_capture)
+
+    first, error_code = ca.get_capabilities(0)
+    assert error_code == 0
+    assert opened_nodes == [0]
+    assert os.listdir(synthetic_backend.capability_cache.cache_dir)
+    assert first["vid"] == SYNTHETIC_VID
+    assert set(TEST_MODES) <= set(first["formats"])
+    assert ca.get_session(0) is None  # released again, it was not assigned before
+
+    second, error_code = ca.get_capabilities(0)
+    assert error_code == 0
+    assert opened_nodes == [0]  # answered from the cache
+    assert second["formats"] == first["formats"]
+
+    ca.get_capabilities(0, refresh=True)
+    assert opened_nodes == [0, 0]
@@ -0,0 +1,70 @@
+import time
+
+import cv2
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import SyntheticCapture
+
+
+def drive_clock(monkeypatch, position_msec):
+    """
+    Makes the synthetic capture report position_msec(capture) as CAP_PROP_POS_MSEC.
+    """
+    get = SyntheticCapture.get
+
+    def patched_get(capture, prop, *args):
+        if prop == cv2.CAP_PROP_POS_MSEC and not args and capture.last_frame_time is not None:
+            return position_msec(capture)
+        return get(capture, prop, *args)
+
+    monkeypatch.setattr(SyntheticCapture, "get", patched_get)
+
+
+def test_driver_clock_offset():
+    # The monotonic clock itself, as V4L2 stamps buffers
+    assert ca.driver_clock_offset([(10.010, 10000.0), (10.043, 10033.3)]) == 0.0
+    # Another clock: shifted by the smallest read delay
+    assert ca.driver_clock_offset([(10.010, 5000.0), (10.043, 5033.0)]) == pytest.approx(5.01)
+    # No buffer timestamps
+    assert ca.driver_clock_offset([(10.0, 0.0), (10.03, 0.0)]) is None
+    assert ca.driver_clock_offset([(10.0, -1.0), (10.03, -1.0)]) is None
+    assert ca.driver_clock_offset([(10.0, 7.0), (10.03, 7.0)]) is None
+
+
+def wait_for_capture_clock(camera_node):
+    deadline = time.monotonic() + 5
+    while ca.get_session(camera_node).buffer_depth is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_queued_frames_are_stamped_with_their_capture_time(streaming_camera, monkeypatch):
+    queue_delay = 0.05  # every frame is read three periods after it was captured
+    drive_clock(monkeypatch, lambda capture: (capture.last_frame_time - queue_delay) * 1000.0)
+    camera_node = streaming_camera("UYVY", 640, 480, 60)
+    wait_for_capture_clock(camera_node)
+    assert ca.get_session(camera_node).clock_offset == 0.0
+
+    set_time = time.monotonic()
+    snapshot, error_code = ca.wait_for_frame(camera_node, after_timestamp=set_time)
+
+    assert error_code == 0
+    assert snapshot.timestamp > set_time
+    assert time.monotonic() - set_time >= queue_delay  # read at least the queue delay after the change
+    assert ca.get_stream_stats(camera_node)[0]["clock"] == "driver"
+
+
+def test_without_driver_timestamps_the_queue_depth_is_skipped(streaming_camera, monkeypatch):
+    drive_clock(monkeypatch, lambda capture: 0.0)
+    camera_node = streaming_camera("UYVY", 640, 480, 60)
+    wait_for_capture_clock(camera_node)
+    session = ca.get_session(camera_node)
+    assert session.clock_offset is None
+    assert session.buffer_depth == ca.CAPTURE_BUFFER_DEPTH
+
+    seq_at_change = session.frame_ring.latest_seq
+    snapshot, error_code = ca.wait_for_frame(camera_node, after_timestamp=time.monotonic())
+
+    assert error_code == 0
+    assert snapshot.seq >= seq_at_change + 1 + ca.CAPTURE_BUFFER_DEPTH
+    assert ca.get_stream_stats(camera_node)[0]["clock"] == "monotonic"
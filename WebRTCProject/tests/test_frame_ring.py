@@ -0,0 +1,152 @@
+import time
+from threading import Event, Thread
+
+import numpy as np
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from frame_ring import FrameRing, FrameSubscriber
+
+
+def frame(value, shape=(4, 6)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def start_publisher(ring, values, stop_event=None):
+    published = []
+    thread = Thread(target=lambda: published.extend(ring.publish(frame(v), stop_event=stop_event) for v in values),
+                    daemon=True)
+    thread.start()
+    return thread, published
+
+
+def test_ring_needs_two_slots():
+    with pytest.raises(ValueError):
+        FrameRing(1)
+
+
+def test_wrap_around_keeps_numbering_and_reuses_slot_buffers():
+    ring = FrameRing(3)
+    buffers = set()
+    for value in range(1, 8):
+        assert ring.publish(frame(value)) == value
+        buffers.add(id(ring.slots[value % 3].frame))
+
+    assert ring.latest_seq == 7
+    assert len(buffers) == 3  # one buffer per slot, reused on every wrap
+    snapshot = ring.wait_for_frame(after_seq=6, timeout=0)
+    assert snapshot.seq == 7
+    assert (snapshot.frame == 7).all()
+    assert not snapshot.frame.flags.writeable
+
+
+def test_wait_for_frame_times_out_without_a_newer_frame():
+    ring = FrameRing(2)
+    ring.publish(frame(1))
+
+    assert ring.wait_for_frame(after_seq=1, timeout=0.05) is None
+
+
+def test_latest_subscriber_skips_and_counts_dropped_frames():
+    ring = FrameRing(4)
+    subscriber = ring.subscribe("display", FrameSubscriber.LATEST)
+    for value in range(1, 6):
+        ring.publish(frame(value))
+
+    item = subscriber.get(timeout=0)
+    assert item.seq == 5
+    assert (item.frame == 5).all()
+    assert subscriber.get_stats() == {"policy": "latest", "delivered": 1, "dropped": 4, "lag": 0}
+
+
+def test_frame_held_by_a_latest_subscriber_survives_the_wrap_around():
+    ring = FrameRing(2)
+    subscriber = ring.subscribe("process", FrameSubscriber.LATEST)
+    ring.publish(frame(1))
+    item = subscriber.get(timeout=0)
+    for value in range(2, 6):
+        ring.publish(frame(value))  # slot 1 % 2 is reused twice while the subscriber holds it
+
+    assert (item.frame == 1).all()
+    assert ring.slots[1].frame is not item.frame
+    assert (ring.wait_for_frame(after_seq=4, timeout=0).frame == 5).all()
+
+    buffer = ring.slots[1].frame
+    assert subscriber.get(timeout=0).frame is buffer
+    assert subscriber.get(timeout=0) is None  # nothing newer, the buffer is released
+    ring.publish(frame(6))
+    ring.publish(frame(7))
+    assert ring.slots[1].frame is buffer
+
+
+def test_lossless_subscriber_gets_every_frame_through_back_pressure():
+    ring = FrameRing(2)
+    subscriber = ring.subscribe("recorder", FrameSubscriber.LOSSLESS)
+    thread, published = start_publisher(ring, range(1, 11))
+
+    time.sleep(0.2)
+    assert thread.is_alive()  # the producer waits for the subscriber instead of overwriting its frames
+    assert ring.latest_seq < 10
+    received = []
+    while len(received) < 10:
+        item = subscriber.get(timeout=1)
+        assert item is not None
+        received.append((item.seq, int(item.frame[0, 0])))
+    thread.join(1)
+
+    assert received == [(seq, seq) for seq in range(1, 11)]
+    assert published == list(range(1, 11))
+    assert subscriber.dropped == 0
+
+
+def test_blocked_producer_is_released_by_stop_event_and_unsubscribe():
+    ring = FrameRing(2)
+    subscriber = ring.subscribe("recorder", FrameSubscriber.LOSSLESS)
+    stop_event = Event()
+    thread, published = start_publisher(ring, range(1, 4), stop_event)
+    time.sleep(0.2)
+    stop_event.set()
+    thread.join(1)
+    assert published[-1] == 0  # stopped while waiting
+
+    thread, published = start_publisher(ring, range(1, 4))
+    time.sleep(0.2)
+    subscriber.close()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert "recorder" in ring.get_stats()
+
+
+def test_closed_ring_ends_subscribers_after_the_last_frame():
+    ring = FrameRing(4)
+    subscriber = ring.subscribe("recorder", FrameSubscriber.LOSSLESS)
+    ring.publish(frame(1))
+    ring.close()
+
+    assert subscriber.get(timeout=1).seq == 1
+    assert subscriber.get(timeout=1) is None
+
+
+def test_reserve_and_commit_write_into_the_slot_buffer():
+    ring = FrameRing(2)
+    ring.publish(frame(0))
+    ring.publish(frame(0))
+    slot = ring.reserve()
+    assert ring.reserve() is slot  # reserved until committed
+    buffer = slot.frame
+    buffer[:] = 9
+
+    assert ring.commit(slot, buffer) == 3
+    assert ring.slots[3 % 2].frame is buffer
+    assert (ring.wait_for_frame(after_seq=2, timeout=0).frame == 9).all()
+
+
+def test_lossless_consumer_of_a_synthetic_stream_sees_consecutive_frames(streaming_camera):
+    camera_node = streaming_camera("UYVY", 640, 480, 60)
+    subscriber, error_code = ca.subscribe_frames(camera_node, "test", FrameSubscriber.LOSSLESS)
+    assert error_code == 0
+
+    seqs = [subscriber.get(timeout=2).seq for _ in range(20)]
+    subscriber.close()
+
+    assert seqs == list(range(seqs[0], seqs[0] + 20))
@@ -0,0 +1,51 @@
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import OpenCVBackend, SyntheticBackend, SyntheticCamera
+from camera_device_registry import device_registry
+from camera_hid_channel import resolve_hid_path
+
+
+@pytest.fixture
+def identical_cameras(tmp_path):
+    """
+    Two cameras of the same model (VID/PID) that differ only in firmware and unique ID.
+    """
+    cameras = [SyntheticCamera(firmware=(1, 0, 0, 1), unique_id=b"\x00\x00\x00\x01"),
+               SyntheticCamera(firmware=(2, 0, 0, 2), unique_id=b"\x00\x00\x00\x02")]
+    backend = SyntheticBackend(cameras, cache_dir=str(tmp_path / "capabilities"))
+    assert ca.set_backend(backend) == (True, 0)
+    yield backend
+    for camera_node in list(ca.sessions):
+        ca.release_camera(camera_node)
+    ca.set_backend(OpenCVBackend())
+
+
+def test_identical_cameras_get_their_own_hid_interface(identical_cameras):
+    ca.assign_camera(0)
+    ca.assign_camera(1)
+
+    first, second = ca.get_hid_channel(0), ca.get_hid_channel(1)
+
+    assert first is not second
+    assert first.path != second.path
+    assert ca.get_unique_ID(0) == ("00000001", 0)
+    assert ca.get_unique_ID(1) == ("00000002", 0)
+    assert ca.get_firmware_version(0)[0] != ca.get_firmware_version(1)[0]
+
+
+def test_users_of_one_interface_share_the_channel(identical_cameras):
+    ca.assign_camera(1)
+    channel = ca.get_hid_channel(1)
+
+    assert ca.hid_channel_for_device(device_registry.get_device(1)) is channel
+    assert resolve_hid_path(0xFFFF, 0x0001, ordinal=1) == channel.path
+
+
+def test_missing_hid_interface_raises_when_opened(identical_cameras):
+    ca.assign_camera(0)
+    identical_cameras.hid_paths.clear()  # the HID interfaces are gone, the video devices are not
+
+    with pytest.raises(IOError):
+        ca.get_hid_channel(0).open()
+    assert ca.get_firmware_version(0)[1] != 0
@@ -0,0 +1,139 @@
+import os
+import time
+from threading import Event, Thread
+
+import numpy as np
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import render_pattern
+from frame_ring import FrameRing
+from raw_recorder import FILE_HEADER_SIZE, PAGE_SIZE, RawRecorder, RawRecording
+
+
+def frame(value, shape=(4, 6, 2)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+@pytest.fixture
+def wrapped_recording(tmp_path):
+    """
+    A three slot recording of seven frames (value n at timestamp 10 + n), so records 0 - 3 were overwritten.
+    """
+    path = str(tmp_path / "ring.raw")
+    recorder = RawRecorder(path, FILE_HEADER_SIZE + 3 * PAGE_SIZE, "UYVY")
+    for record in range(7):
+        recorder.write(100 + record, 10.0 + record, frame(record))
+    recorder.close()
+    with RawRecording(path) as recording:
+        yield recording
+
+
+def test_the_ring_keeps_the_last_slots(wrapped_recording):
+    assert wrapped_recording.slot_count == 3
+    assert wrapped_recording.frames_written == 7
+    assert wrapped_recording.first_record == 4
+    assert len(wrapped_recording) == 3
+
+
+def test_frames_are_read_back_with_their_header(wrapped_recording):
+    for record in range(4, 7):
+        raw = wrapped_recording.frame(record)
+        assert (raw.record, raw.seq, raw.timestamp, raw.fourcc) == (record, 100 + record, 10.0 + record, "UYVY")
+        np.testing.assert_array_equal(raw.frame, frame(record))
+        assert not raw.frame.flags.writeable
+
+
+@pytest.mark.parametrize("record", [3, 7, -1])
+def test_overwritten_and_future_records_raise(wrapped_recording, record):
+    with pytest.raises(IndexError):
+        wrapped_recording.frame(record)
+
+
+def test_time_ranges_are_found_in_the_index(wrapped_recording):
+    np.testing.assert_array_equal(wrapped_recording.timestamps(), [14.0, 15.0, 16.0])
+    assert wrapped_recording.find_range() == range(4, 7)
+    assert wrapped_recording.find_range(14.5, 16.0) == range(5, 7)
+    assert wrapped_recording.find_range(end=14.0) == range(4, 5)
+    assert wrapped_recording.find_range(20.0) == range(7, 7)
+
+
+def test_export_writes_the_native_buffers(wrapped_recording, tmp_path):
+    paths = wrapped_recording.export(str(tmp_path / "export"), start=15.0, export_format="npy")
+
+    assert [os.path.basename(path) for path in paths] == ["frame_00000005_seq105.npy", "frame_00000006_seq106.npy"]
+    np.testing.assert_array_equal(np.load(paths[1]), frame(6))
+
+
+def test_larger_frames_are_skipped(tmp_path):
+    recorder = RawRecorder(str(tmp_path / "ring.raw"), FILE_HEADER_SIZE + 2 * PAGE_SIZE)
+    recorder.write(0, 0.0, frame(1))
+    recorder.write(1, 1.0, np.zeros(PAGE_SIZE, dtype=np.uint8))
+    recorder.close()
+
+    assert recorder.get_stats()["frames_written"] == 1
+    assert recorder.get_stats()["frames_skipped"] == 1
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "other.raw"
+    path.write_bytes(b"\x00" * FILE_HEADER_SIZE)
+
+    with pytest.raises(ValueError):
+        RawRecording(str(path))
+
+
+def test_start_raises_when_the_file_cannot_be_allocated(tmp_path):
+    ring = FrameRing(4)
+    recorder = RawRecorder(str(tmp_path), FILE_HEADER_SIZE + PAGE_SIZE)  # a folder, not a file
+    publisher = Event()
+
+    def publish_when_subscribed():
+        while not ring.subscribers:
+            time.sleep(0.001)
+        ring.publish(frame(2))
+        publisher.set()
+
+    Thread(target=publish_when_subscribed, daemon=True).start()
+    with pytest.raises(OSError):
+        recorder.start(ring, Event(), timeout=2)
+    assert publisher.is_set()
+    assert not recorder.get_stats()["recording"]
+
+
+def test_start_times_out_without_frames(tmp_path):
+    recorder = RawRecorder(str(tmp_path / "ring.raw"), FILE_HEADER_SIZE + PAGE_SIZE)
+
+    with pytest.raises(TimeoutError):
+        recorder.start(FrameRing(4), Event(), timeout=0.05)
+    assert not recorder.get_stats()["recording"]
+
+
+def test_recording_too_small_for_a_frame_is_refused(streaming_camera, tmp_path):
+    camera_node = streaming_camera("UYVY", 1280, 720, 30)
+
+    assert ca.start_raw_recording(camera_node, str(tmp_path / "stream.raw"), size_mb=1) == (False, 125)
+    assert ca.start_raw_recording(camera_node, str(tmp_path / "stream.raw"), size_mb=4) == (True, 0)
+
+
+def test_recording_of_a_synthetic_stream(streaming_camera, tmp_path):
+    camera_node = streaming_camera("Y12", 640, 480, 60)
+    path = str(tmp_path / "stream.raw")
+    assert ca.start_raw_recording(camera_node, path, size_mb=8) == (True, 0)
+    assert ca.start_raw_recording(camera_node, path, size_mb=8) == (False, 125)
+    time.sleep(0.5)
+
+    stats, error_code = ca.stop_raw_recording(camera_node)
+
+    assert error_code == 0
+    assert stats["frames_written"] > 5
+    assert not stats["recording"]
+    expected = render_pattern("Y12", 640, 480)
+    with RawRecording(path) as recording:
+        assert len(recording) == min(stats["frames_written"], recording.slot_count)
+        seqs = [recording.frame(record).seq for record in recording.find_range()]
+        assert seqs == list(range(seqs[0], seqs[0] + len(seqs)))  # lossless, no frame is missing
+        last = recording.frame(recording.frames_written - 1)
+        assert last.fourcc == "Y12"
+        np.testing.assert_array_equal(last.frame, expected)
+        assert np.all(np.diff(recording.timestamps()) > 0)
@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from stream_stats import StreamStats
+
+
+def feed(stats, intervals, start=100.0):
+    timestamp = start
+    stats.add(0, timestamp)
+    for seq, interval in enumerate(intervals, 1):
+        timestamp += interval
+        stats.add(seq, timestamp)
+
+
+def test_a_gap_of_three_periods_counts_two_drops():
+    stats = StreamStats(nominal_fps=30)
+    feed(stats, [1 / 30] * 10 + [3 / 30] + [1 / 30] * 9)
+
+    snapshot = stats.snapshot()
+    assert snapshot["frames"] == 21
+    assert snapshot["first_seq"] == 0 and snapshot["last_seq"] == 20
+    assert snapshot["estimated_drops"] == 2
+    assert snapshot["window_intervals"] == 20
+    assert snapshot["interval_ms"]["p50"] == pytest.approx(33.333, abs=0.01)
+    assert snapshot["interval_ms"]["max"] == pytest.approx(100.0, abs=0.01)
+    assert snapshot["jitter_ms"]["p50"] == pytest.approx(0.0, abs=0.01)
+    assert snapshot["duration_s"] == pytest.approx(22 / 30, abs=0.001)
+    assert snapshot["average_fps"] == pytest.approx(20 / (22 / 30), abs=0.01)
+    assert snapshot["interval_histogram_ms"]["33"] == 19
+    assert sum(snapshot["interval_histogram_ms"].values()) == 20
+
+
+def test_histogram_uses_one_millisecond_bins_and_caps_long_intervals():
+    stats = StreamStats(nominal_fps=30)
+    feed(stats, [0.0105, 0.0105, 0.0205, 2.0])
+
+    assert stats.snapshot()["interval_histogram_ms"] == {"10": 2, "20": 1, str(StreamStats.HISTOGRAM_MAX_MS): 1}
+
+
+def test_without_a_nominal_fps_the_median_interval_is_the_period():
+    stats = StreamStats()
+    feed(stats, [0.04] * 10 + [0.12])
+
+    snapshot = stats.snapshot()
+    assert snapshot["nominal_fps"] is None
+    assert snapshot["estimated_drops"] == 2
+    assert snapshot["window_fps"] == pytest.approx(1000 / ((0.4 + 0.12) / 11 * 1000), abs=0.01)
+
+
+def test_window_keeps_only_the_last_intervals():
+    stats = StreamStats(nominal_fps=30, window=5)
+    feed(stats, [0.1] * 5 + [1 / 30] * 5)
+
+    snapshot = stats.snapshot()
+    assert snapshot["window_intervals"] == 5
+    assert snapshot["interval_ms"]["max"] == pytest.approx(33.333, abs=0.01)
+    assert snapshot["estimated_drops"] == 10  # counted over the whole stream
+
+
+def test_a_single_frame_has_no_interval_statistics():
+    stats = StreamStats(nominal_fps=30)
+    stats.add(0, 1.0)
+
+    snapshot = stats.snapshot()
+    assert snapshot["frames"] == 1
+    assert snapshot["average_fps"] == 0.0
+    assert "interval_ms" not in snapshot
+
+
+def test_dump_writes_the_snapshot_as_json(tmp_path):
+    stats = StreamStats(nominal_fps=60)
+    feed(stats, [1 / 60] * 5)
+    path = tmp_path / "stats.json"
+
+    written = stats.dump(str(path))
+
+    assert json.loads(path.read_text()) == written
+    assert written["frames"] == 6
+
+
+def test_stats_of_a_synthetic_stream(streaming_camera):
+    camera_node = streaming_camera("UYVY", 640, 480, 60)
+    time.sleep(1)
+
+    snapshot, error_code = ca.get_stream_stats(camera_node)
+
+    assert error_code == 0
+    assert snapshot["nominal_fps"] == 60
+    assert snapshot["frames"] > 20
+    # Loose bounds, the realtime synthetic camera paces its frames with sleeps
+    assert 20 < snapshot["average_fps"] < 70
+    assert 5 < snapshot["interval_ms"]["p50"] < 50
+
+
+def test_stream_stats_need_an_assigned_camera_that_streamed(synthetic_backend):
+    assert ca.get_stream_stats(0) == (None, 102)
+    ca.assign_camera(0)
+    assert ca.get_stream_stats(0) == (None, 121)
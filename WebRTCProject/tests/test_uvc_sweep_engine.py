@@ -0,0 +1,119 @@
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from uvc_sweep_engine import SweepEngine, build_design, expand_values, order_points, point_key
+
+RESOLUTIONS = [("UYVY", 640, 480, 60), ("UYVY", 1280, 720, 30)]
+
+
+def test_expand_values_counts_towards_the_end():
+    assert expand_values((0, 10, 5)) == [0, 5, 10]
+    assert expand_values((10, 0, 5)) == [10, 5, 0]
+    assert expand_values((10, 0, -5)) == [10, 5, 0]
+    assert expand_values([3, 1]) == [3, 1]
+
+
+def test_expand_values_rejects_a_zero_step():
+    with pytest.raises(ValueError):
+        expand_values((0, 10, 0))
+
+
+def test_cartesian_design_has_every_combination():
+    points = build_design({"gain": [0, 1, 2], "exposure": [10, 20]})
+
+    assert len(points) == 6
+    assert len({point_key(point) for point in points}) == 6
+
+
+def test_latin_hypercube_uses_every_stratum_once():
+    dimensions = {"gain": list(range(10)), "exposure": list(range(100, 200, 10)), "brightness": list(range(10))}
+
+    points = build_design(dimensions, "latin_hypercube", samples=10, seed=3)
+
+    for name, values in dimensions.items():
+        assert Counter(point[name] for point in points) == Counter(values)
+    assert points == build_design(dimensions, "latin_hypercube", samples=10, seed=3)  # resumable
+
+
+def test_random_design_is_seeded():
+    dimensions = {"gain": list(range(100))}
+
+    assert build_design(dimensions, "random", samples=5, seed=1) == build_design(dimensions, "random", 5, 1)
+    assert build_design(dimensions, "random", samples=5, seed=1) != build_design(dimensions, "random", 5, 2)
+
+
+@pytest.mark.parametrize("design, samples", [("sobol", 4), ("random", None), ("latin_hypercube", 0)])
+def test_invalid_designs_are_rejected(design, samples):
+    with pytest.raises(ValueError):
+        build_design({"gain": [1, 2]}, design, samples)
+
+
+def test_order_points_changes_costly_dimensions_least_often():
+    points = build_design({"gain": [0, 1, 2], "exposure": [10, 20],
+                           "resolution": [list(mode) for mode in RESOLUTIONS]})
+
+    ordered = order_points(points)
+
+    def changes(name):
+        return sum(1 for a, b in zip(ordered, ordered[1:]) if a[name] != b[name])
+
+    assert sorted(map(point_key, ordered)) == sorted(map(point_key, points))
+    assert changes("resolution") == 1
+    assert changes("exposure") == 2  # the second resolution continues at the exposure the first ended with
+    # Serpentine: every step changes a single dimension by one value
+    for a, b in zip(ordered, ordered[1:]):
+        assert sum(a[name] != b[name] for name in a) == 1
+        assert abs(a["gain"] - b["gain"]) <= 1
+
+
+def test_sweep_on_an_unassigned_camera_returns_the_error(synthetic_backend):
+    assert SweepEngine(0, {"gain": [1, 2]}, hold=0.01, adaptive_hold=False).run() == (False, 102)
+
+
+def test_sweep_resumes_from_the_checkpoint(synthetic_backend, tmp_path, monkeypatch):
+    ca.assign_camera(0)
+    checkpoint = str(tmp_path / "sweep.jsonl")
+    images = str(tmp_path / "images")
+    streaming_during_switch = []
+    set_resolution = ca.set_resolution
+
+    def checked_set_resolution(camera_node, *args, **kwargs):
+        streaming_during_switch.append(not ca.is_streaming_stopped(camera_node))
+        return set_resolution(camera_node, *args, **kwargs)
+
+    monkeypatch.setattr(ca, "set_resolution", checked_set_resolution)
+    measured = []
+
+    def crash_on_the_fourth_point(snapshot):
+        if len(measured) == 3:
+            raise RuntimeError("interrupted")
+        measured.append(snapshot.seq)
+        return float(snapshot.frame.mean())
+
+    def engine(measure=None):
+        return SweepEngine(0, {"gain": (0, 2, 1), "brightness": [0, 8]}, resolutions=RESOLUTIONS, hold=0.01,
+                           adaptive_hold=False, checkpoint_path=checkpoint, measure=measure, save_path=images)
+
+    with pytest.raises(RuntimeError):
+        engine(crash_on_the_fourth_point).run()
+    assert ca.is_streaming_stopped(0)  # the engine stops the stream it started
+    with open(checkpoint) as f:
+        done = [json.loads(line) for line in f]
+    assert len(done) == 3
+    assert all(os.path.exists(record["image"]) for record in done)
+
+    records, error_code = engine().run()
+
+    assert error_code == 0
+    assert len(records) == 12
+    assert [record["key"] for record in records[:3]] == [record["key"] for record in done]
+    with open(checkpoint) as f:
+        assert len(f.readlines()) == 12
+    assert len(os.listdir(images)) == 12
+    assert ca.is_streaming_stopped(0)
+    assert streaming_during_switch and not any(streaming_during_switch)
+    assert engine().run() == (records, 0)  # nothing left to do
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import Camera_Test_Automation_API
+from Camera_Test_Automation_API import Camera_api as ca
+
+
+class SlowWriter:
+    """
+    Image writer whose writes take a while, to see whether uvc_var waits for them.
+    """
+
+    def __init__(self, fail=False):
+        self.executor = ThreadPoolExecutor(1)
+        self.futures = []
+        self.fail = fail
+
+    def submit(self, path, frame, save_format):
+        def write():
+            time.sleep(0.2)
+            if self.fail:
+                raise IOError("disk full")
+            with open(path, "wb") as f:
+                f.write(frame.tobytes())
+        future = self.executor.submit(write)
+        self.futures.append(future)
+        return future
+
+
+def test_queued_images_are_written_before_an_early_return(streaming_camera, tmp_path, monkeypatch):
+    camera_node = streaming_camera()
+    writer = SlowWriter()
+    monkeypatch.setattr(Camera_Test_Automation_API, "get_image_writer", lambda: writer)
+    wait_for_frame = ca.wait_for_frame
+    calls = []
+
+    def failing_third_frame(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 3:  # the first stream frame, then one per step
+            return None, 121
+        return wait_for_frame(*args, **kwargs)
+
+    monkeypatch.setattr(ca, "wait_for_frame", failing_third_frame)
+
+    assert ca.uvc_var(camera_node, "brightness", 0, 4, 1, 2, 0, True, str(tmp_path)) == (False, 121)
+    assert len(writer.futures) == 1
+    assert writer.futures[0].done()
+
+
+def test_write_errors_are_reported(streaming_camera, tmp_path, monkeypatch):
+    camera_node = streaming_camera()
+    writer = SlowWriter(fail=True)
+    monkeypatch.setattr(Camera_Test_Automation_API, "get_image_writer", lambda: writer)
+
+    assert ca.uvc_var(camera_node, "brightness", 0, 2, 1, 2, 0, True, str(tmp_path)) == (False, 115)
+    assert len(writer.futures) == 3
+    assert all(future.done() for future in writer.futures)
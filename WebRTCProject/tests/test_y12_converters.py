@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from Camera_Test_Automation_API import Camera_api as ca
+from camera_backends import luma_pattern, render_pattern
+
+
+@pytest.mark.parametrize("width, height", [(1920, 1080), (5, 3), (7, 1)])
+def test_y12_unpack_matches_synthetic_packing(width, height):
+    frame = render_pattern("Y12", width, height)
+    expected = luma_pattern(width, height, 4096)
+
+    np.testing.assert_array_equal(ca.convert_y12_to_y16(frame), expected)
+    np.testing.assert_array_equal(ca.convert_y12_to_y8(frame), (expected >> 4).astype(np.uint8))
+
+
+@pytest.mark.parametrize("width, height", [(1920, 1080), (7, 1)])
+def test_y12_converters_fill_the_given_buffer(width, height):
+    frame = render_pattern("Y12", width, height)
+    out8 = np.empty((height, width), dtype=np.uint8)
+    out16 = np.empty((height, width), dtype=np.uint16)
+
+    assert ca.convert_y12_to_y8(frame, out=out8) is out8
+    assert ca.convert_y12_to_y16(frame, out=out16) is out16
+    np.testing.assert_array_equal(out16 >> 4, out8)
+
+
+def test_y12_packed_view_rejects_short_frames():
+    frame = np.zeros((2, 2, 1), dtype=np.uint8)
+
+    with pytest.raises(ValueError):
+        ca.y12_packed_view(frame, 4)
+
+
+def test_y12_frames_of_the_synthetic_camera(synthetic_backend):
+    capture = synthetic_backend.open_capture(0)
+    assert capture.setFormatType(capture.camera.modes.index(("Y12", 1920, 1080, 30)))
+    ret, frame = capture.read()
+
+    assert ret
+    np.testing.assert_array_equal(ca.convert_y12_to_y16(frame), luma_pattern(1920, 1080, 4096))
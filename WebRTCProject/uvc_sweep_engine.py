@@ -0,0 +1,313 @@
+import itertools
+import json
+import os
+import random
+import time
+
+from Camera_Test_Automation_API import Camera_api as ca
+from image_writer import get_image_writer
+
+DESIGNS = ('cartesian', 'latin_hypercube', 'random')
+
+# Relative cost of changing a dimension. Costly dimensions are changed least often: a resolution switch
+# restarts the sensor, exposure and gain make the image settle again, the rest is nearly free.
+DEFAULT_CHANGE_COSTS = {
+    'resolution': 100,
+    'exposure': 10,
+    'gain': 5,
+    'white_balance_blue_u': 5,
+}
+
+
+def expand_values(values) -> list:
+    """
+        Returns:
+            list: The values of a sweep dimension, given as a list or as a (start, end, step) tuple.
+
+        Raises:
+            ValueError: If the step of a (start, end, step) tuple is 0.
+    """
+    if isinstance(values, tuple) and len(values) == 3:
+        start, end, step = values
+        if step == 0:
+            raise ValueError("The step of the sweep range (%s, %s, %s) cannot be 0" % (start, end, step))
+        step = abs(step) if end >= start else -abs(step)
+        return list(range(start, end + (1 if step > 0 else -1), step))
+    return list(values)
+
+
+def build_design(dimensions: dict, design: str = 'cartesian', samples: int = None, seed: int = 0) -> list:
+    """
+        Usage:
+            Builds the sweep points.
+
+        Parameters:
+            - dimensions (dict): Dimension name mapped to its list of values.
+            - design (str): 'cartesian' for every combination, 'latin_hypercube' for `samples` points that cover
+              every dimension evenly, 'random' for `samples` uniformly drawn points.
+            - samples (int): Number of points of the latin_hypercube and random designs.
+            - seed (int): Random seed, the same seed gives the same points (needed to resume a run).
+
+        Returns:
+            list: Points as dicts of dimension name to value.
+    """
+    names = list(dimensions)
+    if design == 'cartesian':
+        return [dict(zip(names, combination)) for combination in itertools.product(*(dimensions[n] for n in names))]
+    if design not in DESIGNS:
+        raise ValueError("Unknown sweep design: %s" % design)
+    if not samples or samples < 1:
+        raise ValueError("The %s design needs a sample count" % design)
+    rng = random.Random(seed)
+    if design == 'random':
+        return [{name: rng.choice(dimensions[name]) for name in names} for _ in range(samples)]
+    # Latin hypercube: every dimension is cut into `samples` strata and each stratum is used exactly once
+    strata = {}
+    for name in names:
+        order = list(range(samples))
+        rng.shuffle(order)
+        strata[name] = order
+    points = []
+    for i in range(samples):
+        point = {}
+        for name in names:
+            values = dimensions[name]
+            position = (strata[name][i] + rng.random()) / samples
+            point[name] = values[min(len(values) - 1, int(position * len(values)))]
+        points.append(point)
+    return points
+
+
+def order_points(points: list, costs: dict = None) -> list:
+    """
+        Usage:
+            Orders the points so costly dimensions change least often: points are grouped by the most costly
+            dimension first, and every nested level runs in serpentine order (alternately ascending and
+            descending), so consecutive points differ in as few dimensions, and by as little, as possible.
+
+        Parameters:
+            - points (list): Sweep points.
+            - costs (dict): Change cost per dimension, DEFAULT_CHANGE_COSTS for the rest (cost 1 if unknown).
+
+        Returns:
+            list: The ordered points.
+    """
+    if not points:
+        return []
+    change_costs = dict(DEFAULT_CHANGE_COSTS)
+    if costs:
+        change_costs.update(costs)
+    names = sorted(points[0], key=lambda name: -change_costs.get(name, 1))
+
+    def sort_key(value):
+        return (0, value) if isinstance(value, (int, float)) else (1, str(value))
+
+    def serpentine(group, depth, descending):
+        if depth == len(names):
+            return group
+        name = names[depth]
+        buckets = {}
+        for point in group:
+            buckets.setdefault(json.dumps(point[name], sort_keys=True), []).append(point)
+        keys = sorted(buckets, key=lambda key: sort_key(buckets[key][0][name]), reverse=descending)
+        ordered = []
+        for i, key in enumerate(keys):
+            ordered.extend(serpentine(buckets[key], depth + 1, i % 2 == 1))
+        return ordered
+
+    return serpentine(points, 0, False)
+
+
+def point_key(point: dict) -> str:
+    return json.dumps(point, sort_keys=True)
+
+
+class SweepEngine:
+    """
+        Multi-parameter UVC sweep over exposure x gain x white balance x ... grids at one or more resolutions.
+
+        The points are built by build_design(), ordered by order_points() and applied through
+        Camera_api.set_resolution() and Camera_api.set_uvc_many(), which skips parameters that did not change.
+        Every completed point is appended to a JSONL checkpoint file (flushed and synced to disk), and a run
+        with the same checkpoint file skips the points already in it, so an interrupted run resumes where it
+        stopped. When images are saved, a point is only checkpointed once its image is written.
+
+        The camera must be assigned; a headless stream is started if it is not streaming yet and stopped again
+        when the sweep ends. The stream is stopped for every resolution change and started again in the new mode,
+        so the capture never reads while the format is switched.
+    """
+
+    def __init__(self, camera_node: int, parameters: dict, resolutions: list = None, design: str = 'cartesian',
+                 samples: int = None, seed: int = 0, mode: int = 2, hold: float = 1, adaptive_hold: bool = True,
+                 checkpoint_path: str = None, costs: dict = None, measure=None, save_path: str = None,
+                 save_format: str = 'png'):
+        """
+            Parameters:
+                - camera_node (int): Assigned camera node.
+                - parameters (dict): UVC parameter name mapped to a list of values or a (start, end, step) tuple.
+                - resolutions (list): (format, width, height, fps) modes to sweep, None keeps the current mode.
+                - design, samples, seed: See build_design().
+                - mode (int): UVC mode used for every set, 2 - Manual.
+                - hold (float): Seconds to hold each point (upper bound with adaptive_hold).
+                - adaptive_hold (bool): Move on as soon as the image settled, see Camera_api.wait_for_settle().
+                - checkpoint_path (str): JSONL file recording the completed points, None disables resuming.
+                - costs (dict): Change cost per dimension, see order_points().
+                - measure (callable): Called with the FrameSnapshot of every point, its return value (JSON
+                  serialisable) is recorded. Defaults to the mean pixel value.
+                - save_path (str): Folder to save one image per point into, None saves nothing.
+                - save_format (str): Image format of the saved images.
+        """
+        self.camera_node = camera_node
+        self.mode = mode
+        self.hold = hold
+        self.adaptive_hold = adaptive_hold
+        self.checkpoint_path = checkpoint_path
+        self.measure = measure or (lambda snapshot: float(snapshot.frame.mean()))
+        self.save_path = save_path
+        self.save_format = save_format
+
+        dimensions = {name.lower(): expand_values(values) for name, values in parameters.items()}
+        if resolutions:
+            dimensions['resolution'] = [list(resolution) for resolution in resolutions]
+        self.points = order_points(build_design(dimensions, design, samples, seed), costs)
+
+    def load_checkpoint(self) -> dict:
+        """
+            Returns:
+                dict: Point key mapped to the recorded result of every point completed in an earlier run.
+        """
+        completed = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return completed
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    completed[record['key']] = record
+                except (ValueError, KeyError):
+                    continue  # a line cut short by a crash
+        return completed
+
+    def _checkpoint(self, checkpoint_file, record: dict):
+        if checkpoint_file is None:
+            return
+        checkpoint_file.write(json.dumps(record) + "\n")
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+
+    def _flush_writes(self, pending_writes: list, checkpoint_file, wait: bool):
+        """
+            Usage:
+                Checkpoints the points whose image write finished, in sweep order. A point whose write failed is
+                not checkpointed, a resumed run takes it again.
+
+            Returns:
+                Exception: The first write error, None if every write succeeded.
+        """
+        write_error = None
+        while pending_writes and (wait or pending_writes[0][0].done()):
+            future, record = pending_writes.pop(0)
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Unable to write {record['image']}: {e}")
+                write_error = write_error or e
+                continue
+            self._checkpoint(checkpoint_file, record)
+        return write_error
+
+    def _start_stream(self, headless: bool) -> int:
+        """
+            Returns:
+                int: 0 once the camera streams, otherwise the error code of Camera_api.show_stream().
+        """
+        if not ca.is_streaming_stopped(self.camera_node):
+            return 0
+        started = ca.show_stream(self.camera_node, 0, False, headless)
+        return 0 if started is True else started[1]
+
+    def run(self):
+        """
+            Usage:
+                Runs (or resumes) the sweep.
+
+            Returns:
+                tuple: The records of all points, earlier runs included, and 0 on success. Otherwise False and
+                       the Camera_api error code that stopped the sweep; the points completed so far are kept in
+                       the checkpoint.
+
+            Raises:
+                Exception: The error of a failed image write, once the sweep has finished.
+        """
+        completed = self.load_checkpoint()
+        records = [completed[point_key(point)] for point in self.points if point_key(point) in completed]
+        remaining = [point for point in self.points if point_key(point) not in completed]
+        print(f"Sweep: {len(self.points)} points, {len(records)} done earlier, {len(remaining)} to go")
+        if not remaining:
+            return records, 0
+
+        started_here = ca.is_streaming_stopped(self.camera_node)
+        session = ca.get_session(self.camera_node)
+        # A stream the caller started is restarted the way it ran, with or without its preview window
+        headless = started_here or session is None or session.headless
+        if self.save_path:
+            os.makedirs(self.save_path, exist_ok=True)
+
+        checkpoint_file = None
+        pending_writes = []  # (write future, record) of the points whose image is not written yet
+        write_error = None
+        current_resolution = None
+        try:
+            checkpoint_file = open(self.checkpoint_path, 'a') if self.checkpoint_path else None
+            for point in remaining:
+                started_at = time.monotonic()
+                resolution = point.get('resolution')
+                if resolution is not None and resolution != current_resolution:
+                    Format, width, height, FPS = resolution
+                    # The capture thread must not read while the format changes, and the stream's rings and
+                    # statistics are sized for the old mode
+                    if not ca.is_streaming_stopped(self.camera_node):
+                        ca.stop_stream(self.camera_node)
+                    status, error_code = ca.set_resolution(self.camera_node, width, height, Format, FPS)
+                    if error_code != 0:
+                        return False, error_code
+                    current_resolution = resolution
+                error_code = self._start_stream(headless)
+                if error_code != 0:
+                    return False, error_code
+                settings = {name: (value, self.mode) for name, value in point.items() if name != 'resolution'}
+                applied, error_code = ca.set_uvc_many(self.camera_node, settings, readback=False)
+                if error_code != 0:
+                    return False, error_code
+                set_time = time.monotonic()
+                if self.adaptive_hold:
+                    snapshot, error_code = ca.wait_for_settle(self.camera_node, set_time, self.hold)
+                else:
+                    time.sleep(self.hold)
+                    snapshot, error_code = ca.wait_for_frame(self.camera_node, after_timestamp=set_time)
+                if snapshot is None:
+                    return False, error_code
+
+                record = {'key': point_key(point), 'point': point, 'result': self.measure(snapshot),
+                          'seq': snapshot.seq, 'seconds': round(time.monotonic() - started_at, 4)}
+                if self.save_path:
+                    name = "_".join(f"{k}-{'x'.join(map(str, v)) if isinstance(v, list) else v}"
+                                    for k, v in sorted(point.items()))
+                    path = os.path.join(self.save_path, f"{name}.{self.save_format}")
+                    record['image'] = path
+                    pending_writes.append((get_image_writer().submit(path, snapshot.frame, self.save_format),
+                                           record))
+                    write_error = write_error or self._flush_writes(pending_writes, checkpoint_file, wait=False)
+                else:
+                    self._checkpoint(checkpoint_file, record)
+                records.append(record)
+        finally:
+            # Also on an early return or an exception: wait for the queued writes and checkpoint their points
+            write_error = write_error or self._flush_writes(pending_writes, checkpoint_file, wait=True)
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+            if started_here:
+                ca.stop_stream(self.camera_node)
+        if write_error is not None:
+            raise write_error
+        return records, 0
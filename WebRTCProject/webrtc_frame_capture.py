@@ -0,0 +1,207 @@
+import binascii
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+CAPTURE_FORMATS = ("rgba", "jpeg", "webp", "png")
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # base64 characters fetched per round trip
+
+# Draws the current video frame on a canvas and leaves it base64 encoded in window.__webrtcFrameCapture.
+# 'rgba' takes the raw pixels (getImageData), the other formats are encoded by canvas.toBlob. The base64 step is
+# FileReader's native encoder, not a JavaScript loop. Resolves to the frame's metadata and in-page timings.
+CAPTURE_FRAME_JS = """
+async (format, quality) => {
+    const video = document.querySelector('video');
+    const start = performance.now();
+    const width = video.videoWidth;
+    const height = video.videoHeight;
+    const canvas = document.createElement('canvas');
+    canvas.width = width;
+    canvas.height = height;
+    const ctx = canvas.getContext('2d', { willReadFrequently: format === 'rgba' });
+    ctx.drawImage(video, 0, 0, width, height);
+    const drawn = performance.now();
+    let blob;
+    if (format === 'rgba') {
+        blob = new Blob([ctx.getImageData(0, 0, width, height).data]);
+    } else {
+        blob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/' + format, quality));
+    }
+    const encoded = performance.now();
+    const dataUrl = await new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result);
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(blob);
+    });
+    window.__webrtcFrameCapture = dataUrl.slice(dataUrl.indexOf(',') + 1);
+    return {
+        width: width, height: height, mime: blob.type || 'application/octet-stream', bytes: blob.size,
+        length: window.__webrtcFrameCapture.length, draw_ms: drawn - start, encode_ms: encoded - drawn,
+        base64_ms: performance.now() - encoded
+    };
+}
+"""
+FETCH_CHUNK_JS = "window.__webrtcFrameCapture.substr({offset}, {size})"
+RELEASE_JS = "delete window.__webrtcFrameCapture; true"
+
+
+class FrameTransport:
+    """
+    Runs the capture scripts through CDP (Runtime.evaluate) on Chromium based browsers, otherwise through
+    WebDriver's execute_async_script / execute_script.
+    """
+
+    def __init__(self, driver, transport="auto"):
+        if transport not in ("auto", "cdp", "webdriver"):
+            raise ValueError(f"Unknown transport: {transport}")
+        if transport == "auto":
+            transport = "cdp" if hasattr(driver, "execute_cdp_cmd") else "webdriver"
+        self.driver = driver
+        self.name = transport
+
+    def _evaluate(self, expression, await_promise=False):
+        response = self.driver.execute_cdp_cmd("Runtime.evaluate", {
+            "expression": expression, "awaitPromise": await_promise, "returnByValue": True})
+        if "exceptionDetails" in response:
+            raise RuntimeError(f"Frame capture script failed: {response['exceptionDetails'].get('text')}")
+        return response["result"].get("value")
+
+    def capture(self, capture_format, quality):
+        if self.name == "cdp":
+            return self._evaluate(f"({CAPTURE_FRAME_JS})({json.dumps(capture_format)}, {float(quality)})", True)
+        meta = self.driver.execute_async_script(
+            "const done = arguments[arguments.length - 1];"
+            f"({CAPTURE_FRAME_JS})(arguments[0], arguments[1]).then(done, (e) => done({{error: String(e)}}));",
+            capture_format, quality)
+        if meta and "error" in meta:
+            raise RuntimeError(f"Frame capture script failed: {meta['error']}")
+        return meta
+
+    def fetch(self, offset, size):
+        expression = FETCH_CHUNK_JS.format(offset=offset, size=size)
+        if self.name == "cdp":
+            return self._evaluate(expression)
+        return self.driver.execute_script("return " + expression + ";")
+
+    def release(self):
+        try:
+            if self.name == "cdp":
+                self._evaluate(RELEASE_JS)
+            else:
+                self.driver.execute_script(RELEASE_JS + ";")
+        except Exception:
+            pass
+
+
+def capture_video_frame(driver, capture_format="rgba", quality=0.92, chunk_size=DEFAULT_CHUNK_SIZE,
+                        transport="auto", decode=True):
+    """
+    Grabs the current frame of the page's <video> element at its native resolution.
+
+    Instead of a PNG data URL the frame is transferred as raw RGBA pixels (no encoding at all) or as JPEG/WebP
+    at the given quality, in base64 chunks of chunk_size characters (or through CDP where available), and
+    decoded straight into a preallocated buffer.
+
+    Args:
+        driver: Selenium WebDriver instance.
+        capture_format (str): "rgba", "jpeg", "webp" or "png".
+        quality (float): JPEG/WebP quality between 0 and 1.
+        chunk_size (int): Base64 characters fetched per round trip.
+        transport (str): "auto", "cdp" or "webdriver".
+        decode (bool): Decode the frame into a BGR array. Without it only the transferred bytes are returned.
+
+    Returns:
+        tuple: (frame, data, timings). frame is the BGR numpy array (None without decode), data the transferred
+               bytes (raw RGBA or the encoded image), timings a dict of the in-page draw/encode/base64 times and
+               the script, transfer, decode and total times in milliseconds, with the transport and sizes.
+    """
+    if capture_format not in CAPTURE_FORMATS:
+        raise ValueError(f"Unknown capture format: {capture_format}")
+    start = time.perf_counter()
+    channel = FrameTransport(driver, transport)
+    chunk_size -= chunk_size % 4  # every chunk decodes on its own
+    try:
+        meta = channel.capture(capture_format, quality)
+        captured = time.perf_counter()
+        if not meta or not meta["width"] or not meta["height"]:
+            raise RuntimeError("The video element has no frame yet")
+
+        length = meta["length"]
+        data = bytearray(meta["bytes"])
+        view = memoryview(data)
+        position = 0
+        chunks = 0
+        for offset in range(0, length, chunk_size):
+            decoded = binascii.a2b_base64(channel.fetch(offset, chunk_size))
+            view[position:position + len(decoded)] = decoded
+            position += len(decoded)
+            chunks += 1
+        transferred = time.perf_counter()
+    finally:
+        channel.release()
+
+    frame = None
+    if decode:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if capture_format == "rgba":
+            frame = cv2.cvtColor(buffer.reshape(meta["height"], meta["width"], 4), cv2.COLOR_RGBA2BGR)
+        else:
+            frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+            if frame is None:
+                raise RuntimeError(f"Unable to decode the {meta['mime']} frame")
+    decoded_at = time.perf_counter()
+
+    timings = {
+        "format": capture_format,
+        "mime": meta["mime"],
+        "transport": channel.name,
+        "width": meta["width"],
+        "height": meta["height"],
+        "bytes": meta["bytes"],
+        "chunks": chunks,
+        "draw_ms": meta["draw_ms"],
+        "encode_ms": meta["encode_ms"],
+        "base64_ms": meta["base64_ms"],
+        "script_ms": (captured - start) * 1000,
+        "transfer_ms": (transferred - captured) * 1000,
+        "decode_ms": (decoded_at - transferred) * 1000,
+        "total_ms": (decoded_at - start) * 1000,
+    }
+    return frame, data, timings
+
+
+def save_video_frame(driver, save_path, capture_format="rgba", quality=0.92, transport="auto"):
+    """
+    Captures the current video frame and writes it to save_path.
+
+    Encoded captures are written as they arrived when save_path has the matching extension, everything else
+    (raw RGBA in particular) is decoded and encoded by OpenCV in the format of save_path's extension.
+
+    Returns:
+        dict: The capture timings, plus the write time in write_ms.
+    """
+    extension = os.path.splitext(save_path)[1].lower().lstrip(".")
+    matching = {"jpeg": ("jpg", "jpeg"), "webp": ("webp",), "png": ("png",)}.get(capture_format, ())
+    direct = extension in matching
+    frame, data, timings = capture_video_frame(driver, capture_format, quality, transport=transport,
+                                               decode=not direct)
+    start = time.perf_counter()
+    if direct:
+        with open(save_path, "wb") as file:
+            file.write(data)
+    elif not cv2.imwrite(save_path, frame):
+        raise IOError(f"Unable to write {save_path}")
+    timings["write_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def format_timings(timings):
+    return (f"{timings['width']}x{timings['height']} {timings['format']} via {timings['transport']}: "
+            f"{timings['bytes'] / 1024:.0f} KiB in {timings['chunks']} chunk(s), "
+            f"draw {timings['draw_ms']:.1f} ms, encode {timings['encode_ms']:.1f} ms, "
+            f"transfer {timings['transfer_ms']:.1f} ms, decode {timings['decode_ms']:.1f} ms, "
+            f"total {timings['total_ms']:.1f} ms")
@@ -0,0 +1,218 @@
+import time
+
+import numpy as np
+
+# Columns of a collected frame record
+FIELDS = ("presented_frames", "media_time", "expected_display_time", "processing_duration", "width", "height",
+          "callback_time")
+DEFAULT_CAPACITY = 4096  # frames kept in the page, over a minute at 60 fps
+
+# Registers a requestVideoFrameCallback chain on the page's <video> element that writes one record (FIELDS) per
+# presented frame into a Float64Array ring. Installing again cancels the previous chain and starts an empty ring.
+# Returns false if the browser has no requestVideoFrameCallback.
+INSTALL_COLLECTOR_JS = """
+const capacity = arguments[0];
+const fieldCount = arguments[1];
+const video = document.querySelector('video');
+if (!video || !('requestVideoFrameCallback' in HTMLVideoElement.prototype)) {
+    return false;
+}
+const previous = window.__webrtcFrameStats;
+if (previous && previous.handle !== null) {
+    previous.video.cancelVideoFrameCallback(previous.handle);
+}
+const stats = {
+    video: video, capacity: capacity, records: new Float64Array(capacity * fieldCount), written: 0, handle: null
+};
+const onFrame = (now, metadata) => {
+    const offset = (stats.written % stats.capacity) * fieldCount;
+    stats.records[offset] = metadata.presentedFrames;
+    stats.records[offset + 1] = metadata.mediaTime;
+    stats.records[offset + 2] = metadata.expectedDisplayTime;
+    stats.records[offset + 3] = metadata.processingDuration === undefined ? -1 : metadata.processingDuration;
+    stats.records[offset + 4] = metadata.width;
+    stats.records[offset + 5] = metadata.height;
+    stats.records[offset + 6] = now;
+    stats.written += 1;
+    stats.handle = video.requestVideoFrameCallback(onFrame);
+};
+stats.handle = video.requestVideoFrameCallback(onFrame);
+window.__webrtcFrameStats = stats;
+return true;
+"""
+
+# Returns the records written since arguments[0] in one flat array, oldest first. Records already overwritten in
+# the ring are skipped, 'since' tells where the returned records start.
+READ_COLLECTOR_JS = """
+const stats = window.__webrtcFrameStats;
+const fieldCount = arguments[1];
+if (!stats) {
+    return null;
+}
+const written = stats.written;
+const since = Math.max(arguments[0], written - stats.capacity);
+const start = (since % stats.capacity) * fieldCount;
+const count = (written - since) * fieldCount;
+const head = stats.records.subarray(start, Math.min(start + count, stats.records.length));
+const tail = stats.records.subarray(0, count - head.length);
+return {since: since, written: written, values: Array.from(head).concat(Array.from(tail))};
+"""
+
+
+def summarize_frame_stats(records, expected_resolution=None, stall_factor=3.0, min_stall_ms=100.0):
+    """
+    Computes the delivery statistics of collected frame records.
+
+    Args:
+        records (numpy.ndarray): (frames, len(FIELDS)) records, see FrameStatsCollector.records().
+        expected_resolution (tuple): (width, height) the stream should run at.
+        stall_factor (float): A frame interval longer than stall_factor times the median interval is a stall.
+        min_stall_ms (float): Intervals shorter than this are never stalls.
+
+    Returns:
+        dict: frames, seconds, fps (presented frames per second), missed_callbacks (frames presented without a
+              callback), interval_ms_mean / _p95 / _max, jitter_ms (standard deviation of the frame interval),
+              stalls and stall_ms, processing_ms_mean (None if the browser does not report it), resolutions
+              (frames per "WxH") and resolution_match (fraction of frames at expected_resolution).
+    """
+    summary = {"frames": len(records), "seconds": 0.0, "fps": 0.0, "missed_callbacks": 0, "interval_ms_mean": None,
+               "interval_ms_p95": None, "interval_ms_max": None, "jitter_ms": None, "stalls": 0, "stall_ms": 0.0,
+               "processing_ms_mean": None, "resolutions": {}, "resolution_match": None}
+    if len(records) == 0:
+        return summary
+    presented = records[:, 0]
+    callback_time = records[:, 6]
+    sizes, counts = np.unique(records[:, 4:6].astype(np.int64), axis=0, return_counts=True)
+    summary["resolutions"] = {f"{width}x{height}": int(count) for (width, height), count in zip(sizes, counts)}
+    if expected_resolution is not None:
+        matching = (records[:, 4] == expected_resolution[0]) & (records[:, 5] == expected_resolution[1])
+        summary["resolution_match"] = float(matching.mean())
+    processing = records[:, 3][records[:, 3] >= 0]
+    if len(processing):
+        summary["processing_ms_mean"] = float(processing.mean() * 1000)
+    if len(records) < 2:
+        return summary
+
+    intervals = np.diff(callback_time)
+    seconds = (callback_time[-1] - callback_time[0]) / 1000
+    stall_threshold = max(min_stall_ms, stall_factor * float(np.median(intervals)))
+    stalls = intervals[intervals > stall_threshold]
+    summary.update({
+        "seconds": float(seconds),
+        "fps": float((presented[-1] - presented[0]) / seconds) if seconds > 0 else 0.0,
+        "missed_callbacks": int(np.maximum(np.diff(presented) - 1, 0).sum()),
+        "interval_ms_mean": float(intervals.mean()),
+        "interval_ms_p95": float(np.percentile(intervals, 95)),
+        "interval_ms_max": float(intervals.max()),
+        "jitter_ms": float(intervals.std()),
+        "stalls": int(len(stalls)),
+        "stall_ms": float(stalls.sum()),
+    })
+    return summary
+
+
+def format_frame_stats(summary):
+    if not summary.get("supported", True):
+        return "Frame timing not available (no requestVideoFrameCallback in this browser)"
+    if summary["frames"] < 2:
+        return f"{summary['frames']} frame(s) presented"
+    return (f"{summary['frames']} frames in {summary['seconds']:.1f} s: {summary['fps']:.1f} fps, "
+            f"interval {summary['interval_ms_mean']:.1f} ms (p95 {summary['interval_ms_p95']:.1f}, "
+            f"max {summary['interval_ms_max']:.1f}), jitter {summary['jitter_ms']:.1f} ms, "
+            f"{summary['stalls']} stall(s) ({summary['stall_ms']:.0f} ms), "
+            f"resolutions {summary['resolutions']}")
+
+
+class FrameStatsCollector:
+    """
+    Collects the timing of every frame the page's <video> element presents.
+
+    The page records each frame itself (requestVideoFrameCallback into a typed-array ring) and Python fetches
+    the new records in bulk, one WebDriver round trip per poll instead of one per check. Poll at least once per
+    capacity frames, older records are overwritten (counted in 'lost').
+    """
+
+    def __init__(self, driver, capacity=DEFAULT_CAPACITY, expected_resolution=None):
+        """
+        Args:
+            driver: Selenium WebDriver instance.
+            capacity (int): Records the page keeps between polls.
+            expected_resolution (tuple): (width, height) the summary checks the frames against.
+        """
+        self.driver = driver
+        self.capacity = capacity
+        self.expected_resolution = expected_resolution
+        self.supported = False
+        self.next_record = 0
+        self.lost = 0
+        self.chunks = []
+
+    def install(self):
+        """
+        Starts collecting from an empty ring. Frames collected so far are dropped.
+
+        Returns:
+            bool: False if the browser does not support requestVideoFrameCallback.
+        """
+        self.supported = bool(self.driver.execute_script(INSTALL_COLLECTOR_JS, self.capacity, len(FIELDS)))
+        self.next_record = 0
+        self.lost = 0
+        self.chunks = []
+        return self.supported
+
+    def poll(self):
+        """
+        Fetches the records written since the previous poll.
+
+        Returns:
+            int: Number of new records.
+        """
+        if not self.supported:
+            return 0
+        batch = self.driver.execute_script(READ_COLLECTOR_JS, self.next_record, len(FIELDS))
+        if not batch:
+            return 0
+        self.lost += batch["since"] - self.next_record
+        self.next_record = batch["written"]
+        values = np.asarray(batch["values"], dtype=np.float64).reshape(-1, len(FIELDS))
+        if len(values):
+            self.chunks.append(values)
+        return len(values)
+
+    def records(self):
+        """
+        Returns:
+            numpy.ndarray: (frames, len(FIELDS)) float64 records of every fetched frame, oldest first.
+        """
+        if not self.chunks:
+            return np.empty((0, len(FIELDS)), dtype=np.float64)
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        return self.chunks[0]
+
+    def summary(self):
+        """
+        Returns:
+            dict: summarize_frame_stats() of the fetched records, with 'supported' and 'lost'.
+        """
+        summary = summarize_frame_stats(self.records(), self.expected_resolution)
+        summary["supported"] = self.supported
+        summary["lost"] = self.lost
+        return summary
+
+    def monitor(self, duration, interval=1.0):
+        """
+        Polls once per interval seconds for duration seconds, sleeping in between.
+
+        Returns:
+            dict: The summary, see summary().
+        """
+        end_time = time.perf_counter() + duration
+        while True:
+            remaining = end_time - time.perf_counter()
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+            self.poll()
+        self.poll()
+        return self.summary()
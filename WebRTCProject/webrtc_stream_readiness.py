@@ -0,0 +1,102 @@
+from selenium.common.exceptions import TimeoutException
+
+STREAM_READY_TIMEOUT = 10.0  # seconds
+
+# Resolves once the page's <video> is playing at the expected size: on a playing, resize or loadedmetadata event,
+# or at once if it already is (and nothing is clicked). Gives up after the timeout. The optional element is
+# clicked after the listeners are attached, so no event can be missed. All times are performance.now() values.
+WAIT_FOR_STREAM_JS = """
+const expected = arguments[0];
+const timeoutMs = arguments[1];
+const clickTarget = arguments[2];
+const done = arguments[arguments.length - 1];
+const video = document.querySelector('video');
+const start = performance.now();
+const events = [];
+let clickTime = null;
+if (!video) {
+    done({ready: false, error: 'No video element on the page', events: events, start: start,
+          time_origin: performance.timeOrigin});
+    return;
+}
+const eventTypes = ['loadedmetadata', 'playing', 'resize'];
+const matches = () => video.videoWidth > 0 && !video.paused && video.readyState >= 2 &&
+    (!expected || (video.videoWidth === expected[0] && video.videoHeight === expected[1]));
+let finished = false;
+let timer = null;
+const finish = (ready, error) => {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    clearTimeout(timer);
+    eventTypes.forEach((type) => video.removeEventListener(type, onEvent));
+    done({ready: ready, error: error, events: events, width: video.videoWidth, height: video.videoHeight,
+          start: start, click_time: clickTime, ready_time: ready ? performance.now() : null,
+          time_origin: performance.timeOrigin});
+};
+const onEvent = (event) => {
+    events.push({type: event.type, time: performance.now(), width: video.videoWidth, height: video.videoHeight});
+    if (matches()) {
+        finish(true, null);
+    }
+};
+eventTypes.forEach((type) => video.addEventListener(type, onEvent));
+timer = setTimeout(() => finish(false, 'Timed out after ' + timeoutMs + ' ms at ' + video.videoWidth + 'x' +
+    video.videoHeight), timeoutMs);
+if (clickTarget) {
+    clickTime = performance.now();
+    clickTarget.click();
+} else if (matches()) {
+    finish(true, null);
+}
+"""
+
+
+def wait_for_stream(driver, resolution=None, timeout=STREAM_READY_TIMEOUT, click=None):
+    """
+    Waits in the page, in a single execute_async_script call, until the video plays at the given resolution.
+
+    Args:
+        driver: Selenium WebDriver instance.
+        resolution (tuple): (width, height) videoWidth/videoHeight must reach, None for any size.
+        timeout (float): Seconds to wait before giving up.
+        click: WebElement clicked in the page once the listeners are attached, e.g. a resolution button.
+
+    Returns:
+        dict: 'ready', 'error' (why it is not ready), 'width'/'height' of the video, 'events' (type, time in ms
+              since the wait started and video size of every event), 'click_epoch_ms' / 'ready_epoch_ms'
+              (wall clock of the page, None if not clicked / not ready) and 'latency_ms' (click to ready).
+    """
+    # The page gives up first, WebDriver's own script timeout only catches a page that never answers. The driver
+    # may be a pooled one, its timeout is restored for the next job.
+    previous_timeout = driver.timeouts.script
+    if previous_timeout < timeout + 5:
+        driver.set_script_timeout(timeout + 5)
+    try:
+        raw = driver.execute_async_script(WAIT_FOR_STREAM_JS, list(resolution) if resolution else None,
+                                          int(timeout * 1000), click)
+    except TimeoutException:
+        return {"ready": False, "error": "The page did not answer", "width": None, "height": None, "events": [],
+                "click_epoch_ms": None, "ready_epoch_ms": None, "latency_ms": None}
+    finally:
+        if previous_timeout < timeout + 5:
+            driver.set_script_timeout(previous_timeout)
+
+    def epoch_ms(page_time):
+        return None if page_time is None else raw["time_origin"] + page_time
+
+    latency_ms = None
+    if raw.get("ready_time") is not None and raw.get("click_time") is not None:
+        latency_ms = raw["ready_time"] - raw["click_time"]
+    return {
+        "ready": raw["ready"],
+        "error": raw.get("error"),
+        "width": raw.get("width"),
+        "height": raw.get("height"),
+        "events": [{"type": event["type"], "time_ms": event["time"] - raw["start"], "width": event["width"],
+                    "height": event["height"]} for event in raw["events"]],
+        "click_epoch_ms": epoch_ms(raw.get("click_time")),
+        "ready_epoch_ms": epoch_ms(raw.get("ready_time")),
+        "latency_ms": latency_ms,
+    }
@@ -1,14 +1,30 @@
 import os
 import cv2
-from selenium import webdriver
 from selenium.webdriver import ActionChains, Keys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.edge.options import Options as EdgeOptions
 import time
 from Camera_Test_Automation_API import Camera_api as ca
+from browser_pool import BrowserPool
+from camera_device_registry import device_registry
 from datetime import datetime
+from webrtc_frame_capture import format_timings, save_video_frame
+from webrtc_frame_stats import FrameStatsCollector, format_frame_stats
+from webrtc_stream_readiness import STREAM_READY_TIMEOUT, wait_for_stream
+
+# Resolutions offered by the WebRTC resolution sample page and the label of their button
+WEBRTC_RESOLUTIONS = {
+    (320, 180): "180p (320x180)",
+    (320, 240): "QVGA (320x240)",
+    (640, 360): "360p (640x360)",
+    (640, 480): "VGA (640x480)",
+    (1280, 720): "HD/720p (1280x720)",
+    (1920, 1080): "Full HD/1080p (1920x1080)",
+    (3840, 2160): "Television 4K/2160p (3840x2160)",
+    (4096, 2160): "Cinema 4K (4096x2160)",
+    (7680, 4320): "8k"
+}
+WEBRTC_URL = "https://webrtc.github.io/samples/src/content/getusermedia/resolution/"
+
 
 def get_valid_camera_index(camera_name):
     """
@@ -17,31 +33,14 @@ def get_valid_camera_index(camera_name):
     Returns:
         int: The index of the camera if found, otherwise -1.
     """
-    import cv2 as cv
-    import gc
-
-    cap = cv.VideoCapture()
-    devices = cap.getDevices()
-    for i in range(devices[1]):
-        if camera_name == cap.getDeviceInfo(i)[1]:
-            cap.release()
-            del cap
-            gc.collect()
-            return i
-    cap.release()
-    del cap
-    gc.collect()
-    return -1
+    return device_registry.get_index(camera_name)
 
 
 def get_usb_camera_resolutions(camera_index):
-    ret, value = ca.assign_camera(camera_index)
-    if ret:
-        supported_resolutions = ca.get_supported_resolution(camera_index)
-        print(supported_resolutions)
-        unique_resolutions = sorted({(width, height) for _, width, height, _ in supported_resolutions[0]})
+    capabilities, value = ca.get_capabilities(camera_index)
+    if capabilities:
+        unique_resolutions = sorted({(width, height) for _, width, height, _ in capabilities['formats']})
         print("Unique resolutions supported by the camera:", unique_resolutions)
-        ca.release_camera(camera_index)
         return unique_resolutions, True
     else:
         error_description, _ = ca.get_error_description(value)
@@ -65,47 +64,53 @@ def log_web_rtc_errors(driver):
             print(f"WebRTC Log: {entry['message']}")
 
 
-def is_stream_active(driver, screenshot_path=None):
+def format_page_time(epoch_ms):
+    """
+    Formats a wall clock time of the page (milliseconds since the epoch) as HH:MM:SS:MS.
     """
-    Confirm that the stream is active on the WebRTC page by checking the video element.
-    If a screenshot path is provided, captures a screenshot of the video element.
+    return datetime.fromtimestamp(epoch_ms / 1000).strftime("%H:%M:%S:%f")[:-3]
+
+
+def is_stream_active(driver, screenshot_path=None, resolution=None, button=None, timeout=STREAM_READY_TIMEOUT):
+    """
+    Confirm that the stream is active on the WebRTC page: waits in the page for the video element to play at the
+    requested resolution (see webrtc_stream_readiness.wait_for_stream), with a timeout.
 
     Args:
         driver: Selenium WebDriver instance.
         screenshot_path (str): Path to save the screenshot. Optional.
+        resolution (tuple): (width, height) the video must play at, None for any size.
+        button: Button clicked once the page listens for the video events, e.g. the resolution button.
+        timeout (float): Seconds to wait for the stream.
 
     Returns:
-        tuple: (bool, str) - True if the stream is active, otherwise False.
+        tuple: (bool, str, dict) - True if the stream is active, otherwise False.
                The timestamp (in HH:MM:SS:MS format) when the stream became active, or None if it failed.
+               The readiness details: the in-page timestamps of the video events and the click to ready latency.
     """
+    readiness = {"ready": False, "error": None, "events": [], "click_epoch_ms": None, "ready_epoch_ms": None,
+                 "latency_ms": None}
     try:
-        video_element = driver.find_element(By.TAG_NAME, "video")
-        while True:
-            if video_element.is_displayed():
-                stream_start_time = datetime.now().strftime("%H:%M:%S:%f")[:-3]  # Format with milliseconds
-                print("Stream is active.")
-                return True, stream_start_time
+        readiness = wait_for_stream(driver, resolution, timeout, click=button)
+        if readiness["ready"]:
+            print("Stream is active.")
+            return True, format_page_time(readiness["ready_epoch_ms"]), readiness
+        print(f"Stream check failed: {readiness['error']}")
     except Exception as e:
         print(f"Stream check failed: {e}")
-    return False, None
+    return False, None, readiness
 
 
-def capture_full_video_frame(driver, base_path):
+def capture_full_video_frame(driver, base_path, capture_format="rgba"):
     """
-    Captures the full video frame from the video element using a canvas and saves it with a precise timestamp.
+    Captures the full video frame from the video element at its native resolution and saves it with a precise
+    timestamp. The frame is transferred as raw pixels (or JPEG/WebP) instead of a PNG data URL, see
+    webrtc_frame_capture.capture_video_frame().
 
     Args:
         driver: Selenium WebDriver instance.
         base_path: Base path to save the captured image. The function appends a timestamp to the filename.
-    """
-    script = """
-        const video = document.querySelector('video');
-        const canvas = document.createElement('canvas');
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
-        const ctx = canvas.getContext('2d');
-        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-        return canvas.toDataURL('image/png');
+        capture_format: "rgba" (saved as PNG), "jpeg", "webp" or "png".
     """
     try:
         # Capture the timestamp immediately before executing the script
@@ -113,17 +118,11 @@ def capture_full_video_frame(driver, base_path):
         timestamp = now.strftime("%H_%M_%S") + f"_{now.microsecond // 1000:02d}"  # Format with exactly 3 digits for milliseconds
 
         # Construct the full save path with the timestamp
-        save_path = f"{base_path}_{timestamp}.png"
-
-        # Execute the JavaScript to capture the video frame
-        base64_image = driver.execute_script(script)
+        extension = {"jpeg": "jpg", "webp": "webp"}.get(capture_format, "png")
+        save_path = f"{base_path}_{timestamp}.{extension}"
 
-        # Decode the base64 image and save it to the specified path
-        import base64
-        with open(save_path, "wb") as file:
-            file.write(base64.b64decode(base64_image.split(",")[1]))
-
-        print(f"Full video frame saved to {save_path} at {timestamp}")
+        timings = save_video_frame(driver, save_path, capture_format)
+        print(f"Full video frame saved to {save_path} at {timestamp} ({format_timings(timings)})")
 
         return save_path  # Optionally return the save path
     except Exception as e:
@@ -143,42 +142,33 @@ def stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration
         duration (int): Duration to stream in seconds.
         cam_name (str): Name of the camera being tested.
         browser_name (str): Name of the browser being used.
+
+    Returns:
+        dict: 'resolution', 'streamed' (the stream played at the resolution), 'latency_ms' (button click to active
+              stream), 'events' (in-page timestamps of the video events), 'image' (path of the captured frame)
+              and 'frame_stats' (delivered FPS, frame interval jitter and stalls, see
+              webrtc_frame_stats.summarize_frame_stats) of the run.
     """
     button_label = webrtc_resolutions[resolution]
     buttons = driver.find_elements(By.TAG_NAME, "button")
+    result = {"resolution": resolution, "streamed": False, "latency_ms": None, "image": None, "frame_stats": None,
+              "events": []}
 
     # Find and click the button matching the resolution
     for button in buttons:
         if button.text == button_label:
-            # Use JavaScript to capture the exact click time
-            script = """
-                const button = arguments[0];
-                const clickTime = new Date(); // Get the actual current time
-                const localTime = clickTime.toLocaleTimeString('en-US', { 
-                    hour12: false, 
-                    hour: '2-digit', 
-                    minute: '2-digit', 
-                    second: '2-digit' 
-                }); // Get local time in HH:MM:SS format
-                const milliseconds = clickTime.getMilliseconds(); // Get milliseconds separately
-                button.click();
-                return localTime + ':' + ('000' + milliseconds).slice(-3); // Combine time and milliseconds
-            """
-            button_click_time = driver.execute_script(script, button)
-            print(f"Button clicked at {button_click_time} (local time).")
-
-            # Validate stream and capture latency
-            stream_active, stream_start_time = is_stream_active(driver)
+            # The page clicks the button and waits for the video to play at the new resolution, so the click and
+            # the stream start are timed by the same clock
+            stream_active, stream_start_time, readiness = is_stream_active(driver, resolution=resolution, button=button)
+            if readiness["click_epoch_ms"] is not None:
+                print(f"Button clicked at {format_page_time(readiness['click_epoch_ms'])} (local time).")
             print("stream_start_time: ", stream_start_time)
+            result["events"] = readiness["events"]
             if stream_active:
-                # Calculate the latency in seconds and milliseconds
-                time_format = "%H:%M:%S:%f"
-                button_click_dt = datetime.strptime(button_click_time, time_format)
-                stream_start_dt = datetime.strptime(stream_start_time, time_format)
-                time_difference = stream_start_dt - button_click_dt
-                time_difference_ms = time_difference.total_seconds() * 1000
-
-                print(f"Time difference: {time_difference}, which is {time_difference_ms:.3f} ms.")
+                time_difference_ms = readiness["latency_ms"]
+                print(f"Time difference: {time_difference_ms:.3f} ms.")
+                result["streamed"] = True
+                result["latency_ms"] = time_difference_ms
 
                 # Create a directory for the browser and resolution screenshots
                 browser_folder = os.path.join("Captured_Images", browser_name)
@@ -186,28 +176,36 @@ def stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration
                     os.makedirs(browser_folder)
 
                 end_time = time.time() + duration  # Define the end time for streaming
-                image_captured = False
-
-                while time.time() < end_time:
-                    base_path = os.path.join(browser_folder, f"{browser_name}_{cam_name}_Stream_{resolution[0]}x{resolution[1]}")
+                base_path = os.path.join(browser_folder, f"{browser_name}_{cam_name}_Stream_{resolution[0]}x{resolution[1]}")
 
+                # Retry until a valid image is written, the video may not have a frame yet on the first attempt
+                while result["image"] is None and time.time() < end_time:
                     try:
-                        if not image_captured:
-                            screenshot_path = capture_full_video_frame(driver, base_path)  # The function appends the timestamp
-                            if screenshot_path and os.path.getsize(screenshot_path) > 0:
-                                print(f"Valid image captured: {screenshot_path}")
-                                image_captured = True
-                            else:
-                                print(f"Failed to capture image: {screenshot_path} (file is 0 bytes)")
-                                if screenshot_path:
-                                    os.remove(screenshot_path)  # Delete invalid file
+                        screenshot_path = capture_full_video_frame(driver, base_path)  # The function appends the timestamp
+                        if screenshot_path and os.path.getsize(screenshot_path) > 0:
+                            print(f"Valid image captured: {screenshot_path}")
+                            result["image"] = screenshot_path
+                        else:
+                            print(f"Failed to capture image: {screenshot_path} (file is 0 bytes)")
+                            if screenshot_path:
+                                os.remove(screenshot_path)  # Delete invalid file
                     except Exception as e:
                         print(f"Error during image capture: {e}")
-
+                    if result["image"] is None:
+                        time.sleep(0.2)
+
+                # The capture blocks the page's main thread, frame timing is only recorded once it is done, so
+                # the test does not measure a stall it caused itself. Stream for the rest of the duration,
+                # fetching the frame timings once per second.
+                collector = FrameStatsCollector(driver, expected_resolution=resolution)
+                collector.install()
+                result["frame_stats"] = collector.monitor(end_time - time.time())
+                print(f"Frame timing at {button_label}: {format_frame_stats(result['frame_stats'])}")
                 print(f"Finished streaming at resolution: {button_label}")
             else:
                 print(f"Failed to stream at resolution: {button_label}")
             break
+    return result
 
 
 def select_camera_from_dropdown(driver, camera_name):
@@ -249,7 +247,7 @@ def select_camera_from_dropdown(driver, camera_name):
         print(f"Error selecting camera from dropdown: {e}")
 
 
-def main(camera_names, duration, browser_choices):
+def main(camera_names, duration, browser_choices, pool=None):
     """
     Main function to stream from multiple cameras and capture valid images at the given duration.
 
@@ -257,7 +255,12 @@ def main(camera_names, duration, browser_choices):
         camera_names (list): List of camera names to stream from.
         duration (int): Duration to stream in seconds for each camera and resolution.
         browser_choices (list): List of browsers to test (e.g., ["Chrome", "Edge"]).
+        pool (BrowserPool): Pool of warm browsers to run on. By default a pool is created for this run, so each
+            browser starts once and is reused for every camera.
     """
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool()
     try:
         for camera_name in camera_names:
             print(f"\nProcessing camera: {camera_name}")
@@ -280,18 +283,7 @@ def main(camera_names, duration, browser_choices):
                 print(f"Error fetching resolutions for {camera_name}: {usb_resolutions}")
                 continue
 
-            # Define WebRTC resolutions
-            webrtc_resolutions = {
-                (320, 180): "180p (320x180)",
-                (320, 240): "QVGA (320x240)",
-                (640, 360): "360p (640x360)",
-                (640, 480): "VGA (640x480)",
-                (1280, 720): "HD/720p (1280x720)",
-                (1920, 1080): "Full HD/1080p (1920x1080)",
-                (3840, 2160): "Television 4K/2160p (3840x2160)",
-                (4096, 2160): "Cinema 4K (4096x2160)",
-                (7680, 4320): "8k"
-            }
+            webrtc_resolutions = WEBRTC_RESOLUTIONS
 
             # Map USB resolutions to WebRTC resolutions
             matched_resolutions = map_resolutions_to_webrtc(usb_resolutions, webrtc_resolutions)
@@ -299,58 +291,23 @@ def main(camera_names, duration, browser_choices):
                 print(f"No matching resolutions found between USB camera and WebRTC for: {camera_name}")
                 continue
 
-            webrtc_url = "https://webrtc.github.io/samples/src/content/getusermedia/resolution/"
-
-            # Supported browsers with corresponding options and drivers
-            browsers = {
-                "Chrome": (Options(), webdriver.Chrome),
-                "Edge": (EdgeOptions(), webdriver.Edge),
-                "Firefox": (FirefoxOptions(), webdriver.Firefox),
-            }
+            webrtc_url = WEBRTC_URL
 
             for browser_choice in browser_choices:
-                if browser_choice not in browsers:
+                if browser_choice not in pool.browsers:
                     print(f"Unsupported browser: {browser_choice}. Skipping...")
                     continue
 
-                options, browser_driver = browsers[browser_choice]
                 print(f"Testing on {browser_choice}...")
 
-                if browser_choice == "Chrome":
-                    options.add_argument("--use-fake-ui-for-media-stream")
-                    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
-                    options.add_experimental_option("prefs", {
-                        "profile.default_content_setting_values.media_stream_camera": 1,
-                        "profile.default_content_setting_values.media_stream_mic": 1,
-                    })
-
-                elif browser_choice == "Edge":
-                    options.add_argument("--use-fake-ui-for-media-stream")
-                    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
-                    options.add_experimental_option("prefs", {
-                        "profile.default_content_setting_values.media_stream_camera": 1,
-                        "profile.default_content_setting_values.media_stream_mic": 1,
-                    })
-
-                elif browser_choice == "Firefox":
-                    options.set_preference("dom.disable_open_during_load", False)
-                    options.set_preference("media.navigator.permission.disabled", True)
-                    options.set_preference("media.navigator.streams.fake", False)
-                    options.set_preference("privacy.resistFingerprinting", False)
-                    options.set_preference("media.getusermedia.screensharing.enabled", True)
-
-                driver = browser_driver(options=options)
-
-                try:
-                    driver.get(webrtc_url)
+                # A warm browser from the pool, its page is reset (camera released) when the block ends
+                with pool.session(browser_choice, webrtc_url) as driver:
                     # Select the camera from the dropdown
                     select_camera_from_dropdown(driver, camera_name)
 
                     for resolution in matched_resolutions:
                         print(f"Attempting to stream in resolution: {resolution}")
                         stream_camera_in_resolution(driver, resolution, webrtc_resolutions, duration, camera_name, browser_choice)
-                finally:
-                    driver.quit()
 
     except cv2.error as cv_err:
         # Handle OpenCV error when the camera is in use
@@ -365,6 +322,10 @@ def main(camera_names, duration, browser_choices):
             print("Camera is already in use by another application or browser tab.")
         else:
             print(f"Unexpected Error: {e}")
+    finally:
+        pool.print_stats()
+        if own_pool:
+            pool.close()
 
 
 if __name__ == "__main__":